@@ -4,7 +4,7 @@ from dotenv import load_dotenv
 from sqlalchemy import create_engine
 from alembic import context
 from app.database import Base
-from app.models import client, allocation, asset, daily_return, user
+from app.models import client, allocation, asset, daily_return, user, listed_symbol, symbol_metadata
 
 load_dotenv()
 
@@ -0,0 +1,39 @@
+"""create listed_symbols table
+
+Revision ID: 3b9d2f6c1a47
+Revises: ec97b72cafc0
+Create Date: 2025-08-20 10:12:04.512391
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3b9d2f6c1a47'
+down_revision: Union[str, Sequence[str], None] = 'ec97b72cafc0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'listed_symbols',
+        sa.Column('symbol', sa.String(), nullable=False),
+        sa.Column('name', sa.String(), nullable=False),
+        sa.Column('exchange', sa.String(), nullable=False),
+        sa.Column('is_etf', sa.Boolean(), nullable=False),
+        sa.Column('row_hash', sa.String(length=16), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.PrimaryKeyConstraint('symbol'),
+    )
+    op.create_index('ix_listed_symbols_exchange_is_etf_symbol', 'listed_symbols', ['exchange', 'is_etf', 'symbol'])
+    op.create_index('ix_listed_symbols_is_etf_symbol', 'listed_symbols', ['is_etf', 'symbol'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_listed_symbols_is_etf_symbol', table_name='listed_symbols')
+    op.drop_index('ix_listed_symbols_exchange_is_etf_symbol', table_name='listed_symbols')
+    op.drop_table('listed_symbols')
@@ -0,0 +1,37 @@
+"""unique (asset_id, date) on daily_returns
+
+Revision ID: 5a7e3c9b2d18
+Revises: 8e4c1d2a9f03
+Create Date: 2025-08-22 14:05:51.736920
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5a7e3c9b2d18'
+down_revision: Union[str, Sequence[str], None] = '8e4c1d2a9f03'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Remove duplicados antes de criar o índice único, mantendo o registro mais recente (maior id).
+    # asset_id é nullable e o índice único trata NULLs como distintos: essas linhas ficam.
+    op.execute(
+        """
+        DELETE FROM daily_returns
+        WHERE asset_id IS NOT NULL
+          AND id NOT IN (
+            SELECT MAX(id) FROM daily_returns WHERE asset_id IS NOT NULL GROUP BY asset_id, date
+        )
+        """
+    )
+    op.create_index('ux_daily_returns_asset_id_date', 'daily_returns', ['asset_id', 'date'], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index('ux_daily_returns_asset_id_date', table_name='daily_returns')
@@ -0,0 +1,36 @@
+"""create symbol_metadata table
+
+Revision ID: 8e4c1d2a9f03
+Revises: 3b9d2f6c1a47
+Create Date: 2025-08-21 09:40:17.208114
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8e4c1d2a9f03'
+down_revision: Union[str, Sequence[str], None] = '3b9d2f6c1a47'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'symbol_metadata',
+        sa.Column('symbol', sa.String(), nullable=False),
+        sa.Column('currency', sa.String(), nullable=True),
+        sa.Column('exchange', sa.String(), nullable=True),
+        sa.Column('quote_type', sa.String(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.PrimaryKeyConstraint('symbol'),
+    )
+    op.create_index(op.f('ix_symbol_metadata_updated_at'), 'symbol_metadata', ['updated_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_symbol_metadata_updated_at'), table_name='symbol_metadata')
+    op.drop_table('symbol_metadata')
@@ -0,0 +1,146 @@
+"""partition daily_returns by year
+
+Revision ID: d41c7e8a6b25
+Revises: 5a7e3c9b2d18
+Create Date: 2025-08-25 11:47:32.904118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.core.config import BACKFILL_START_DATE
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd41c7e8a6b25'
+down_revision: Union[str, Sequence[str], None] = '5a7e3c9b2d18'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Cria (se não existir) a partição anual daily_returns_yYYYY. Linhas do ano que já
+# tenham caído na partição default são movidas para a nova partição antes do ATTACH
+# (que falharia com elas na default). Um advisory lock por ano serializa chamadas
+# concorrentes (blocos do chord gravando o primeiro dia de um ano novo): quem chega
+# depois espera o commit do primeiro e encontra a partição pronta (a checagem após o lock
+# consulta pg_class porque to_regclass usa o cache do catálogo e não veria esse commit).
+CREATE_PARTITION_FUNCTION = """
+CREATE OR REPLACE FUNCTION create_daily_returns_partition(partition_year integer)
+RETURNS void AS $$
+DECLARE
+    partition_name text := 'daily_returns_y' || partition_year;
+    range_start date := make_date(partition_year, 1, 1);
+    range_end date := make_date(partition_year + 1, 1, 1);
+BEGIN
+    IF to_regclass(partition_name) IS NOT NULL THEN
+        RETURN;
+    END IF;
+    PERFORM pg_advisory_xact_lock(hashtext('daily_returns_partition'), partition_year);
+    IF EXISTS (
+        SELECT 1 FROM pg_class
+        WHERE relname = partition_name AND relnamespace = current_schema()::regnamespace
+    ) THEN
+        RETURN;
+    END IF;
+    EXECUTE format('CREATE TABLE %I (LIKE daily_returns INCLUDING DEFAULTS)', partition_name);
+    IF to_regclass('daily_returns_default') IS NOT NULL THEN
+        EXECUTE format(
+            'WITH moved AS (DELETE FROM daily_returns_default WHERE date >= %L AND date < %L RETURNING *) '
+            'INSERT INTO %I SELECT * FROM moved',
+            range_start, range_end, partition_name
+        );
+    END IF;
+    EXECUTE format(
+        'ALTER TABLE daily_returns ATTACH PARTITION %I FOR VALUES FROM (%L) TO (%L)',
+        partition_name, range_start, range_end
+    );
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+
+def upgrade() -> None:
+    # Particionamento declarativo só existe no PostgreSQL; nos demais bancos a tabela fica como está.
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    op.rename_table('daily_returns', 'daily_returns_legacy')
+    op.execute('ALTER TABLE daily_returns_legacy RENAME CONSTRAINT daily_returns_pkey TO daily_returns_legacy_pkey')
+    op.execute('ALTER INDEX ux_daily_returns_asset_id_date RENAME TO ux_daily_returns_legacy_asset_id_date')
+    op.execute('ALTER INDEX ix_daily_returns_id RENAME TO ix_daily_returns_legacy_id')
+    op.execute('ALTER SEQUENCE daily_returns_id_seq OWNED BY NONE')
+
+    # A chave primária de uma tabela particionada precisa incluir a coluna de partição.
+    op.execute(
+        """
+        CREATE TABLE daily_returns (
+            id integer NOT NULL DEFAULT nextval('daily_returns_id_seq'),
+            asset_id integer REFERENCES assets (id),
+            date date NOT NULL,
+            close_price double precision NOT NULL,
+            PRIMARY KEY (id, date)
+        ) PARTITION BY RANGE (date)
+        """
+    )
+    op.execute('ALTER SEQUENCE daily_returns_id_seq OWNED BY daily_returns.id')
+    op.execute(CREATE_PARTITION_FUNCTION)
+    # Partições do ano mais antigo (histórico gravado ou início do backfill) até o próximo ano.
+    op.execute(
+        sa.text(
+            """
+            SELECT create_daily_returns_partition(y)
+            FROM generate_series(
+                LEAST(
+                    COALESCE((SELECT EXTRACT(YEAR FROM MIN(date))::integer FROM daily_returns_legacy),
+                             :backfill_year),
+                    :backfill_year,
+                    EXTRACT(YEAR FROM CURRENT_DATE)::integer
+                ),
+                EXTRACT(YEAR FROM CURRENT_DATE)::integer + 1
+            ) AS y
+            """
+        ).bindparams(backfill_year=BACKFILL_START_DATE.year)
+    )
+    # Rede de segurança para datas fora das partições anuais já criadas.
+    op.execute('CREATE TABLE daily_returns_default PARTITION OF daily_returns DEFAULT')
+
+    op.execute(
+        'INSERT INTO daily_returns (id, asset_id, date, close_price) '
+        'SELECT id, asset_id, date, close_price FROM daily_returns_legacy'
+    )
+    op.drop_table('daily_returns_legacy')
+
+    # Índices depois da cópia: criados na tabela pai, propagam para todas as partições.
+    op.create_index('ux_daily_returns_asset_id_date', 'daily_returns', ['asset_id', 'date'], unique=True)
+    op.create_index(op.f('ix_daily_returns_id'), 'daily_returns', ['id'], unique=False)
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    op.execute('ALTER SEQUENCE daily_returns_id_seq OWNED BY NONE')
+    op.rename_table('daily_returns', 'daily_returns_partitioned')
+    op.execute('ALTER TABLE daily_returns_partitioned RENAME CONSTRAINT daily_returns_pkey TO daily_returns_partitioned_pkey')
+    op.execute('ALTER INDEX ux_daily_returns_asset_id_date RENAME TO ux_daily_returns_partitioned_asset_id_date')
+    op.execute('ALTER INDEX ix_daily_returns_id RENAME TO ix_daily_returns_partitioned_id')
+
+    op.create_table('daily_returns',
+    sa.Column('id', sa.Integer(), server_default=sa.text("nextval('daily_returns_id_seq')"), nullable=False),
+    sa.Column('asset_id', sa.Integer(), nullable=True),
+    sa.Column('date', sa.Date(), nullable=False),
+    sa.Column('close_price', sa.Float(), nullable=False),
+    sa.ForeignKeyConstraint(['asset_id'], ['assets.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.execute('ALTER SEQUENCE daily_returns_id_seq OWNED BY daily_returns.id')
+    op.execute(
+        'INSERT INTO daily_returns (id, asset_id, date, close_price) '
+        'SELECT id, asset_id, date, close_price FROM daily_returns_partitioned'
+    )
+    op.create_index(op.f('ix_daily_returns_id'), 'daily_returns', ['id'], unique=False)
+    op.create_index('ux_daily_returns_asset_id_date', 'daily_returns', ['asset_id', 'date'], unique=True)
+
+    op.execute('DROP TABLE daily_returns_partitioned CASCADE')
+    op.execute('DROP FUNCTION IF EXISTS create_daily_returns_partition(integer)')
@@ -0,0 +1,138 @@
+import asyncio
+import json
+import logging
+from collections import defaultdict
+from fastapi import WebSocket
+
+from app.core.config import CAPTADO_BROADCAST_INTERVAL, CAPTADO_SEND_TIMEOUT
+from app.database import SessionLocal
+from app.repositories import daily_returns as dr_repo
+
+logger = logging.getLogger(__name__)
+
+SubscriptionKey = tuple[int, int]
+
+
+class CaptadoHub:
+    """
+    Hub de broadcast do WebSocket de captado.
+
+    Mantém um único loop por combinação (month, year) inscrita: a cada tick o snapshot
+    é calculado uma vez, serializado uma vez e o mesmo payload é enviado a todos os
+    sockets daquela inscrição. A carga no banco e no Yahoo passa a depender do número
+    de combinações distintas, e não do número de conexões abertas.
+    """
+
+    def __init__(self, interval: float = CAPTADO_BROADCAST_INTERVAL, send_timeout: float = CAPTADO_SEND_TIMEOUT):
+        self.interval = interval
+        self.send_timeout = send_timeout
+        self._subscribers: dict[SubscriptionKey, set[WebSocket]] = defaultdict(set)
+        self._tasks: dict[SubscriptionKey, asyncio.Task] = {}
+        self._last_payload: dict[SubscriptionKey, str] = {}
+
+    async def subscribe(self, websocket: WebSocket, month: int, year: int):
+        """
+        Inscreve um socket na combinação (month, year).
+
+        Se já existir um snapshot calculado para a combinação ele é enviado na hora,
+        sem esperar o próximo tick.
+
+        Args:
+            websocket (WebSocket): Conexão já aceita.
+            month (int): Mês de referência.
+            year (int): Ano de referência.
+        """
+        key = (month, year)
+        self._subscribers[key].add(websocket)
+
+        payload = self._last_payload.get(key)
+        if payload is not None and not await self._send(websocket, payload):
+            self.unsubscribe(websocket, month, year)
+            return
+
+        if key not in self._tasks:
+            self._tasks[key] = asyncio.create_task(self._run(key))
+
+    def unsubscribe(self, websocket: WebSocket, month: int, year: int):
+        """
+        Remove o socket da inscrição e encerra o loop quando não houver mais ninguém.
+
+        Args:
+            websocket (WebSocket): Conexão a remover.
+            month (int): Mês de referência.
+            year (int): Ano de referência.
+        """
+        key = (month, year)
+        subscribers = self._subscribers.get(key)
+        if subscribers is None:
+            return
+        subscribers.discard(websocket)
+        if subscribers:
+            return
+
+        self._subscribers.pop(key, None)
+        self._last_payload.pop(key, None)
+        task = self._tasks.pop(key, None)
+        if task and task is not asyncio.current_task():
+            task.cancel()
+
+    def subscriber_count(self, month: int | None = None, year: int | None = None) -> int:
+        """Quantidade de sockets inscritos (total ou de uma combinação)."""
+        if month is None or year is None:
+            return sum(len(subs) for subs in self._subscribers.values())
+        return len(self._subscribers.get((month, year), ()))
+
+    async def shutdown(self):
+        """Cancela todos os loops ativos (usado no shutdown da aplicação)."""
+        tasks = list(self._tasks.values())
+        self._tasks.clear()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._subscribers.clear()
+        self._last_payload.clear()
+
+    async def _run(self, key: SubscriptionKey):
+        month, year = key
+        try:
+            while self._subscribers.get(key):
+                try:
+                    async with SessionLocal() as session:
+                        data = await dr_repo.get_captado_snapshot(session, year, month)
+                    payload = json.dumps(data, ensure_ascii=False)
+                    self._last_payload[key] = payload
+                    await self._broadcast(key, payload)
+                except asyncio.CancelledError:
+                    raise
+                except Exception:
+                    logger.exception("Erro ao calcular snapshot de captado para %s/%s", month, year)
+
+                if not self._subscribers.get(key):
+                    break
+                await asyncio.sleep(self.interval)
+        finally:
+            if self._tasks.get(key) is asyncio.current_task():
+                self._tasks.pop(key, None)
+
+    async def _broadcast(self, key: SubscriptionKey, payload: str):
+        subscribers = list(self._subscribers.get(key, ()))
+        results = await asyncio.gather(
+            *(self._send(ws, payload) for ws in subscribers),
+            return_exceptions=True,
+        )
+        for ws, ok in zip(subscribers, results):
+            if ok is not True:
+                self.unsubscribe(ws, *key)
+
+    async def _send(self, websocket: WebSocket, payload: str) -> bool:
+        try:
+            await asyncio.wait_for(websocket.send_text(payload), timeout=self.send_timeout)
+            return True
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            # Socket lento ou fechado: sai da inscrição para não travar os demais.
+            return False
+
+
+captado_hub = CaptadoHub()
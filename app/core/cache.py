@@ -0,0 +1,34 @@
+import redis.asyncio as aioredis
+
+from app.core.config import REDIS_HOST, REDIS_MAX_CONNECTIONS, REDIS_PORT
+
+_pool: aioredis.ConnectionPool | None = None
+
+
+def get_redis() -> aioredis.Redis:
+    """
+    Retorna um cliente Redis assíncrono sobre o pool compartilhado do processo.
+
+    O pool é criado no startup da aplicação (lifespan) ou, na falta dele, no primeiro uso.
+    As respostas não são decodificadas: o cache guarda tanto texto quanto blobs binários
+    (parquet), e float()/json.loads aceitam bytes diretamente.
+
+    Returns:
+        redis.asyncio.Redis: Cliente que compartilha as conexões do pool.
+    """
+    global _pool
+    if _pool is None:
+        _pool = aioredis.ConnectionPool(
+            host=REDIS_HOST,
+            port=int(REDIS_PORT or 6379),
+            max_connections=REDIS_MAX_CONNECTIONS,
+        )
+    return aioredis.Redis(connection_pool=_pool)
+
+
+async def close_redis():
+    """Fecha as conexões do pool compartilhado (shutdown da aplicação ou fim de task Celery)."""
+    global _pool
+    if _pool is not None:
+        pool, _pool = _pool, None
+        await pool.aclose()
@@ -1,3 +1,4 @@
+from datetime import date
 from dotenv import load_dotenv
 import os
 
@@ -14,3 +15,70 @@ YFINANCE_DEFAULT_INTERVAL= os.getenv("YFINANCE_DEFAULT_INTERVAL=1m")
 
 REDIS_HOST = os.getenv("REDIS_HOST")
 REDIS_PORT = os.getenv("REDIS_PORT")
+
+CAPTADO_BROADCAST_INTERVAL = float(os.getenv("CAPTADO_BROADCAST_INTERVAL", "5"))
+CAPTADO_SEND_TIMEOUT = float(os.getenv("CAPTADO_SEND_TIMEOUT", "2"))
+
+REDIS_MAX_CONNECTIONS = int(os.getenv("REDIS_MAX_CONNECTIONS", "50"))
+YAHOO_MAX_WORKERS = int(os.getenv("YAHOO_MAX_WORKERS", "8"))
+
+PRICE_LOCK_ENABLED = os.getenv("PRICE_LOCK_ENABLED", "true").lower() == "true"
+PRICE_LOCK_TIMEOUT = int(os.getenv("PRICE_LOCK_TIMEOUT", "30"))
+PRICE_LOCK_WAIT = float(os.getenv("PRICE_LOCK_WAIT", "10"))
+PRICE_LOCK_POLL_INTERVAL = float(os.getenv("PRICE_LOCK_POLL_INTERVAL", "0.1"))
+
+PRICE_MEMORY_MAXSIZE = int(os.getenv("PRICE_MEMORY_MAXSIZE", "2048"))
+PRICE_MEMORY_TTL = float(os.getenv("PRICE_MEMORY_TTL", "15"))
+CURRENCY_MEMORY_TTL = float(os.getenv("CURRENCY_MEMORY_TTL", "86400"))
+PRICE_INVALIDATION_CHANNEL = os.getenv("PRICE_INVALIDATION_CHANNEL", "asset_price:invalidate")
+
+PRICE_OPEN_TTL = int(os.getenv("PRICE_OPEN_TTL", "60"))
+PRICE_HARD_TTL = int(os.getenv("PRICE_HARD_TTL", "86400"))
+PRICE_PREWARM_LEAD = int(os.getenv("PRICE_PREWARM_LEAD", "600"))
+
+CELERY_BROKER_URL = os.getenv("CELERY_BROKER_URL", "redis://redis:6379/0")
+CELERY_RESULT_BACKEND = os.getenv("CELERY_RESULT_BACKEND", "redis://redis:6379/1")
+
+HOT_PRICES_INTERVAL = int(os.getenv("HOT_PRICES_INTERVAL", "60"))
+HOT_PRICES_BATCH_SIZE = int(os.getenv("HOT_PRICES_BATCH_SIZE", "200"))
+
+PRICE_PROVIDER = os.getenv("PRICE_PROVIDER", "yfinance")
+SYNTHETIC_PRICE_SEED = int(os.getenv("SYNTHETIC_PRICE_SEED", "42"))
+SYNTHETIC_PRICE_LATENCY = float(os.getenv("SYNTHETIC_PRICE_LATENCY", "0"))
+SYNTHETIC_PRICE_JITTER = float(os.getenv("SYNTHETIC_PRICE_JITTER", "0"))
+
+MARKET_DATA_RATE = float(os.getenv("MARKET_DATA_RATE", "5"))
+MARKET_DATA_BURST = float(os.getenv("MARKET_DATA_BURST", "10"))
+MARKET_DATA_MAX_WAIT = float(os.getenv("MARKET_DATA_MAX_WAIT", "5"))
+MARKET_DATA_REDIS_LIMIT = os.getenv("MARKET_DATA_REDIS_LIMIT", "true").lower() == "true"
+MARKET_DATA_BREAKER_FAILURE_RATIO = float(os.getenv("MARKET_DATA_BREAKER_FAILURE_RATIO", "0.5"))
+MARKET_DATA_BREAKER_MIN_CALLS = int(os.getenv("MARKET_DATA_BREAKER_MIN_CALLS", "10"))
+MARKET_DATA_BREAKER_WINDOW = float(os.getenv("MARKET_DATA_BREAKER_WINDOW", "60"))
+MARKET_DATA_BREAKER_COOLDOWN = float(os.getenv("MARKET_DATA_BREAKER_COOLDOWN", "30"))
+
+TICKERS_VERSION_CHECK_INTERVAL = float(os.getenv("TICKERS_VERSION_CHECK_INTERVAL", "30"))
+
+LISTED_SYMBOLS_REFRESH_INTERVAL = int(os.getenv("LISTED_SYMBOLS_REFRESH_INTERVAL", str(6 * 3600)))
+# Download com menos que esta fração das linhas gravadas é tratado como falha parcial (nada é removido).
+LISTED_SYMBOLS_MIN_DOWNLOAD_RATIO = float(os.getenv("LISTED_SYMBOLS_MIN_DOWNLOAD_RATIO", "0.9"))
+
+SYMBOL_METADATA_MAX_AGE = int(os.getenv("SYMBOL_METADATA_MAX_AGE", str(7 * 86400)))
+# Símbolos sem dados no provedor ficam gravados sem atributos e só são consultados de novo após este prazo.
+SYMBOL_METADATA_NEGATIVE_TTL = int(os.getenv("SYMBOL_METADATA_NEGATIVE_TTL", "86400"))
+SYMBOL_METADATA_REFRESH_INTERVAL = int(os.getenv("SYMBOL_METADATA_REFRESH_INTERVAL", "86400"))
+SYMBOL_METADATA_BATCH_SIZE = int(os.getenv("SYMBOL_METADATA_BATCH_SIZE", "100"))
+# Símbolos por chamada ao provedor; os blocos rodam em paralelo no executor e cada símbolo custa um token.
+SYMBOL_METADATA_CHUNK_SIZE = int(os.getenv("SYMBOL_METADATA_CHUNK_SIZE", "5"))
+
+BACKFILL_START_DATE = date.fromisoformat(os.getenv("BACKFILL_START_DATE", "2025-01-01"))
+BACKFILL_CHUNK_SIZE = int(os.getenv("BACKFILL_CHUNK_SIZE", "50"))
+BACKFILL_PROGRESS_TTL = int(os.getenv("BACKFILL_PROGRESS_TTL", "86400"))
+
+DAILY_RETURNS_CHUNK_SIZE = int(os.getenv("DAILY_RETURNS_CHUNK_SIZE", "100"))
+DAILY_RETURNS_MAX_RETRIES = int(os.getenv("DAILY_RETURNS_MAX_RETRIES", "5"))
+
+PRICE_GAP_LOOKBACK_DAYS = int(os.getenv("PRICE_GAP_LOOKBACK_DAYS", "365"))
+PRICE_GAP_REPAIR_INTERVAL = int(os.getenv("PRICE_GAP_REPAIR_INTERVAL", "86400"))
+
+DAILY_RETURNS_PARTITION_INTERVAL = int(os.getenv("DAILY_RETURNS_PARTITION_INTERVAL", "86400"))
+DAILY_RETURNS_PARTITIONS_AHEAD = int(os.getenv("DAILY_RETURNS_PARTITIONS_AHEAD", "1"))
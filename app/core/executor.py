@@ -0,0 +1,34 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from app.core.config import YAHOO_MAX_WORKERS
+
+_executor: ThreadPoolExecutor | None = None
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """Pool de threads limitado usado para todo I/O bloqueante de dados de mercado (Yahoo)."""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=YAHOO_MAX_WORKERS, thread_name_prefix="yahoo")
+    return _executor
+
+
+async def run_in_executor(func, *args, **kwargs):
+    """
+    Executa uma função bloqueante no pool limitado, sem travar o event loop.
+
+    Diferente de asyncio.to_thread, o número de chamadas simultâneas ao Yahoo fica
+    limitado a YAHOO_MAX_WORKERS; as demais aguardam na fila do executor.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_executor(), partial(func, *args, **kwargs))
+
+
+def shutdown_executor():
+    """Encerra o pool de threads (shutdown da aplicação)."""
+    global _executor
+    if _executor is not None:
+        executor, _executor = _executor, None
+        executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,183 @@
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta, timezone
+from functools import lru_cache
+from zoneinfo import ZoneInfo
+
+from app.core.config import PRICE_HARD_TTL, PRICE_OPEN_TTL
+
+
+@dataclass(frozen=True)
+class ExchangeCalendar:
+    """Horário regular de pregão de uma bolsa (fuso, abertura, fechamento e feriados)."""
+
+    code: str
+    tz: str
+    opens_at: time
+    closes_at: time
+
+    @property
+    def zone(self) -> ZoneInfo:
+        return ZoneInfo(self.tz)
+
+    def holidays(self, year: int) -> frozenset:
+        return _HOLIDAYS[self.code](year)
+
+    def is_trading_day(self, day: date) -> bool:
+        return day.weekday() < 5 and day not in self.holidays(day.year)
+
+
+def _easter(year: int) -> date:
+    """Domingo de Páscoa (algoritmo gregoriano anônimo)."""
+    a = year % 19
+    b, c = divmod(year, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month, day = divmod(h + l - 7 * m + 114, 31)
+    return date(year, month, day + 1)
+
+
+def _nth_weekday(year: int, month: int, weekday: int, n: int) -> date:
+    first = date(year, month, 1)
+    return first + timedelta(days=(weekday - first.weekday()) % 7 + 7 * (n - 1))
+
+
+def _last_weekday(year: int, month: int, weekday: int) -> date:
+    last = (date(year, month, 28) + timedelta(days=4)).replace(day=1) - timedelta(days=1)
+    return last - timedelta(days=(last.weekday() - weekday) % 7)
+
+
+def _observed(day: date) -> date:
+    """Feriado no sábado é observado na sexta; no domingo, na segunda."""
+    if day.weekday() == 5:
+        return day - timedelta(days=1)
+    if day.weekday() == 6:
+        return day + timedelta(days=1)
+    return day
+
+
+@lru_cache(maxsize=32)
+def _us_holidays(year: int) -> frozenset:
+    days = {
+        _nth_weekday(year, 1, 0, 3),             # Martin Luther King Jr. Day
+        _nth_weekday(year, 2, 0, 3),             # Presidents' Day
+        _easter(year) - timedelta(days=2),       # Good Friday
+        _last_weekday(year, 5, 0),               # Memorial Day
+        _observed(date(year, 7, 4)),             # Independence Day
+        _nth_weekday(year, 9, 0, 1),             # Labor Day
+        _nth_weekday(year, 11, 3, 4),            # Thanksgiving
+        _observed(date(year, 12, 25)),           # Christmas
+    }
+    new_year = date(year, 1, 1)
+    if new_year.weekday() != 5:                  # NYSE não compensa o Ano Novo no sábado
+        days.add(_observed(new_year))
+    if year >= 2022:
+        days.add(_observed(date(year, 6, 19)))   # Juneteenth
+    return frozenset(days)
+
+
+@lru_cache(maxsize=32)
+def _b3_holidays(year: int) -> frozenset:
+    easter = _easter(year)
+    days = {
+        date(year, 1, 1),
+        easter - timedelta(days=48),             # Carnaval (segunda)
+        easter - timedelta(days=47),             # Carnaval (terça)
+        easter - timedelta(days=2),              # Sexta-feira Santa
+        date(year, 4, 21),                       # Tiradentes
+        date(year, 5, 1),                        # Dia do Trabalho
+        easter + timedelta(days=60),             # Corpus Christi
+        date(year, 9, 7),                        # Independência
+        date(year, 10, 12),                      # Nossa Senhora Aparecida
+        date(year, 11, 2),                       # Finados
+        date(year, 11, 15),                      # Proclamação da República
+        date(year, 12, 24),
+        date(year, 12, 25),
+        date(year, 12, 31),
+    }
+    if year >= 2024:
+        days.add(date(year, 11, 20))             # Consciência Negra
+    return frozenset(days)
+
+
+_HOLIDAYS = {"XNYS": _us_holidays, "BVMF": _b3_holidays}
+
+US_EQUITIES = ExchangeCalendar("XNYS", "America/New_York", time(9, 30), time(16, 0))
+B3 = ExchangeCalendar("BVMF", "America/Sao_Paulo", time(10, 0), time(18, 0))
+
+# Nomes de bolsa usados no diretório de tickers (EXCHANGE_MAP) -> calendário.
+EXCHANGE_CALENDARS = {
+    "NASDAQ": US_EQUITIES,
+    "NYSE": US_EQUITIES,
+    "AMEX": US_EQUITIES,
+    "NYSE Arca": US_EQUITIES,
+    "Cboe BZX": US_EQUITIES,
+    "IEX": US_EQUITIES,
+    "B3": B3,
+}
+
+
+def get_calendar(exchange: str | None) -> ExchangeCalendar:
+    """Calendário da bolsa; bolsas desconhecidas usam o pregão americano."""
+    return EXCHANGE_CALENDARS.get(exchange, US_EQUITIES)
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def is_market_open(calendar: ExchangeCalendar, now: datetime = None) -> bool:
+    """Indica se o pregão regular está aberto no instante informado."""
+    local = (now or _now()).astimezone(calendar.zone)
+    return (
+        calendar.is_trading_day(local.date())
+        and calendar.opens_at <= local.time() < calendar.closes_at
+    )
+
+
+def next_open(calendar: ExchangeCalendar, now: datetime = None) -> datetime:
+    """Próxima abertura estritamente posterior ao instante informado (em UTC)."""
+    local = (now or _now()).astimezone(calendar.zone)
+    day = local.date()
+    while True:
+        if calendar.is_trading_day(day):
+            opening = datetime.combine(day, calendar.opens_at, tzinfo=calendar.zone)
+            if opening > local:
+                return opening.astimezone(timezone.utc)
+        day += timedelta(days=1)
+
+
+def price_ttl(exchange: str | None, now: datetime = None) -> tuple[int, int]:
+    """
+    Política de TTL do cache de preço conforme o pregão da bolsa.
+
+    Com o mercado aberto o preço fica fresco por PRICE_OPEN_TTL segundos. Com o mercado
+    fechado o último fechamento não muda, então o preço fica fresco até a próxima abertura.
+
+    Args:
+        exchange (str | None): Nome da bolsa (como no EXCHANGE_MAP).
+        now (datetime, optional): Instante de referência (UTC).
+
+    Returns:
+        tuple[int, int]: (soft TTL, hard TTL) em segundos.
+    """
+    now = now or _now()
+    calendar = get_calendar(exchange)
+    if is_market_open(calendar, now):
+        soft = PRICE_OPEN_TTL
+    else:
+        soft = max(int((next_open(calendar, now) - now).total_seconds()), PRICE_OPEN_TTL)
+    return soft, soft + PRICE_HARD_TTL
+
+
+def opens_within(exchange: str | None, seconds: float, now: datetime = None) -> bool:
+    """Indica se a bolsa abre nos próximos `seconds` segundos (e está fechada agora)."""
+    now = now or _now()
+    calendar = get_calendar(exchange)
+    if is_market_open(calendar, now):
+        return False
+    return (next_open(calendar, now) - now).total_seconds() <= seconds
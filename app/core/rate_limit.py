@@ -0,0 +1,299 @@
+import asyncio
+import logging
+import time
+from collections import deque
+
+from app.core.cache import get_redis
+from app.core.config import (
+    MARKET_DATA_BREAKER_COOLDOWN,
+    MARKET_DATA_BREAKER_FAILURE_RATIO,
+    MARKET_DATA_BREAKER_MIN_CALLS,
+    MARKET_DATA_BREAKER_WINDOW,
+    MARKET_DATA_BURST,
+    MARKET_DATA_MAX_WAIT,
+    MARKET_DATA_RATE,
+    MARKET_DATA_REDIS_LIMIT,
+)
+from app.core.executor import run_in_executor
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimitedError(Exception):
+    """A chamada esperaria mais que o permitido por um token do rate limiter."""
+
+
+class CircuitOpenError(Exception):
+    """O circuit breaker está aberto: a chamada externa nem é tentada."""
+
+
+class TokenBucket:
+    """
+    Token bucket local ao processo.
+
+    Repõe `rate` tokens por segundo até `capacity`. `reserve()` consome um token e
+    devolve quanto tempo é preciso esperar por ele (0 se havia token disponível). Com
+    `max_wait`, uma reserva que esperaria mais que isso não consome nada: a rejeição não
+    aumenta a dívida do bucket, que volta a liberar chamadas assim que a carga cai.
+    """
+
+    def __init__(self, rate: float, capacity: float, timer=time.monotonic):
+        self.rate = rate
+        self.capacity = capacity
+        self._timer = timer
+        self._tokens = capacity
+        self._updated_at = timer()
+
+    def reserve(self, cost: float = 1.0, max_wait: float = None) -> float:
+        now = self._timer()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+        remaining = self._tokens - cost
+        wait = 0.0 if remaining >= 0 else -remaining / self.rate
+        if max_wait is None or wait <= max_wait:
+            self._tokens = remaining
+        return wait
+
+    def refund(self, cost: float = 1.0):
+        """Devolve tokens de uma reserva que não chegou a ser usada."""
+        self._tokens = min(self.capacity, self._tokens + cost)
+
+
+# Token bucket no Redis: repõe os tokens pelo tempo decorrido e consome `cost`, exceto
+# quando a espera passaria de `max_wait` (a reserva rejeitada não consome nada; -1 = sem limite).
+# Devolve (como string, para não truncar) quantos segundos esperar pelo token.
+_REDIS_BUCKET_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local cost = tonumber(ARGV[4])
+local max_wait = tonumber(ARGV[5])
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local wait = 0
+if tokens - cost < 0 then
+    wait = (cost - tokens) / rate
+end
+if max_wait < 0 or wait <= max_wait then
+    tokens = tokens - cost
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 60)
+return tostring(wait)
+"""
+
+
+class RedisTokenBucket:
+    """Token bucket compartilhado entre workers da API e Celery, mantido em um hash no Redis."""
+
+    def __init__(self, key: str, rate: float, capacity: float):
+        self.key = key
+        self.rate = rate
+        self.capacity = capacity
+
+    async def reserve(self, cost: float = 1.0, max_wait: float = None) -> float:
+        wait = await get_redis().eval(
+            _REDIS_BUCKET_SCRIPT, 1, self.key, self.rate, self.capacity, time.time(), cost,
+            -1 if max_wait is None else max_wait,
+        )
+        return float(wait)
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker por taxa de erro em janela deslizante.
+
+    Abre quando, nos últimos `window` segundos, houve ao menos `min_calls` chamadas e a
+    fração de falhas chegou a `failure_ratio`. Aberto, rejeita tudo por `cooldown`
+    segundos; depois deixa passar uma chamada de teste (half-open) que fecha o circuito
+    se der certo ou o reabre se falhar.
+    """
+
+    def __init__(self, failure_ratio: float, min_calls: int, window: float, cooldown: float, timer=time.monotonic):
+        self.failure_ratio = failure_ratio
+        self.min_calls = min_calls
+        self.window = window
+        self.cooldown = cooldown
+        self._timer = timer
+        self._outcomes: deque = deque()
+        self._opened_at: float | None = None
+        self._probing = False
+        self.trips = 0
+
+    @property
+    def state(self) -> str:
+        if self._opened_at is None:
+            return "closed"
+        if self._timer() - self._opened_at < self.cooldown:
+            return "open"
+        return "half_open"
+
+    def allow(self) -> str | None:
+        """
+        Decide se uma chamada pode ser feita.
+
+        Returns:
+            "call" com o circuito fechado, "probe" para a chamada de teste do half-open ou
+            None se a chamada deve ser rejeitada. O valor é repassado a `record`/`release`.
+        """
+        state = self.state
+        if state == "closed":
+            return "call"
+        if state == "half_open" and not self._probing:
+            self._probing = True
+            return "probe"
+        return None
+
+    def release(self, ticket: str):
+        """Libera a vaga de teste do half-open quando a chamada liberada nem chegou a ser feita."""
+        if ticket == "probe":
+            self._probing = False
+
+    def record(self, ok: bool, ticket: str = "call"):
+        now = self._timer()
+        if ticket == "probe":
+            # Só o resultado da própria sonda fecha ou reabre o circuito.
+            self._probing = False
+            if ok:
+                self._opened_at = None
+                self._outcomes.clear()
+            else:
+                self._opened_at = now
+                self.trips += 1
+                logger.warning("Circuit breaker de dados de mercado reaberto (sonda falhou)")
+            return
+        if self._opened_at is not None:
+            # Chamada liberada antes da abertura que terminou depois: não decide nada.
+            return
+
+        self._outcomes.append((now, ok))
+        while self._outcomes and self._outcomes[0][0] < now - self.window:
+            self._outcomes.popleft()
+        failures = sum(1 for _, success in self._outcomes if not success)
+        if len(self._outcomes) >= self.min_calls and failures / len(self._outcomes) >= self.failure_ratio:
+            self._opened_at = now
+            self.trips += 1
+            logger.warning("Circuit breaker de dados de mercado aberto (%s/%s falhas)", failures, len(self._outcomes))
+
+    def reset(self):
+        self._outcomes.clear()
+        self._opened_at = None
+        self._probing = False
+
+
+class MarketDataGuard:
+    """
+    Porta de saída para todas as chamadas a provedores de dados de mercado.
+
+    Cada chamada passa pelo token bucket do processo, pelo token bucket global no Redis
+    e pelo circuit breaker antes de ir para o executor limitado. Chamadas que esperariam
+    mais de `max_wait` segundos falham com RateLimitedError; com o circuito aberto
+    falham na hora com CircuitOpenError, para que o chamador use o valor em cache.
+    """
+
+    def __init__(self, local_bucket: TokenBucket, redis_bucket: RedisTokenBucket | None,
+                 breaker: CircuitBreaker, max_wait: float):
+        self.local_bucket = local_bucket
+        self.redis_bucket = redis_bucket
+        self.breaker = breaker
+        self.max_wait = max_wait
+        self.calls = 0
+        self.queued = 0
+        self.limited = 0
+        self.rejected = 0
+        self.failures = 0
+
+    async def _wait_for(self, wait: float):
+        if wait <= 0:
+            return
+        if wait > self.max_wait:
+            self.limited += 1
+            raise RateLimitedError(f"Rate limit de dados de mercado: espera de {wait:.2f}s")
+        self.queued += 1
+        try:
+            await asyncio.sleep(wait)
+        finally:
+            self.queued -= 1
+
+    async def _acquire(self, cost: float = 1.0):
+        # Reservas rejeitadas (espera > max_wait) não consomem tokens nos buckets.
+        await self._wait_for(self.local_bucket.reserve(cost, self.max_wait))
+        if self.redis_bucket is None:
+            return
+        try:
+            wait = await self.redis_bucket.reserve(cost, self.max_wait)
+        except Exception as e:
+            # Sem Redis seguimos só com o limite local.
+            logger.warning("Rate limiter no Redis indisponível: %s", e)
+            return
+        if wait > self.max_wait:
+            self.local_bucket.refund(cost)
+        await self._wait_for(wait)
+
+    async def call(self, func, *args, cost: float = 1.0, **kwargs):
+        """
+        Executa `func` (bloqueante) no executor, respeitando rate limit e circuit breaker.
+
+        `cost` é o número de tokens cobrados: chamadas que fazem uma requisição ao provedor
+        por símbolo devem pagar um token por símbolo.
+
+        Raises:
+            CircuitOpenError: Circuito aberto.
+            RateLimitedError: Espera por token maior que `max_wait`.
+        """
+        ticket = self.breaker.allow()
+        if ticket is None:
+            self.rejected += 1
+            raise CircuitOpenError("Circuit breaker de dados de mercado aberto")
+
+        try:
+            await self._acquire(cost)
+        except BaseException:
+            # Rate limit ou cancelamento antes da chamada: a vaga de teste do half-open volta.
+            self.breaker.release(ticket)
+            raise
+        self.calls += 1
+        try:
+            result = await run_in_executor(func, *args, **kwargs)
+        except Exception:
+            self.failures += 1
+            self.breaker.record(False, ticket)
+            raise
+        except BaseException:
+            # Cancelada durante a chamada: sem resultado, a sonda não decide o estado.
+            self.breaker.release(ticket)
+            raise
+        self.breaker.record(True, ticket)
+        return result
+
+    def metrics(self) -> dict:
+        return {
+            "calls": self.calls,
+            "queued": self.queued,
+            "limited": self.limited,
+            "rejected": self.rejected,
+            "failures": self.failures,
+            "tripped": self.breaker.trips,
+            "breaker_state": self.breaker.state,
+        }
+
+    def reset(self):
+        self.breaker.reset()
+        self.calls = self.queued = self.limited = self.rejected = self.failures = 0
+        self.breaker.trips = 0
+
+
+market_data_guard = MarketDataGuard(
+    local_bucket=TokenBucket(MARKET_DATA_RATE, MARKET_DATA_BURST),
+    redis_bucket=RedisTokenBucket("ratelimit:market_data", MARKET_DATA_RATE, MARKET_DATA_BURST)
+    if MARKET_DATA_REDIS_LIMIT else None,
+    breaker=CircuitBreaker(
+        failure_ratio=MARKET_DATA_BREAKER_FAILURE_RATIO,
+        min_calls=MARKET_DATA_BREAKER_MIN_CALLS,
+        window=MARKET_DATA_BREAKER_WINDOW,
+        cooldown=MARKET_DATA_BREAKER_COOLDOWN,
+    ),
+    max_wait=MARKET_DATA_MAX_WAIT,
+)
@@ -0,0 +1,177 @@
+import heapq
+import re
+from bisect import bisect_left
+
+import pandas as pd
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+# Ordem dos grupos no ranking: símbolo exato, prefixo do símbolo, nome.
+_EXACT, _SYMBOL_PREFIX, _NAME = 0, 1, 2
+
+
+def _tokens(text: str) -> list[str]:
+    return _TOKEN_RE.findall(text.lower())
+
+
+class _TrieNode:
+    __slots__ = ("children", "ids")
+
+    def __init__(self):
+        self.children: dict[str, "_TrieNode"] = {}
+        # Ativos cujo símbolo começa com o prefixo deste nó, do símbolo mais curto ao mais longo.
+        self.ids: list[int] = []
+
+
+class TickerIndex:
+    """
+    Índice em memória do diretório de tickers para busca por símbolo ou nome.
+
+    Combina uma trie de prefixos sobre os símbolos com um índice invertido sobre os
+    tokens do nome do ativo. É imutável depois de construído: quando o universo muda,
+    um índice novo é montado e substitui o anterior.
+    """
+
+    def __init__(self, symbols: list[str], names: list[str], exchanges: list[str], etfs: list[bool]):
+        self.symbols = symbols
+        self.names = names
+        self.exchanges = exchanges
+        self.etfs = etfs
+
+        self._root = _TrieNode()
+        order = sorted(range(len(symbols)), key=lambda i: (len(symbols[i]), symbols[i]))
+        for i in order:
+            node = self._root
+            for char in symbols[i].upper():
+                node = node.children.setdefault(char, _TrieNode())
+                node.ids.append(i)
+
+        # Ordem de relevância entre nomes: nomes mais curtos primeiro. As listas invertidas
+        # ficam nessa ordem para que a busca pare assim que tiver resultados suficientes.
+        by_name = sorted(range(len(names)), key=lambda i: (len(names[i]), symbols[i]))
+        self._rank = [0] * len(names)
+        self._name_tokens: list[tuple[str, ...]] = [()] * len(names)
+        postings: dict[str, list[int]] = {}
+        for rank, i in enumerate(by_name):
+            self._rank[i] = rank
+            self._name_tokens[i] = tuple(set(_tokens(names[i])))
+            for token in self._name_tokens[i]:
+                postings.setdefault(token, []).append(i)
+        self._postings = postings
+        self._posting_sets = {token: frozenset(ids) for token, ids in postings.items()}
+        self._sorted_tokens = sorted(postings)
+
+    @classmethod
+    def from_df(cls, df: pd.DataFrame) -> "TickerIndex":
+        """Monta o índice a partir do DataFrame de `fetch_all_tickers_df`."""
+        return cls(
+            symbols=[str(s) for s in df["symbol"]],
+            names=["" if pd.isna(n) else str(n) for n in df["name"]],
+            exchanges=[str(e) for e in df["exchange"]],
+            etfs=[bool(e) for e in df["is_etf"]],
+        )
+
+    def __len__(self):
+        return len(self.symbols)
+
+    def _symbol_prefix(self, prefix: str) -> list[int]:
+        node = self._root
+        for char in prefix:
+            node = node.children.get(char)
+            if node is None:
+                return []
+        return node.ids
+
+    def _tokens_with_prefix(self, prefix: str) -> list[str]:
+        tokens = []
+        start = bisect_left(self._sorted_tokens, prefix)
+        for token in self._sorted_tokens[start:]:
+            if not token.startswith(prefix):
+                break
+            tokens.append(token)
+        return tokens
+
+    def _name_matches(self, query: str):
+        """
+        Ativos cujo nome contém todos os tokens da busca (o último pode ser parcial).
+
+        Gera os ativos em ordem de relevância, sem materializar todos os candidatos.
+        """
+        tokens = _tokens(query)
+        if not tokens:
+            return
+        *complete, partial = tokens
+        if any(token not in self._postings for token in complete):
+            return
+
+        lists = [self._postings[token] for token in self._tokens_with_prefix(partial)]
+        complete.sort(key=lambda token: len(self._postings[token]))
+        if complete and len(self._postings[complete[0]]) < sum(map(len, lists)):
+            # A palavra completa mais rara é mais seletiva que o prefixo: ela conduz a busca.
+            others = [self._posting_sets[token] for token in complete[1:]]
+            for i in self._postings[complete[0]]:
+                if all(i in other for other in others) and any(
+                    token.startswith(partial) for token in self._name_tokens[i]
+                ):
+                    yield i
+            return
+
+        required = [self._posting_sets[token] for token in complete]
+        seen: set[int] = set()
+        for i in heapq.merge(*lists, key=self._rank.__getitem__):
+            if i not in seen and all(i in other for other in required):
+                seen.add(i)
+                yield i
+
+    def search(self, query: str, exchange: str = None, is_etf: bool = None, limit: int = 20) -> list[dict]:
+        """
+        Busca ativos por prefixo do símbolo ou por palavras do nome.
+
+        Ranking: símbolo exato, depois símbolos com o prefixo (mais curtos primeiro) e por
+        fim ativos cujo nome contém os termos (nomes mais curtos primeiro).
+
+        Args:
+            query (str): Texto buscado.
+            exchange (str, optional): Filtra pela bolsa.
+            is_etf (bool, optional): Filtra ETFs (True) ou ações (False).
+            limit (int): Máximo de resultados.
+
+        Returns:
+            list[dict]: Ativos encontrados (symbol, name, exchange, is_etf).
+        """
+        query = query.strip()
+        if not query or limit <= 0:
+            return []
+
+        def accepted(i: int) -> bool:
+            return (exchange is None or self.exchanges[i] == exchange) and (
+                is_etf is None or self.etfs[i] == is_etf
+            )
+
+        results: list[tuple[int, int]] = []
+        seen: set[int] = set()
+        for i in self._symbol_prefix(query.upper()):
+            if accepted(i):
+                group = _EXACT if self.symbols[i].upper() == query.upper() else _SYMBOL_PREFIX
+                results.append((group, i))
+                seen.add(i)
+                if len(results) >= limit:
+                    break
+
+        if len(results) < limit:
+            for i in self._name_matches(query):
+                if i not in seen and accepted(i):
+                    results.append((_NAME, i))
+                    if len(results) >= limit:
+                        break
+
+        results.sort(key=lambda r: r[0])
+        return [
+            {
+                "symbol": self.symbols[i],
+                "name": self.names[i],
+                "exchange": self.exchanges[i],
+                "is_etf": self.etfs[i],
+            }
+            for _, i in results[:limit]
+        ]
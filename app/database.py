@@ -24,3 +24,58 @@ Base = declarative_base()
 async def get_db() -> AsyncGenerator[AsyncSession, None]:
     async with SessionLocal() as session:
         yield session
+
+
+def _insert_for(dialect_name: str):
+    if dialect_name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect_name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        raise ValueError(f"Upsert não suportado para o dialeto {dialect_name}")
+    return insert
+
+
+async def bulk_upsert(
+    session: AsyncSession,
+    table,
+    rows: list[dict],
+    index_elements: list[str],
+    update_columns: list[str],
+    chunk_size: int = 1000,
+) -> int:
+    """
+    Insere ou atualiza linhas em lote (INSERT ... ON CONFLICT DO UPDATE).
+
+    Funciona em PostgreSQL e SQLite. As linhas são enviadas em blocos de `chunk_size`
+    para respeitar o limite de parâmetros por comando. Não faz commit.
+
+    Args:
+        session (AsyncSession): Sessão assíncrona do banco.
+        table: Tabela (ou modelo) de destino.
+        rows (list[dict]): Linhas a gravar.
+        index_elements (list[str]): Colunas da chave única usada no conflito.
+        update_columns (list[str]): Colunas sobrescritas quando a linha já existe.
+        chunk_size (int): Linhas por comando.
+
+    Returns:
+        int: Quantidade de linhas enviadas.
+
+    Raises:
+        ValueError: Se o dialeto da sessão não for PostgreSQL nem SQLite.
+    """
+    if not rows:
+        return 0
+    table = getattr(table, "__table__", table)
+    insert = _insert_for(session.bind.dialect.name)
+    for start in range(0, len(rows), chunk_size):
+        stmt = insert(table).values(rows[start:start + chunk_size])
+        if update_columns:
+            stmt = stmt.on_conflict_do_update(
+                index_elements=index_elements,
+                set_={column: stmt.excluded[column] for column in update_columns},
+            )
+        else:
+            stmt = stmt.on_conflict_do_nothing(index_elements=index_elements)
+        await session.execute(stmt)
+    return len(rows)
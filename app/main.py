@@ -1,13 +1,28 @@
 import asyncio
-import json
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect
+from contextlib import asynccontextmanager, suppress
+from fastapi import FastAPI, WebSocket, WebSocketDisconnect, status
 from fastapi.middleware.cors import CORSMiddleware
-from app.database import SessionLocal
-from app.repositories import daily_returns as dr_repo
-from app.repositories.client import get_clients
+from app.core.broadcast import captado_hub
+from app.core.cache import close_redis, get_redis
+from app.core.executor import shutdown_executor
+from app.repositories.assets import listen_price_invalidations
 from app.routers import auth, clients, allocations, assets, prices
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    get_redis()
+    invalidation_listener = asyncio.create_task(listen_price_invalidations())
+    yield
+    invalidation_listener.cancel()
+    with suppress(asyncio.CancelledError):
+        await invalidation_listener
+    await captado_hub.shutdown()
+    await close_redis()
+    shutdown_executor()
+
+
+app = FastAPI(lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -20,24 +35,19 @@ app.add_middleware(
 @app.websocket("/ws/captado")
 async def websocket_prices(websocket: WebSocket, month: int, year: int):
     await websocket.accept()
+    if not 1 <= month <= 12:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    await captado_hub.subscribe(websocket, month, year)
     try:
-        async with SessionLocal() as session:
-            while True:
-                clients = await get_clients(session, skip=0, limit=999)
-                data_to_send = []
-                for client in clients:
-                    data_to_send.append({
-                        "client_name": client.name,
-                        "anual": await dr_repo.get_captured_by_period(session, client.id, "anual", year),
-                        "semestral": await dr_repo.get_captured_by_period(session, client.id, "semestral", year, month),
-                        "mensal": await dr_repo.get_captured_by_period(session, client.id, "mensal", year, month),
-                        "semanal": await dr_repo.get_captured_by_period(session, client.id, "semanal", year, month),
-                    })
-
-                await websocket.send_text(json.dumps(data_to_send, ensure_ascii=False))
-                await asyncio.sleep(5)
+        # O envio fica a cargo do hub; aqui só aguardamos o cliente desconectar.
+        while True:
+            await websocket.receive_text()
     except WebSocketDisconnect:
         pass
+    finally:
+        captado_hub.unsubscribe(websocket, month, year)
 
 app.include_router(auth.router)
 app.include_router(clients.router)
@@ -1,11 +1,23 @@
-from sqlalchemy import Column, Date, Float, ForeignKey, Integer
+from sqlalchemy import Column, Date, Float, ForeignKey, Index, Integer
 from app.database import Base
 
 
 class DailyReturn(Base):
+    """
+    Fechamento diário de um ativo.
+
+    No PostgreSQL a tabela é particionada por ano em `date` (migração d41c7e8a6b25, chave
+    primária (id, date)); em outros bancos, como o SQLite dos testes, é uma tabela comum.
+    """
+
     __tablename__ = "daily_returns"
     
     id = Column(Integer, primary_key=True, index=True)
     asset_id = Column(Integer, ForeignKey("assets.id"))
     date = Column(Date, nullable=False)
-    close_price = Column(Float, nullable=False)
\ No newline at end of file
+    close_price = Column(Float, nullable=False)
+
+    __table_args__ = (
+        # Um fechamento por ativo e dia; também atende as buscas por ativo + intervalo de datas.
+        Index("ux_daily_returns_asset_id_date", "asset_id", "date", unique=True),
+    )
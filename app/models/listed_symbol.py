@@ -0,0 +1,19 @@
+from sqlalchemy import Boolean, Column, DateTime, Index, String, func
+from app.database import Base
+
+
+class ListedSymbol(Base):
+    __tablename__ = "listed_symbols"
+
+    symbol = Column(String, primary_key=True)
+    name = Column(String, nullable=False)
+    exchange = Column(String, nullable=False)
+    is_etf = Column(Boolean, nullable=False, default=False)
+    # Hash de (name, exchange, is_etf): a carga incremental só regrava linhas alteradas.
+    row_hash = Column(String(16), nullable=False)
+    updated_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+
+    __table_args__ = (
+        Index("ix_listed_symbols_exchange_is_etf_symbol", "exchange", "is_etf", "symbol"),
+        Index("ix_listed_symbols_is_etf_symbol", "is_etf", "symbol"),
+    )
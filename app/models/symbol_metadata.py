@@ -0,0 +1,12 @@
+from sqlalchemy import Column, DateTime, String, func
+from app.database import Base
+
+
+class SymbolMetadata(Base):
+    __tablename__ = "symbol_metadata"
+
+    symbol = Column(String, primary_key=True)
+    currency = Column(String, nullable=True)
+    exchange = Column(String, nullable=True)
+    quote_type = Column(String, nullable=True)
+    updated_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now(), index=True)
@@ -0,0 +1,229 @@
+import random
+import time
+import zlib
+from abc import ABC, abstractmethod
+from datetime import date, timedelta
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+import yfinance as yf
+
+from app.core.config import (
+    PRICE_PROVIDER,
+    SYNTHETIC_PRICE_JITTER,
+    SYNTHETIC_PRICE_LATENCY,
+    SYNTHETIC_PRICE_SEED,
+)
+
+
+class PriceProvider(ABC):
+    """
+    Fonte de dados de mercado usada pela aplicação.
+
+    Todos os métodos são bloqueantes: quem chama a partir do event loop deve usar
+    `app.core.executor.run_in_executor`. Históricos são devolvidos como `pd.Series`
+    de fechamentos indexadas por `datetime.date`, em ordem crescente, com `end` exclusivo.
+    """
+
+    name: str
+
+    @abstractmethod
+    def latest(self, symbols: list[str]) -> dict[str, float]:
+        """Último preço de cada símbolo. Símbolos sem dados ficam de fora."""
+
+    @abstractmethod
+    def history(self, symbol: str, start: date, end: date = None) -> pd.Series:
+        """Fechamentos diários de um símbolo entre `start` (inclusive) e `end` (exclusivo)."""
+
+    @abstractmethod
+    def bulk_history(self, symbols: list[str], start: date, end: date = None) -> dict[str, pd.Series]:
+        """Fechamentos diários de vários símbolos em uma única chamada."""
+
+    @abstractmethod
+    def metadata(self, symbols: list[str]) -> dict[str, dict]:
+        """
+        Atributos estáticos (currency, exchange, quote_type) de cada símbolo.
+
+        Pode fazer uma requisição por símbolo: quem chama divide em blocos pequenos e cobra
+        do rate limiter um token por símbolo.
+        """
+
+
+def _to_close_series(closes: pd.Series) -> pd.Series:
+    closes = closes.dropna().astype(float)
+    closes.index = [ts.date() for ts in pd.to_datetime(closes.index)]
+    return closes
+
+
+class YFinanceProvider(PriceProvider):
+    """Dados do Yahoo Finance via yfinance."""
+
+    name = "yfinance"
+
+    def latest(self, symbols: list[str]) -> dict[str, float]:
+        data = yf.download(
+            symbols,
+            period="5d",
+            interval="1d",
+            group_by="column",
+            progress=False,
+            threads=True,
+        )
+        if data is None or data.empty:
+            return {}
+
+        close = data["Close"]
+        if isinstance(close, pd.Series):
+            close = close.to_frame(name=symbols[0])
+
+        prices = {}
+        for symbol in symbols:
+            if symbol not in close.columns:
+                continue
+            series = close[symbol].dropna()
+            if not series.empty:
+                prices[symbol] = float(series.iloc[-1])
+        return prices
+
+    def history(self, symbol: str, start: date, end: date = None) -> pd.Series:
+        data = yf.Ticker(symbol).history(start=start, end=end)
+        if data is None or data.empty:
+            return pd.Series(dtype=float)
+        return _to_close_series(data["Close"])
+
+    def bulk_history(self, symbols: list[str], start: date, end: date = None) -> dict[str, pd.Series]:
+        data = yf.download(
+            symbols,
+            start=start,
+            end=end,
+            interval="1d",
+            group_by="column",
+            progress=False,
+            threads=True,
+        )
+        if data is None or data.empty:
+            return {}
+
+        close = data["Close"]
+        if isinstance(close, pd.Series):
+            close = close.to_frame(name=symbols[0])
+
+        result = {}
+        for symbol in symbols:
+            if symbol in close.columns:
+                series = _to_close_series(close[symbol])
+                if not series.empty:
+                    result[symbol] = series
+        return result
+
+    def metadata(self, symbols: list[str]) -> dict[str, dict]:
+        result = {}
+        for symbol in symbols:
+            try:
+                fast_info = yf.Ticker(symbol).fast_info
+                result[symbol] = {
+                    "currency": fast_info.currency,
+                    "exchange": fast_info.exchange,
+                    "quote_type": fast_info.quote_type,
+                }
+            except Exception:
+                continue
+        return result
+
+
+class SyntheticProvider(PriceProvider):
+    """
+    Provedor offline e determinístico para testes de carga e benchmarks.
+
+    Cada símbolo segue um passeio aleatório geométrico em dias úteis a partir de
+    `EPOCH`, com semente derivada de `seed` e do próprio símbolo: a mesma semente sempre
+    produz os mesmos preços. `latency` (+ `jitter` aleatório) segundos são adicionados a
+    cada chamada para simular a rede.
+    """
+
+    name = "synthetic"
+    EPOCH = date(2000, 1, 3)
+
+    def __init__(self, seed: int = 42, latency: float = 0.0, jitter: float = 0.0, volatility: float = 0.02):
+        self.seed = seed
+        self.latency = latency
+        self.jitter = jitter
+        self.volatility = volatility
+        self._latency_rng = random.Random(seed)
+
+    def _sleep(self):
+        delay = self.latency + (self._latency_rng.uniform(0, self.jitter) if self.jitter else 0.0)
+        if delay > 0:
+            time.sleep(delay)
+
+    @lru_cache(maxsize=1024)
+    def _walk(self, symbol: str, until: date) -> pd.Series:
+        days = pd.bdate_range(self.EPOCH, until)
+        rng = np.random.default_rng([self.seed, zlib.crc32(symbol.encode())])
+        start_price = 10 + rng.random() * 190
+        steps = rng.normal(0.0002, self.volatility, size=len(days))
+        closes = start_price * np.exp(np.cumsum(steps))
+        return pd.Series(np.round(closes, 4), index=[d.date() for d in days])
+
+    def _range(self, symbol: str, start: date, end: date = None) -> pd.Series:
+        end = end or date.today() + timedelta(days=1)
+        walk = self._walk(symbol, end)
+        return walk[(walk.index >= start) & (walk.index < end)]
+
+    def latest(self, symbols: list[str]) -> dict[str, float]:
+        self._sleep()
+        today = date.today()
+        return {symbol: float(self._walk(symbol, today).iloc[-1]) for symbol in symbols}
+
+    def history(self, symbol: str, start: date, end: date = None) -> pd.Series:
+        self._sleep()
+        return self._range(symbol, start, end)
+
+    def bulk_history(self, symbols: list[str], start: date, end: date = None) -> dict[str, pd.Series]:
+        self._sleep()
+        result = {}
+        for symbol in symbols:
+            series = self._range(symbol, start, end)
+            if not series.empty:
+                result[symbol] = series
+        return result
+
+    def metadata(self, symbols: list[str]) -> dict[str, dict]:
+        self._sleep()
+        return {
+            symbol: {
+                "currency": "BRL" if symbol.endswith(".SA") else "USD",
+                "exchange": "SYN",
+                "quote_type": "EQUITY",
+            }
+            for symbol in symbols
+        }
+
+
+_provider: PriceProvider | None = None
+
+
+def get_price_provider() -> PriceProvider:
+    """
+    Provedor de preços configurado em PRICE_PROVIDER ('yfinance' ou 'synthetic').
+
+    Returns:
+        PriceProvider: Instância única por processo.
+
+    Raises:
+        ValueError: Se PRICE_PROVIDER tiver um valor desconhecido.
+    """
+    global _provider
+    if _provider is None:
+        if PRICE_PROVIDER == "yfinance":
+            _provider = YFinanceProvider()
+        elif PRICE_PROVIDER == "synthetic":
+            _provider = SyntheticProvider(
+                seed=SYNTHETIC_PRICE_SEED,
+                latency=SYNTHETIC_PRICE_LATENCY,
+                jitter=SYNTHETIC_PRICE_JITTER,
+            )
+        else:
+            raise ValueError(f"PRICE_PROVIDER inválido: {PRICE_PROVIDER}")
+    return _provider
@@ -181,4 +181,23 @@ async def get_by_client(db: AsyncSession, client_id: int):
         )
         .where(Allocation.client_id == client_id)
     )
-    return result.scalars().all()
\ No newline at end of file
+    return result.scalars().all()
+
+async def get_positions_by_client(db: AsyncSession, client_id: int):
+    """
+    Posições de um cliente como tuplas leves (sem objetos ORM nem relacionamentos).
+
+    Args:
+        db (AsyncSession): Sessão assíncrona do banco.
+        client_id (int): ID do cliente.
+
+    Returns:
+        list[Row]: Linhas com asset_id, ticker, buy_price, quantity e buy_date, na ordem de cadastro.
+    """
+    result = await db.execute(
+        select(Allocation.asset_id, Asset.ticker, Allocation.buy_price, Allocation.quantity, Allocation.buy_date)
+        .join(Asset, Asset.id == Allocation.asset_id)
+        .where(Allocation.client_id == client_id)
+        .order_by(Allocation.id)
+    )
+    return result.all()
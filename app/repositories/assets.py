@@ -1,24 +1,79 @@
 import asyncio
+import hashlib
+import json
+import logging
+import time
+import uuid
 from typing import Dict
 import pandas as pd
-import yfinance as yf
-import redis
+from io import BytesIO
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from app.models.allocation import Allocation
 from app.models.asset import Asset
-from app.core.config import REDIS_HOST, REDIS_PORT
-
-cache = redis.Redis(host=REDIS_HOST, port=REDIS_PORT, decode_responses=True)
+from app.repositories import listed_symbols as listed_symbols_repo
+from app.repositories import symbol_metadata as symbol_metadata_repo
+from app.core.cache import get_redis
+from app.core.config import (
+    CURRENCY_MEMORY_TTL,
+    HOT_PRICES_BATCH_SIZE,
+    HOT_PRICES_INTERVAL,
+    PRICE_INVALIDATION_CHANNEL,
+    PRICE_LOCK_ENABLED,
+    PRICE_LOCK_POLL_INTERVAL,
+    PRICE_LOCK_TIMEOUT,
+    PRICE_LOCK_WAIT,
+    PRICE_MEMORY_MAXSIZE,
+    PRICE_MEMORY_TTL,
+    PRICE_PREWARM_LEAD,
+    TICKERS_VERSION_CHECK_INTERVAL,
+)
+from app.core.lru import TTLCache
+from app.core.market_hours import opens_within, price_ttl
+from app.core.ticker_index import TickerIndex
+from app.providers.prices import get_price_provider
+from app.core.executor import run_in_executor
+from app.core.rate_limit import market_data_guard
 
 NASDAQ_URL = "https://www.nasdaqtrader.com/dynamic/symdir/nasdaqlisted.txt"
 OTHER_URL  = "https://www.nasdaqtrader.com/dynamic/symdir/otherlisted.txt"
 
+# Libera o lock apenas se ele ainda pertence a quem o criou.
+_RELEASE_LOCK_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+_inflight_prices: Dict[str, asyncio.Future] = {}
+_background_refreshes: set[asyncio.Task] = set()
+
+# Identifica este processo nas mensagens de invalidação (ignora as próprias publicações).
+_WORKER_ID = uuid.uuid4().hex
+
+# Camada em memória (por worker) na frente do Redis.
+_price_memory = TTLCache(maxsize=PRICE_MEMORY_MAXSIZE, ttl=PRICE_MEMORY_TTL)
+_currency_memory = TTLCache(maxsize=PRICE_MEMORY_MAXSIZE, ttl=CURRENCY_MEMORY_TTL)
+
+# Universo de tickers desserializado, compartilhado por todas as requisições do worker.
+TICKERS_CACHE_KEY = "all_tickers_df_v1"
+TICKERS_VERSION_KEY = f"{TICKERS_CACHE_KEY}:version"
+TICKERS_CACHE_TTL = 6 * 3600
+_tickers_memo = {"df": None, "index": None, "version": None, "loaded_at": 0.0, "checked_at": 0.0}
+_tickers_lock = asyncio.Lock()
+
 EXCHANGE_MAP = {
     "Q": "NASDAQ", "G": "NASDAQ", "S": "NASDAQ",
     "N": "NYSE", "A": "AMEX", "P": "NYSE Arca", "Z": "Cboe BZX", "V": "IEX"
 }
 
+# Sufixos do Yahoo para ativos fora do diretório NASDAQ/otherlisted.
+SUFFIX_EXCHANGES = {".SA": "B3"}
+
+# símbolo -> bolsa, preenchido sempre que o diretório de tickers é carregado.
+_symbol_exchanges: Dict[str, str] = {}
+
 async def create_asset(db: AsyncSession, ticker: str, name: str):
     """
     Cria um novo ativo no banco de dados.
@@ -40,7 +95,7 @@ async def create_asset(db: AsyncSession, ticker: str, name: str):
     await db.refresh(new_asset)
     return {"id": new_asset.id, "ticker": new_asset.ticker, "name": new_asset.name}
 
-def _fetch_all_tickers_df() -> pd.DataFrame:
+def fetch_all_tickers_df() -> pd.DataFrame:
     """Baixa e combina NASDAQ + outras bolsas (NYSE/AMEX/ARCA/BATS)."""
     # NASDAQ
     nasdaq = pd.read_csv(NASDAQ_URL, sep="|")
@@ -63,48 +118,175 @@ def _fetch_all_tickers_df() -> pd.DataFrame:
     all_df = all_df.drop_duplicates(subset=["symbol"]).reset_index(drop=True)
     return all_df
 
-def _get_all_tickers_cached(ttl_seconds: int = 6 * 3600) -> pd.DataFrame:
-    """Cacheia a lista completa de tickers em Redis (como CSV compactado em bytes)."""
-    cache_key = "all_tickers_df_v1"
-    blob = cache.get(cache_key)
+def _dump_tickers_df(df: pd.DataFrame) -> bytes:
+    buf = BytesIO()
+    df.to_parquet(buf, index=False)
+    return buf.getvalue()
+
+
+def _remember_exchanges(df: pd.DataFrame):
+    _symbol_exchanges.update(zip(df["symbol"], df["exchange"]))
+
+
+def exchange_for_symbol(symbol: str) -> str | None:
+    """
+    Bolsa do símbolo, segundo o diretório de tickers ou o sufixo do Yahoo.
+
+    Args:
+        symbol (str): Símbolo do ativo.
+
+    Returns:
+        str | None: Nome da bolsa (como no EXCHANGE_MAP) ou None se desconhecida.
+    """
+    exchange = _symbol_exchanges.get(symbol)
+    if exchange:
+        return exchange
+    for suffix, suffix_exchange in SUFFIX_EXCHANGES.items():
+        if symbol.endswith(suffix):
+            return suffix_exchange
+    return None
+
+
+async def publish_tickers_df(df: pd.DataFrame, ttl_seconds: int = TICKERS_CACHE_TTL) -> str:
+    """
+    Grava no Redis o universo de tickers (parquet) e a sua versão.
+
+    Os workers comparam a versão com a cópia em memória e, quando ela muda, recarregam o
+    DataFrame do Redis e reconstroem o índice de busca, sem baixar os CSVs das bolsas.
+
+    Args:
+        df (pd.DataFrame): Universo com as colunas symbol, name, exchange e is_etf.
+        ttl_seconds (int): Validade das chaves no Redis.
+
+    Returns:
+        str: Versão publicada (hash do conteúdo).
+    """
+    blob = await run_in_executor(_dump_tickers_df, df)
+    version = hashlib.sha1(blob).hexdigest()[:16]
+    async with get_redis().pipeline(transaction=False) as pipe:
+        pipe.setex(TICKERS_CACHE_KEY, ttl_seconds, blob)
+        pipe.setex(TICKERS_VERSION_KEY, ttl_seconds, version)
+        await pipe.execute()
+    return version
+
+
+async def _load_tickers_df(cache, ttl_seconds: int) -> tuple[pd.DataFrame, str | None]:
+    """Lê o universo de tickers do Redis (ou das fontes, gravando no Redis) e devolve (df, versão)."""
+    blob, version = await cache.mget([TICKERS_CACHE_KEY, TICKERS_VERSION_KEY])
     if blob:
         try:
-            from io import BytesIO
-            return pd.read_parquet(BytesIO(blob))
+            df = await run_in_executor(pd.read_parquet, BytesIO(blob))
+            return df, version.decode() if isinstance(version, bytes) else version
         except Exception:
-            cache.delete(cache_key)
+            await cache.delete(TICKERS_CACHE_KEY, TICKERS_VERSION_KEY)
 
-    df = _fetch_all_tickers_df()
+    df = await run_in_executor(fetch_all_tickers_df)
     try:
-        from io import BytesIO
-        buf = BytesIO()
-        df.to_parquet(buf, index=False)
-        cache.setex(cache_key, ttl_seconds, buf.getvalue())
-    except Exception:
+        version = await publish_tickers_df(df, ttl_seconds)
+    except Exception as e:
         # Se der ruim ao salvar, seguimos sem cachear
-        pass
-    return df
+        logging.warning(f"Erro ao cachear o diretório de tickers: {e}")
+        version = None
+    return df, version
+
+
+async def _get_all_tickers_cached(ttl_seconds: int = TICKERS_CACHE_TTL) -> pd.DataFrame:
+    """
+    Universo de tickers, memoizado por processo e validado contra uma versão no Redis.
+
+    O DataFrame desserializado fica em memória e só é recarregado quando
+    a versão em `all_tickers_df_v1:version` muda. A versão é consultada no máximo a cada
+    TICKERS_VERSION_CHECK_INTERVAL segundos, então a maioria das requisições não toca o Redis.
+    """
+    now = time.monotonic()
+    memo = _tickers_memo
+    if memo["df"] is not None and now - memo["checked_at"] < TICKERS_VERSION_CHECK_INTERVAL:
+        return memo["df"]
+
+    async with _tickers_lock:
+        if memo["df"] is not None and now - memo["checked_at"] < TICKERS_VERSION_CHECK_INTERVAL:
+            return memo["df"]
+
+        cache = get_redis()
+        version = await cache.get(TICKERS_VERSION_KEY)
+        version = version.decode() if isinstance(version, bytes) else version
+        if memo["df"] is not None and (
+            (version is not None and version == memo["version"])
+            # Sem versão no Redis (expirada ou não gravada): mantém a cópia local até o TTL.
+            or (version is None and now - memo["loaded_at"] < ttl_seconds)
+        ):
+            memo["checked_at"] = now
+            return memo["df"]
+
+        df, version = await _load_tickers_df(cache, ttl_seconds)
+        _remember_exchanges(df)
+        index = await run_in_executor(TickerIndex.from_df, df)
+        memo.update(df=df, index=index, version=version, loaded_at=now, checked_at=now)
+        return memo["df"]
+
+
+async def search_assets(q: str, exchange: str = None, is_etf: bool = None, limit: int = 20) -> list[Dict]:
+    """
+    Busca ativos do diretório de tickers por prefixo do símbolo ou por nome.
+
+    Usa o índice em memória reconstruído a cada recarga do universo de tickers.
+
+    Args:
+        q (str): Texto buscado.
+        exchange (str, optional): Filtra pela bolsa.
+        is_etf (bool, optional): Filtra ETFs.
+        limit (int): Máximo de resultados.
+
+    Returns:
+        list[dict]: Ativos encontrados, do mais ao menos relevante.
+    """
+    await _get_all_tickers_cached()
+    return _tickers_memo["index"].search(q, exchange=exchange, is_etf=is_etf, limit=limit)
+
+async def _page_from_universe(offset: int, limit: int, exchange: str = None, is_etf: bool = None) -> tuple[list[Dict], int]:
+    """Página do universo de tickers memoizado (usado enquanto listed_symbols não foi populada)."""
+    df = await _get_all_tickers_cached()
+    if exchange is not None or is_etf is not None:
+        mask = pd.Series(True, index=df.index)
+        if exchange is not None:
+            mask &= df["exchange"] == exchange
+        if is_etf is not None:
+            mask &= df["is_etf"] == is_etf
+        df = df[mask]
+    # Fatia posicional sem cópia: o DataFrame memoizado é compartilhado e nunca é alterado.
+    return df.iloc[offset:offset + limit].to_dict(orient="records"), int(df.shape[0])
+
 
 async def list_assets_from_yahoo(
     page: int = 1,
     per_page: int = 100,
-    with_price: bool = True
+    with_price: bool = True,
+    exchange: str = None,
+    is_etf: bool = None,
+    db: AsyncSession = None,
 ) -> Dict:
     """
     Retorna lista paginada de ativos (símbolo, nome, exchange, is_etf) e, opcionalmente, preço.
+
+    Com uma sessão de banco a página vem da tabela listed_symbols, com os filtros de bolsa
+    e ETF aplicados no SQL. Enquanto a tabela não foi populada pelo job de carga, pagina o
+    universo de tickers em memória.
     """
-    df = _get_all_tickers_cached()
-    total = int(df.shape[0])
     if per_page <= 0:
         per_page = 100
     if page <= 0:
         page = 1
-
     start = (page - 1) * per_page
-    end = start + per_page
-    page_df = df.iloc[start:end].copy()
 
-    items = page_df.to_dict(orient="records")
+    items, total = [], 0
+    from_table = False
+    if db is not None:
+        items, total = await listed_symbols_repo.list_listed_symbols(
+            db, offset=start, limit=per_page, exchange=exchange, is_etf=is_etf
+        )
+        from_table = total > 0 or await listed_symbols_repo.has_listed_symbols(db)
+    if not from_table:
+        items, total = await _page_from_universe(start, per_page, exchange=exchange, is_etf=is_etf)
 
     if not with_price or not items:
         return {
@@ -115,27 +297,27 @@ async def list_assets_from_yahoo(
             "total_pages": (total + per_page - 1) // per_page
         }
 
-    sem = asyncio.Semaphore(10)
-
-    async def enrich(item):
-        symbol = item["symbol"]
-        try:
-            async with sem:
-                price = await get_asset_price(symbol)
-            item["price"] = price
-            def _fast():
-                t = yf.Ticker(symbol)
-                fi = getattr(t, "fast_info", None)
-                if isinstance(fi, dict):
-                    return fi.get("currency")
-                return None
-            item["currency"] = await asyncio.to_thread(_fast)
-        except Exception:
-            item["price"] = None
-            item["currency"] = None
-        return item
-
-    items = await asyncio.gather(*(enrich(it) for it in items))
+    symbols = [item["symbol"] for item in items]
+    prices = await get_asset_prices(symbols)
+
+    # Moeda: memória do worker, depois a tabela symbol_metadata (uma leitura indexada) e,
+    # só para símbolos nunca vistos, uma única chamada de metadata ao provedor.
+    currencies = {symbol: _currency_memory.get(symbol) for symbol in symbols}
+    missing = [symbol for symbol, currency in currencies.items() if currency is None]
+    if missing:
+        if db is not None:
+            metadata = await symbol_metadata_repo.load_symbol_metadata(db, missing)
+        else:
+            metadata = await symbol_metadata_repo.fetch_symbol_metadata(missing)
+        for symbol in missing:
+            currency = metadata.get(symbol, {}).get("currency")
+            if currency is not None:
+                _currency_memory.set(symbol, currency)
+                currencies[symbol] = currency
+
+    for item in items:
+        item["price"] = prices.get(item["symbol"])
+        item["currency"] = currencies.get(item["symbol"])
 
     return {
         "items": items,
@@ -146,6 +328,382 @@ async def list_assets_from_yahoo(
     }
 
 
+def _price_cache_key(symbol: str) -> str:
+    return f"asset_price:{symbol}"
+
+
+def _last_price_key(symbol: str) -> str:
+    return f"asset_price_last:{symbol}"
+
+
+def _price_lock_key(symbol: str) -> str:
+    return f"lock:asset_price:{symbol}"
+
+
+def _encode_price(price: float, soft_ttl: float) -> str:
+    """Serializa o preço com o instante em que ele deixa de ser fresco (soft TTL)."""
+    now = time.time()
+    return json.dumps({"price": price, "fetched_at": now, "stale_at": now + soft_ttl})
+
+
+def _decode_price(raw) -> tuple[float, float] | None:
+    """
+    Lê um valor do cache de preços.
+
+    Returns:
+        tuple | None: (preço, instante em que fica velho) ou None se ausente/inválido.
+        Valores no formato antigo (float puro) são tratados como já vencidos.
+    """
+    if raw is None:
+        return None
+    try:
+        data = json.loads(raw)
+        if isinstance(data, dict):
+            return float(data["price"]), float(data["stale_at"])
+        return float(data), 0.0
+    except (TypeError, ValueError, KeyError):
+        return None
+
+
+def _download_last_prices(symbols: list[str]) -> dict[str, float]:
+    """Busca o último preço de vários símbolos em uma única chamada ao provedor."""
+    return get_price_provider().latest(symbols)
+
+
+async def _last_known_prices(symbols: list[str]) -> Dict[str, float]:
+    """Último preço conhecido (sem expiração) dos símbolos, usado quando o provedor está indisponível."""
+    try:
+        raws = await get_redis().mget([_last_price_key(s) for s in symbols])
+    except Exception as e:
+        logging.warning(f"Erro ao ler últimos preços conhecidos: {e}")
+        return {}
+    prices = {}
+    for symbol, raw in zip(symbols, raws):
+        decoded = _decode_price(raw)
+        if decoded is not None:
+            prices[symbol] = decoded[0]
+    return prices
+
+
+async def _download_and_cache_prices(symbols: list[str]) -> Dict[str, float]:
+    """
+    Baixa os preços no provedor (fora do event loop) e grava o resultado no Redis.
+
+    Se o provedor falhar, estiver limitado pelo rate limiter ou com o circuit breaker
+    aberto, devolve o último preço conhecido de cada símbolo sem regravar o cache.
+    """
+    try:
+        fetched = await market_data_guard.call(_download_last_prices, symbols)
+    except Exception as e:
+        logging.warning(f"Erro ao buscar preços de {symbols}: {e}")
+        return await _last_known_prices(symbols)
+
+    if fetched:
+        async with get_redis().pipeline(transaction=False) as pipe:
+            for symbol, price in fetched.items():
+                soft_ttl, hard_ttl = price_ttl(exchange_for_symbol(symbol))
+                encoded = _encode_price(price, soft_ttl)
+                pipe.setex(_price_cache_key(symbol), hard_ttl, encoded)
+                pipe.set(_last_price_key(symbol), encoded)
+            pipe.publish(PRICE_INVALIDATION_CHANNEL, f"{_WORKER_ID}|{','.join(fetched)}")
+            await pipe.execute()
+        for symbol, price in fetched.items():
+            _price_memory.set(symbol, price)
+    return fetched
+
+
+async def _fetch_prices_locked(symbols: list[str]) -> Dict[str, float]:
+    """
+    Busca preços coordenando com outros processos (workers da API e Celery) via lock no Redis.
+
+    Para cada símbolo tenta um SET NX em `lock:asset_price:{symbol}`. Os símbolos cujo lock
+    foi obtido são buscados aqui; os demais já estão sendo buscados por outro processo, então
+    apenas aguardamos o valor aparecer no cache. Se o dono do lock não publicar o preço em
+    PRICE_LOCK_WAIT segundos, buscamos nós mesmos.
+    """
+    if not PRICE_LOCK_ENABLED:
+        return await _download_and_cache_prices(symbols)
+
+    cache = get_redis()
+    token = uuid.uuid4().hex
+    async with cache.pipeline(transaction=False) as pipe:
+        for symbol in symbols:
+            pipe.set(_price_lock_key(symbol), token, ex=PRICE_LOCK_TIMEOUT, nx=True)
+        acquired = await pipe.execute()
+
+    owned = [s for s, ok in zip(symbols, acquired) if ok]
+    foreign = [s for s, ok in zip(symbols, acquired) if not ok]
+
+    prices = {}
+    if owned:
+        try:
+            prices.update(await _download_and_cache_prices(owned))
+        finally:
+            async with cache.pipeline(transaction=False) as pipe:
+                for symbol in owned:
+                    pipe.eval(_RELEASE_LOCK_SCRIPT, 1, _price_lock_key(symbol), token)
+                await pipe.execute()
+
+    deadline = time.monotonic() + PRICE_LOCK_WAIT
+    while foreign and time.monotonic() < deadline:
+        await asyncio.sleep(PRICE_LOCK_POLL_INTERVAL)
+        cached = await cache.mget([_price_cache_key(s) for s in foreign])
+        pending = []
+        for symbol, cached_price in zip(foreign, cached):
+            decoded = _decode_price(cached_price)
+            if decoded is None:
+                pending.append(symbol)
+            else:
+                prices[symbol] = decoded[0]
+        foreign = pending
+
+    if foreign:
+        prices.update(await _download_and_cache_prices(foreign))
+    return prices
+
+
+async def _fetch_prices_single_flight(symbols: list[str]) -> Dict[str, float]:
+    """
+    Coalesce buscas concorrentes do mesmo símbolo dentro do processo.
+
+    O primeiro chamador de um símbolo sem preço em cache registra um Future e faz a busca;
+    chamadores concorrentes do mesmo símbolo aguardam esse Future em vez de disparar outra
+    requisição ao Yahoo.
+    """
+    loop = asyncio.get_running_loop()
+    owned = []
+    waiting = {}
+    for symbol in symbols:
+        future = _inflight_prices.get(symbol)
+        if future is None:
+            _inflight_prices[symbol] = loop.create_future()
+            owned.append(symbol)
+        else:
+            waiting[symbol] = future
+
+    prices = {}
+    if owned:
+        fetched = {}
+        try:
+            fetched = await _fetch_prices_locked(owned)
+        finally:
+            for symbol in owned:
+                future = _inflight_prices.pop(symbol)
+                if not future.done():
+                    future.set_result(fetched.get(symbol))
+        prices.update(fetched)
+
+    for symbol, future in waiting.items():
+        price = await asyncio.shield(future)
+        if price is not None:
+            prices[symbol] = price
+    return prices
+
+
+def _schedule_refresh(symbols: list[str]):
+    """Agenda, em background, a atualização dos preços vencidos que ainda não estão sendo buscados."""
+    pending = [s for s in symbols if s not in _inflight_prices]
+    if not pending:
+        return
+    task = asyncio.create_task(_fetch_prices_single_flight(pending))
+    _background_refreshes.add(task)
+    task.add_done_callback(_background_refreshes.discard)
+
+
+async def get_asset_prices(symbols) -> Dict[str, float]:
+    """
+    Obtém o preço atual de vários ativos de uma vez, utilizando cache Redis.
+
+    Os símbolos são deduplicados, os que já estão em cache são lidos com um único
+    MGET e os restantes são baixados em uma única chamada multi-símbolo ao Yahoo,
+    executada fora do event loop. Buscas concorrentes do mesmo símbolo são coalescidas
+    (no processo e entre processos) para evitar estouro de requisições quando a chave expira.
+
+    O cache segue stale-while-revalidate: passado o soft TTL o preço em cache ainda é
+    devolvido na hora e a atualização é agendada em background. Só se espera pelo Yahoo
+    quando não existe nenhum valor (hard TTL vencido ou símbolo nunca buscado).
+
+    Args:
+        symbols (Iterable[str]): Símbolos dos ativos.
+
+    Returns:
+        dict: {símbolo: preço}. Símbolos sem dados de preço ficam de fora.
+    """
+    unique = list(dict.fromkeys(s for s in symbols if s))
+    if not unique:
+        return {}
+
+    prices = {}
+    remote = []
+    for symbol in unique:
+        price = _price_memory.get(symbol)
+        if price is None:
+            remote.append(symbol)
+        else:
+            prices[symbol] = price
+    if not remote:
+        return prices
+
+    cache = get_redis()
+    now = time.time()
+    misses = []
+    stale = []
+    for symbol, cached_price in zip(remote, await cache.mget([_price_cache_key(s) for s in remote])):
+        decoded = _decode_price(cached_price)
+        if decoded is None:
+            misses.append(symbol)
+            continue
+        price, stale_at = decoded
+        prices[symbol] = price
+        if stale_at <= now:
+            stale.append(symbol)
+        else:
+            _price_memory.set(symbol, price, ttl=min(PRICE_MEMORY_TTL, stale_at - now))
+
+    if stale:
+        _schedule_refresh(stale)
+    if misses:
+        prices.update(await _fetch_prices_single_flight(misses))
+
+    return prices
+
+
+async def refresh_asset_prices(symbols) -> Dict[str, float]:
+    """
+    Força a atualização dos preços no Yahoo, ignorando o que estiver em cache.
+
+    Usa o mesmo caminho coalescido (single-flight + lock no Redis) das leituras.
+
+    Args:
+        symbols (Iterable[str]): Símbolos a atualizar.
+
+    Returns:
+        dict: {símbolo: preço} dos símbolos atualizados.
+    """
+    unique = list(dict.fromkeys(s for s in symbols if s))
+    if not unique:
+        return {}
+    return await _fetch_prices_single_flight(unique)
+
+
+async def prewarm_asset_prices(lead_seconds: int = PRICE_PREWARM_LEAD) -> list[str]:
+    """
+    Atualiza os preços em cache das bolsas que abrem nos próximos `lead_seconds`.
+
+    Percorre as chaves `asset_price:*` existentes, separa as que pertencem a bolsas
+    prestes a abrir e atualiza todas em lote, para que as primeiras leituras do pregão
+    já encontrem o cache quente.
+
+    Args:
+        lead_seconds (int): Antecedência em relação à abertura.
+
+    Returns:
+        list[str]: Símbolos atualizados.
+    """
+    if not _symbol_exchanges:
+        try:
+            await _get_all_tickers_cached()
+        except Exception as e:
+            logging.warning(f"Diretório de tickers indisponível para o pre-warm: {e}")
+
+    prefix = _price_cache_key("")
+    symbols = []
+    async for key in get_redis().scan_iter(match=f"{prefix}*", count=500):
+        if isinstance(key, bytes):
+            key = key.decode()
+        symbols.append(key[len(prefix):])
+
+    due = [s for s in symbols if opens_within(exchange_for_symbol(s), lead_seconds)]
+    if due:
+        await refresh_asset_prices(due)
+    return due
+
+
+async def refresh_held_asset_prices(db: AsyncSession, interval: int = HOT_PRICES_INTERVAL) -> list[str]:
+    """
+    Mantém quentes no Redis os preços dos tickers com alocações ativas.
+
+    Atualiza, em lotes multi-símbolo, os tickers sem preço em cache ou cujo preço vence
+    antes da próxima rodada (`interval` segundos). Com o mercado fechado o soft TTL vai
+    até a abertura, então nada é buscado à toa fora do pregão.
+
+    Args:
+        db (AsyncSession): Sessão assíncrona do banco.
+        interval (int): Intervalo entre rodadas do poller, em segundos.
+
+    Returns:
+        list[str]: Tickers atualizados.
+    """
+    tickers = await list_held_tickers(db)
+    if not tickers:
+        return []
+
+    horizon = time.time() + interval
+    cached = await get_redis().mget([_price_cache_key(t) for t in tickers])
+    due = []
+    for ticker, raw in zip(tickers, cached):
+        decoded = _decode_price(raw)
+        if decoded is None or decoded[1] <= horizon:
+            due.append(ticker)
+
+    for start in range(0, len(due), HOT_PRICES_BATCH_SIZE):
+        await refresh_asset_prices(due[start:start + HOT_PRICES_BATCH_SIZE])
+    return due
+
+
+def invalidate_asset_prices(symbols):
+    """
+    Descarta os preços em memória deste worker para os símbolos informados.
+
+    Chamado quando outro processo publica um preço novo no canal de invalidação.
+    """
+    for symbol in symbols:
+        _price_memory.invalidate(symbol)
+
+
+async def listen_price_invalidations():
+    """
+    Escuta o canal de invalidação de preços e limpa a camada em memória deste worker.
+
+    Roda como task de background durante o lifespan da aplicação; se a conexão com o
+    Redis cair, tenta novamente após alguns segundos.
+    """
+    while True:
+        try:
+            pubsub = get_redis().pubsub()
+            await pubsub.subscribe(PRICE_INVALIDATION_CHANNEL)
+            try:
+                async for message in pubsub.listen():
+                    if message.get("type") != "message":
+                        continue
+                    data = message["data"]
+                    if isinstance(data, bytes):
+                        data = data.decode()
+                    worker_id, _, symbols = data.partition("|")
+                    if worker_id != _WORKER_ID:
+                        invalidate_asset_prices(symbols.split(","))
+            finally:
+                await pubsub.aclose()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logging.warning(f"Canal de invalidação de preços indisponível: {e}")
+            await asyncio.sleep(5)
+
+
+def get_cache_stats() -> Dict:
+    """
+    Retorna os contadores das camadas de cache em memória deste worker.
+
+    Returns:
+        dict: Estatísticas (hits, misses, tamanho, ...) dos caches de preço e de moeda.
+    """
+    return {
+        "prices": _price_memory.stats(),
+        "currency": _currency_memory.stats(),
+    }
+
+
 async def get_asset_price(symbol: str):
     """
     Obtém o preço atual de um ativo pelo seu símbolo, utilizando cache Redis.
@@ -162,22 +720,10 @@ async def get_asset_price(symbol: str):
     Author: Patrick Lima (patrickwsl)
     Date: 10th August 2025
     """
-    cache_key = f"asset_price:{symbol}"
-    cached_price = cache.get(cache_key)
-    if cached_price:
-        try:
-            return float(cached_price)
-        except ValueError:
-            cache.delete(cache_key)
-
-    ticker = yf.Ticker(symbol)
-    hist = ticker.history(period="1d")
-    if hist.empty:
+    prices = await get_asset_prices([symbol])
+    if symbol not in prices:
         raise ValueError(f"No price data found for {symbol}")
-
-    price = float(hist["Close"].iloc[-1])
-    cache.setex(cache_key, 3600, price)
-    return price
+    return prices[symbol]
 
 async def list_assets_from_db(db: AsyncSession):
     """
@@ -217,3 +763,45 @@ async def list_assets_by_client(db: AsyncSession, client_id: int):
     )
     result = await db.execute(query)
     return result.all()
+
+
+async def list_assets_by_clients(db: AsyncSession, client_ids: list[int] = None):
+    """
+    Lista as posições (cliente, ticker, quantidade) de vários clientes em uma única query.
+
+    Args:
+        db (AsyncSession): Sessão assíncrona do banco.
+        client_ids (list[int], optional): Clientes a considerar. Todos se None.
+
+    Returns:
+        list: Tuplas (client_id, ticker, quantity).
+    """
+    query = (
+        select(Allocation.client_id, Asset.ticker, Allocation.quantity)
+        .join(Allocation, Allocation.asset_id == Asset.id)
+    )
+    if client_ids is not None:
+        query = query.where(Allocation.client_id.in_(client_ids))
+    result = await db.execute(query)
+    return result.all()
+
+
+async def list_held_tickers(db: AsyncSession) -> list[str]:
+    """
+    Lista os tickers distintos que possuem alocações ativas.
+
+    Args:
+        db (AsyncSession): Sessão assíncrona do banco.
+
+    Returns:
+        list[str]: Tickers ordenados alfabeticamente.
+    """
+    query = (
+        select(Asset.ticker)
+        .join(Allocation, Allocation.asset_id == Asset.id)
+        .where(Allocation.is_active == True)
+        .distinct()
+        .order_by(Asset.ticker)
+    )
+    result = await db.execute(query)
+    return list(result.scalars().all())
@@ -0,0 +1,130 @@
+import json
+import logging
+import time
+from datetime import date, timedelta
+
+import pandas as pd
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import get_redis
+from app.core.config import BACKFILL_CHUNK_SIZE, BACKFILL_PROGRESS_TTL, BACKFILL_START_DATE
+from app.core.rate_limit import market_data_guard
+from app.models.asset import Asset
+from app.models.daily_return import DailyReturn
+from app.providers.prices import get_price_provider
+from app.repositories.daily_returns import upsert_daily_returns
+
+
+def _progress_key(job_id: str) -> str:
+    return f"backfill:{job_id}"
+
+
+async def set_backfill_progress(job_id: str, **fields) -> dict:
+    """Atualiza o progresso de um job de backfill no Redis (mesclando com o estado anterior)."""
+    cache = get_redis()
+    progress = await get_backfill_progress(job_id) or {"job_id": job_id}
+    progress.update(fields, updated_at=time.time())
+    await cache.setex(_progress_key(job_id), BACKFILL_PROGRESS_TTL, json.dumps(progress, default=str))
+    return progress
+
+
+async def get_backfill_progress(job_id: str) -> dict | None:
+    """
+    Progresso de um job de backfill.
+
+    Returns:
+        dict | None: status, total/done de ativos, linhas gravadas, ... ou None se o job não existe.
+    """
+    raw = await get_redis().get(_progress_key(job_id))
+    return json.loads(raw) if raw else None
+
+
+async def get_backfill_plan(db: AsyncSession, default_start: date = BACKFILL_START_DATE) -> list[tuple[int, str, date]]:
+    """
+    Ativos a atualizar e a data a partir da qual cada um precisa de fechamentos.
+
+    Ativos que já têm histórico recomeçam no dia seguinte ao último fechamento gravado;
+    os demais começam em `default_start`. Uma única query agrupada.
+
+    Returns:
+        list[tuple[int, str, date]]: (asset_id, ticker, data inicial), ordenado pela data inicial.
+    """
+    result = await db.execute(
+        select(Asset.id, Asset.ticker, func.max(DailyReturn.date))
+        .outerjoin(DailyReturn, DailyReturn.asset_id == Asset.id)
+        .group_by(Asset.id, Asset.ticker)
+    )
+    plan = [
+        (asset_id, ticker, last_date + timedelta(days=1) if last_date else default_start)
+        for asset_id, ticker, last_date in result.all()
+    ]
+    plan.sort(key=lambda item: (item[2], item[1]))
+    return plan
+
+
+async def backfill_daily_returns(
+    db: AsyncSession,
+    job_id: str = None,
+    end: date = None,
+    chunk_size: int = BACKFILL_CHUNK_SIZE,
+    default_start: date = BACKFILL_START_DATE,
+) -> dict:
+    """
+    Preenche daily_returns de todos os ativos a partir do último fechamento de cada um.
+
+    Os ativos são processados em blocos de `chunk_size` tickers: uma chamada `bulk_history`
+    por bloco (desde a menor data inicial do bloco) e um upsert em lote por bloco, com
+    commit ao final de cada um. O progresso é publicado no Redis quando `job_id` é informado.
+
+    Args:
+        db (AsyncSession): Sessão assíncrona do banco.
+        job_id (str, optional): Identificador para o acompanhamento do progresso.
+        end (date, optional): Data final (exclusiva). Padrão: hoje.
+        chunk_size (int): Tickers por chamada ao provedor.
+        default_start (date): Início para ativos ainda sem histórico.
+
+    Returns:
+        dict: Ativos processados, linhas gravadas e tickers sem dados.
+    """
+    end = end or date.today()
+    plan = [item for item in await get_backfill_plan(db, default_start) if item[2] < end]
+    if job_id:
+        await set_backfill_progress(job_id, status="running", total=len(plan), done=0, rows=0, missing=[])
+
+    provider = get_price_provider()
+    done = rows_written = 0
+    missing: list[str] = []
+    for offset in range(0, len(plan), chunk_size):
+        chunk = plan[offset:offset + chunk_size]
+        start = min(item[2] for item in chunk)
+        tickers = sorted({ticker for _, ticker, _ in chunk})
+        try:
+            history = await market_data_guard.call(provider.bulk_history, tickers, start, end)
+        except Exception as e:
+            logging.warning(f"Erro no backfill de {tickers}: {e}")
+            history = {}
+
+        rows = []
+        for asset_id, ticker, asset_start in chunk:
+            closes = history.get(ticker)
+            if closes is None or closes.empty:
+                missing.append(ticker)
+                continue
+            closes = closes[closes.index >= asset_start]
+            rows.extend(
+                {"asset_id": asset_id, "date": day, "close_price": float(close)}
+                for day, close in closes.items()
+                if not pd.isna(close)
+            )
+        rows_written += await upsert_daily_returns(db, rows)
+        await db.commit()
+
+        done += len(chunk)
+        if job_id:
+            await set_backfill_progress(job_id, done=done, rows=rows_written, missing=missing)
+
+    summary = {"assets": len(plan), "rows": rows_written, "missing": missing}
+    if job_id:
+        await set_backfill_progress(job_id, status="finished", done=done, rows=rows_written, missing=missing)
+    return summary
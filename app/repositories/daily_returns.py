@@ -1,34 +1,125 @@
+from collections import defaultdict
 from datetime import date, datetime, timedelta
-import logging
-from sqlalchemy import func, select
+import numpy as np
+from sqlalchemy import case, func, select, text
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.models.allocation import Allocation
+from app.core.config import BACKFILL_START_DATE
+from app.database import bulk_upsert
 from app.models.daily_return import DailyReturn
-import yfinance as yf
 
-from app.repositories.assets import list_assets_by_client
+from app.repositories.assets import get_asset_prices, list_assets_by_client, list_assets_by_clients
+from app.repositories.client import get_clients
 
-async def get_by_asset(db: AsyncSession, asset_id: int):
+async def get_by_asset(db: AsyncSession, asset_id: int, start: date = None, end: date = None):
     """
     Retorna todos os registros de daily_returns para um ativo específico, ordenados por data.
 
+    Informar `start`/`end` limita a leitura às partições anuais do intervalo (PostgreSQL).
+
     Args:
         db (AsyncSession): Sessão assíncrona do banco.
         asset_id (int): ID do ativo.
+        start (date, optional): Primeira data (inclusive).
+        end (date, optional): Última data (inclusive).
 
     Returns:
         list[DailyReturn]: Lista de registros ordenados por data crescente.
     """
-    result = await db.execute(
-        select(DailyReturn)
-        .where(DailyReturn.asset_id == asset_id)
-        .order_by(DailyReturn.date.asc())
-    )
+    query = select(DailyReturn).where(DailyReturn.asset_id == asset_id)
+    if start is not None:
+        query = query.where(DailyReturn.date >= start)
+    if end is not None:
+        query = query.where(DailyReturn.date <= end)
+    result = await db.execute(query.order_by(DailyReturn.date.asc()))
     return result.scalars().all()
 
+async def get_histories_by_client(
+    db: AsyncSession, client_id: int, chunk_size: int = 5000
+) -> dict[int, tuple[list[date], np.ndarray]]:
+    """
+    Históricos de fechamento de todos os ativos de um cliente em uma única consulta.
+
+    Cada ativo começa na data da primeira compra do cliente nele. As linhas vêm como
+    tuplas (sem objetos ORM), ordenadas por ativo e data, e são lidas em blocos de
+    `chunk_size` direto para arrays por ativo.
+
+    Args:
+        db (AsyncSession): Sessão assíncrona do banco.
+        client_id (int): ID do cliente.
+        chunk_size (int): Linhas por bloco lido do cursor.
+
+    Returns:
+        dict: asset_id -> (datas em ordem crescente, fechamentos em float64).
+    """
+    first_buy = (
+        select(Allocation.asset_id, func.min(Allocation.buy_date).label("buy_date"))
+        .where(Allocation.client_id == client_id)
+        .group_by(Allocation.asset_id)
+        .subquery()
+    )
+    result = await db.stream(
+        select(DailyReturn.asset_id, DailyReturn.date, DailyReturn.close_price)
+        .join(first_buy, (DailyReturn.asset_id == first_buy.c.asset_id) & (DailyReturn.date >= first_buy.c.buy_date))
+        .order_by(DailyReturn.asset_id, DailyReturn.date)
+        .execution_options(yield_per=chunk_size)
+    )
+
+    histories = {}
+    current_id, dates, closes = None, [], []
+    async for rows in result.partitions(chunk_size):
+        for asset_id, day, close_price in rows:
+            if asset_id != current_id:
+                if dates:
+                    histories[current_id] = (dates, np.array(closes, dtype=np.float64))
+                current_id, dates, closes = asset_id, [], []
+            dates.append(day)
+            closes.append(close_price)
+    if dates:
+        histories[current_id] = (dates, np.array(closes, dtype=np.float64))
+    return histories
+
+async def _create_partitions(db: AsyncSession, years) -> list[int]:
+    """Cria (se preciso) as partições anuais de daily_returns; só no PostgreSQL."""
+    if db.bind.dialect.name != "postgresql":
+        return []
+    years = sorted(years)
+    for year in years:
+        await db.execute(text("SELECT create_daily_returns_partition(:year)"), {"year": year})
+    return years
+
+
+async def upsert_daily_returns(db: AsyncSession, rows: list[dict], chunk_size: int = 1000) -> int:
+    """
+    Grava fechamentos em lote de forma idempotente (um registro por ativo e dia).
+
+    Se já existir um fechamento para (asset_id, date), o preço é sobrescrito. No PostgreSQL,
+    as partições anuais dos anos presentes em `rows` são criadas antes, para que nada caia
+    na partição default; a função do banco serializa a criação entre blocos concorrentes.
+    Não faz commit.
+
+    Args:
+        db (AsyncSession): Sessão assíncrona do banco.
+        rows (list[dict]): Registros com asset_id, date e close_price.
+        chunk_size (int): Registros por comando.
+
+    Returns:
+        int: Quantidade de registros enviados.
+    """
+    await _create_partitions(db, {row["date"].year for row in rows})
+    return await bulk_upsert(
+        db,
+        DailyReturn,
+        rows,
+        index_elements=["asset_id", "date"],
+        update_columns=["close_price"],
+        chunk_size=chunk_size,
+    )
+
+
 async def create_daily_return(db: AsyncSession, asset_id: int, date: date, close_price: float):
     """
-    Cria um registro de retorno diário para um ativo.
+    Cria (ou atualiza, se já existir para o dia) o retorno diário de um ativo.
 
     Args:
         db (AsyncSession): Sessão assíncrona do banco.
@@ -37,17 +128,16 @@ async def create_daily_return(db: AsyncSession, asset_id: int, date: date, close
         close_price (float): Preço de fechamento.
 
     Returns:
-        DailyReturn: Registro criado.
+        DailyReturn: Registro gravado.
     """
-    daily_return = DailyReturn(
-        asset_id=asset_id,
-        date=date,
-        close_price=close_price
-    )
-    db.add(daily_return)
+    await upsert_daily_returns(db, [{"asset_id": asset_id, "date": date, "close_price": close_price}])
     await db.commit()
-    await db.refresh(daily_return)
-    return daily_return
+    result = await db.execute(
+        select(DailyReturn)
+        .where(DailyReturn.asset_id == asset_id, DailyReturn.date == date)
+        .execution_options(populate_existing=True)
+    )
+    return result.scalars().one()
 
 
 async def get_latest_by_asset(db: AsyncSession, asset_id: int):
@@ -70,6 +160,53 @@ async def get_latest_by_asset(db: AsyncSession, asset_id: int):
     result = await db.execute(stmt)
     return result.scalars().first()
 
+CAPTADO_PERIODS = ("anual", "semestral", "mensal", "semanal")
+
+
+def _period_start(period: str, year: int, month: int, today: date) -> date:
+    """
+    Calcula a data inicial da janela de um período de captado.
+
+    Args:
+        period (str): 'anual', 'semestral', 'mensal' ou 'semanal'
+        year (int)
+        month (int, optional)
+        today (date): Data final da janela.
+
+    Returns:
+        date: Primeiro dia da janela.
+
+    Raises:
+        ValueError: Se o período for inválido ou o mês não for informado.
+    """
+    if period == "anual":
+        return datetime(year - 1, 1, 1).date()
+    if period == "semestral":
+        if not month:
+            raise ValueError("Mês é obrigatório para cálculo semestral.")
+        semester = 1 if month <= 6 else 2
+        return datetime(year, 1, 1).date() if semester == 1 else datetime(year, 7, 1).date()
+    if period == "mensal":
+        if not month:
+            raise ValueError("Mês é obrigatório para cálculo mensal.")
+        first_day_this_month = datetime(year, month, 1).date()
+        return (first_day_this_month - timedelta(days=1)).replace(day=1)
+    if period == "semanal":
+        if not month:
+            raise ValueError("Mês é obrigatório para cálculo semanal.")
+        return today - timedelta(days=today.weekday())
+    raise ValueError(f"Período inválido: {period}")
+
+
+def _captured_result(total_captured: float, current_total_value: float) -> dict:
+    profitability = ((current_total_value - total_captured) / total_captured * 100) if total_captured else 0.0
+    return {
+        "captado": total_captured,
+        "atual": current_total_value,
+        "rentabilidade": profitability
+    }
+
+
 async def get_captured_by_period(
     session: AsyncSession,
     client_id: int,
@@ -96,29 +233,8 @@ async def get_captured_by_period(
         }
     """
     today = datetime.utcnow().date()
-
-    if period == "anual":
-        start_date = datetime(year - 1, 1, 1).date()
-        end_date = today
-    elif period == "semestral":
-        if not month:
-            raise ValueError("Mês é obrigatório para cálculo semestral.")
-        semester = 1 if month <= 6 else 2
-        start_date = datetime(year, 1, 1).date() if semester == 1 else datetime(year, 7, 1).date()
-        end_date = today
-    elif period == "mensal":
-        if not month:
-            raise ValueError("Mês é obrigatório para cálculo mensal.")
-        first_day_this_month = datetime(year, month, 1).date()
-        start_date = (first_day_this_month - timedelta(days=1)).replace(day=1)
-        end_date = today
-    elif period == "semanal":
-        if not month:
-            raise ValueError("Mês é obrigatório para cálculo semanal.")
-        start_date = today - timedelta(days=today.weekday())
-        end_date = today
-    else:
-        raise ValueError(f"Período inválido: {period}")
+    start_date = _period_start(period, year, month, today)
+    end_date = today
 
     query = (
         select(func.sum(DailyReturn.close_price * Allocation.quantity))
@@ -134,19 +250,124 @@ async def get_captured_by_period(
     total_captured = float(result.scalar() or 0.0)
 
     assets = await list_assets_by_client(db=session, client_id=client_id)
+    prices = await get_asset_prices(ticker for ticker, _ in assets)
+    current_total_value = sum(prices[ticker] * qty for ticker, qty in assets if ticker in prices)
 
-    current_total_value = 0.0
-    for ticker, qty in assets:
-        try:
-            price = yf.Ticker(ticker).fast_info.last_price
-            current_total_value += price * qty
-        except Exception as e:
-            logging.warning(f"Erro ao buscar preço de {ticker}: {e}")
+    return _captured_result(total_captured, current_total_value)
 
-    profitability = ((current_total_value - total_captured) / total_captured * 100) if total_captured else 0.0
 
+async def get_captured_by_clients(
+    session: AsyncSession,
+    year: int,
+    month: int,
+    client_ids: list[int] = None
+) -> dict[int, dict[str, float]]:
+    """
+    Calcula o valor captado de todos os clientes nos quatro períodos em uma única query.
+
+    Usa agregação condicional (SUM com CASE) sobre as janelas de data de cada período,
+    agrupando por cliente, em vez de uma query por cliente por período.
+
+    Args:
+        session (AsyncSession)
+        year (int)
+        month (int)
+        client_ids (list[int], optional): Restringe o cálculo a esses clientes.
+
+    Returns:
+        dict: {client_id: {"anual": float, "semestral": float, "mensal": float, "semanal": float}}
+    """
+    today = datetime.utcnow().date()
+    starts = {period: _period_start(period, year, month, today) for period in CAPTADO_PERIODS}
+    value = DailyReturn.close_price * Allocation.quantity
+
+    query = (
+        select(
+            Allocation.client_id,
+            *(
+                func.sum(case((DailyReturn.date >= start, value), else_=0.0)).label(period)
+                for period, start in starts.items()
+            ),
+        )
+        .join(Allocation, Allocation.asset_id == DailyReturn.asset_id)
+        .where(Allocation.is_active == True)
+        .where(DailyReturn.date >= min(starts.values()))
+        .where(DailyReturn.date <= today)
+        .where(Allocation.buy_date <= today)
+        .group_by(Allocation.client_id)
+    )
+    if client_ids is not None:
+        query = query.where(Allocation.client_id.in_(client_ids))
+
+    result = await session.execute(query)
     return {
-        "captado": total_captured,
-        "atual": current_total_value,
-        "rentabilidade": profitability
-    }
\ No newline at end of file
+        row.client_id: {period: float(getattr(row, period) or 0.0) for period in CAPTADO_PERIODS}
+        for row in result
+    }
+
+
+async def get_captado_snapshot(session: AsyncSession, year: int, month: int) -> list[dict]:
+    """
+    Monta o snapshot de captado de todos os clientes ativos para um mês/ano.
+
+    São três queries no total (clientes, totais captados e posições), independente
+    da quantidade de clientes, e cada ticker tem o preço buscado uma única vez.
+
+    Args:
+        session (AsyncSession): Sessão assíncrona do banco.
+        year (int): Ano de referência.
+        month (int): Mês de referência.
+
+    Returns:
+        list[dict]: Um item por cliente com os períodos anual, semestral, mensal e semanal.
+    """
+    clients = await get_clients(session, skip=0, limit=999)
+    if not clients:
+        return []
+
+    client_ids = [client.id for client in clients]
+    captured = await get_captured_by_clients(session, year, month, client_ids)
+    holdings = await list_assets_by_clients(session, client_ids)
+    prices = await get_asset_prices(ticker for _, ticker, _ in holdings)
+
+    current_values = defaultdict(float)
+    for client_id, ticker, qty in holdings:
+        if ticker in prices:
+            current_values[client_id] += prices[ticker] * qty
+
+    empty = dict.fromkeys(CAPTADO_PERIODS, 0.0)
+    snapshot = []
+    for client in clients:
+        totals = captured.get(client.id, empty)
+        snapshot.append({
+            "client_name": client.name,
+            **{
+                period: _captured_result(totals[period], current_values[client.id])
+                for period in CAPTADO_PERIODS
+            },
+        })
+    return snapshot
+
+
+async def ensure_daily_return_partitions(db: AsyncSession, years_ahead: int = 1) -> list[int]:
+    """
+    Garante as partições anuais de daily_returns do início do backfill (ou do ano corrente,
+    se for anterior) até `years_ahead` anos à frente.
+
+    Só tem efeito no PostgreSQL (tabela particionada pela migração d41c7e8a6b25); nos demais
+    bancos não faz nada. Linhas desses anos que estejam na partição default são movidas
+    para a partição do ano.
+
+    Args:
+        db (AsyncSession): Sessão assíncrona do banco.
+        years_ahead (int): Quantos anos futuros manter criados.
+
+    Returns:
+        list[int]: Anos cujas partições foram garantidas.
+    """
+    this_year = date.today().year
+    years = await _create_partitions(
+        db, range(min(BACKFILL_START_DATE.year, this_year), this_year + years_ahead + 1)
+    )
+    await db.commit()
+    return years
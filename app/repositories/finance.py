@@ -1,92 +1,98 @@
 from collections import defaultdict
 from datetime import date
-from sqlalchemy import select
+import numpy as np
+from sqlalchemy import func, select
 from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.allocation import Allocation
+from app.models.asset import Asset
 from app.models.daily_return import DailyReturn
 from app.repositories import allocations as allocations_repo, daily_returns as dr_repo
 
+def _ticker_performance(ticker: str, allocs: list, dates: list[date], closes: np.ndarray) -> dict:
+    """
+    Métricas e curva de rentabilidade de um ticker, em forma vetorizada.
+
+    Cada alocação vira uma linha de uma matriz (alocações x pregões): `searchsorted` dá o
+    primeiro pregão a partir da data de compra e os pregões anteriores ficam zerados. A
+    curva é a soma das colunas ponderada pelo valor investido das alocações já ativas.
+
+    Args:
+        ticker (str): Ticker do ativo.
+        allocs (list): Alocações do cliente nesse ativo.
+        dates (list[date]): Datas dos fechamentos, em ordem crescente.
+        closes (np.ndarray): Fechamentos (float64) alinhados com `dates`.
+
+    Returns:
+        dict: Métricas do ticker no formato de `calculate_client_performance`.
+    """
+    buy_prices = np.array([a.buy_price for a in allocs], dtype=np.float64)
+    quantities = np.array([a.quantity for a in allocs], dtype=np.float64)
+    invested = buy_prices * quantities
+    offsets = np.searchsorted(
+        np.array(dates, dtype="datetime64[D]"),
+        np.array([a.buy_date for a in allocs], dtype="datetime64[D]"),
+        side="left",
+    )
+
+    # active[i, t]: a alocação i já estava comprada no pregão t
+    active = np.arange(len(dates))[np.newaxis, :] >= offsets[:, np.newaxis]
+    acc_returns = (closes[np.newaxis, :] - buy_prices[:, np.newaxis]) / buy_prices[:, np.newaxis] * 100
+    daily_acc_returns = np.where(active, acc_returns * invested[:, np.newaxis], 0.0).sum(axis=0)
+    daily_weights = np.where(active, invested[:, np.newaxis], 0.0).sum(axis=0)
+
+    total_invested = float(invested.sum())
+    current_value = float((closes[-1] * quantities)[offsets < len(dates)].sum())
+    profit_loss = current_value - total_invested
+    percentage_change = (profit_loss / total_invested) * 100 if total_invested else 0
+
+    # Variação diária simples (0 quando o fechamento anterior é zero)
+    prev = closes[:-1]
+    daily_changes = np.divide(np.diff(closes), prev, out=np.zeros_like(prev), where=prev != 0)
+    avg_daily_return = float(daily_changes.mean()) if daily_changes.size else 0
+
+    # A curva começa no primeiro pregão com alguma alocação ativa
+    first = int(offsets.min())
+    weights = np.where(daily_weights != 0, daily_weights, 1.0)
+    curve = (daily_acc_returns[first:] / weights[first:]).tolist()
+    performance_curve = [
+        {"date": dt.isoformat(), "accumulated_return_pct": round(pct, 2), "ticker": ticker}
+        for dt, pct in zip(dates[first:], curve)
+    ]
+
+    return {
+        "ticker": ticker,
+        "buy_price": allocs[0].buy_price,
+        "quantity": sum(a.quantity for a in allocs),
+        "total_invested": round(total_invested, 2),
+        "current_value": round(current_value, 2),
+        "profit_loss": round(profit_loss, 2),
+        "percentage_change": round(percentage_change, 2),
+        "avg_daily_return": round(avg_daily_return * 100, 2),
+        "start_date": dates[0].isoformat(),
+        "end_date": dates[-1].isoformat(),
+        "performance_curve": performance_curve,
+    }
+
 async def calculate_client_performance(db: AsyncSession, client_id: int):
-    allocations = await allocations_repo.get_by_client(db, client_id)
-    if not allocations:
+    positions = await allocations_repo.get_positions_by_client(db, client_id)
+    if not positions:
         return []
 
-    # Agrupar alocações por ticker
-    allocations_by_ticker = defaultdict(list)
-    for alloc in allocations:
-        allocations_by_ticker[alloc.asset.ticker].append(alloc)
+    # Agrupar posições por ticker
+    positions_by_ticker = defaultdict(list)
+    for position in positions:
+        positions_by_ticker[position.ticker].append(position)
 
-    result = []
+    # Históricos de todos os ativos em uma só consulta, a partir da primeira compra de cada um
+    histories = await dr_repo.get_histories_by_client(db, client_id)
 
-    for ticker, allocs in allocations_by_ticker.items():
-        # Para cada ticker, coletar todos os daily_returns do asset
-        asset_id = allocs[0].asset_id
-        daily_returns = await dr_repo.get_by_asset(db, asset_id)
-        if not daily_returns:
+    result = []
+    for ticker, allocs in positions_by_ticker.items():
+        history = histories.get(allocs[0].asset_id)
+        if history is None:
             continue
-
-        daily_returns.sort(key=lambda x: x.date)
-
-        # Agregar métricas por ticker considerando todas as alocações
-        total_invested = 0
-        current_value = 0
-        profit_loss = 0
-
-        # Para rentabilidade acumulada diária agregada ponderada
-        daily_acc_returns = defaultdict(float)  # valor acumulado ponderado
-        daily_weights = defaultdict(float)      # soma dos investimentos para ponderação
-
-        for alloc in allocs:
-            buy_price = alloc.buy_price
-            quantity = alloc.quantity
-            total_invested += buy_price * quantity
-
-            # Filtrar daily_returns a partir da data da compra
-            filtered_returns = [dr for dr in daily_returns if dr.date >= alloc.buy_date]
-
-            for dr in filtered_returns:
-                value = dr.close_price * quantity
-                current_value += value if dr.date == filtered_returns[-1].date else 0  # só pega o último para current_value
-
-                acc_return = ((dr.close_price - buy_price) / buy_price) * 100
-                daily_acc_returns[dr.date] += acc_return * (buy_price * quantity)
-                daily_weights[dr.date] += buy_price * quantity
-
-        profit_loss = current_value - total_invested
-        percentage_change = (profit_loss / total_invested) * 100 if total_invested else 0
-
-        # Calcular avg_daily_return (simples média das variações diárias)
-        daily_changes = []
-        for i in range(1, len(daily_returns)):
-            prev = daily_returns[i - 1].close_price
-            curr = daily_returns[i].close_price
-            daily_changes.append((curr - prev) / prev if prev else 0)
-        avg_daily_return = sum(daily_changes) / len(daily_changes) if daily_changes else 0
-
-        # Curva de rentabilidade acumulada diária ponderada
-        performance_curve = []
-        for dt in sorted(daily_acc_returns.keys()):
-            weighted_return = daily_acc_returns[dt]
-            weight = daily_weights[dt] if daily_weights[dt] else 1
-            acc_return_pct = weighted_return / weight
-            performance_curve.append({
-                "date": dt.isoformat(),
-                "accumulated_return_pct": round(acc_return_pct, 2),
-                "ticker": ticker,
-            })
-
-        result.append({
-            "ticker": ticker,
-            "buy_price": allocs[0].buy_price,
-            "quantity": sum(a.quantity for a in allocs),
-            "total_invested": round(total_invested, 2),
-            "current_value": round(current_value, 2),
-            "profit_loss": round(profit_loss, 2),
-            "percentage_change": round(percentage_change, 2),
-            "avg_daily_return": round(avg_daily_return * 100, 2),
-            "start_date": daily_returns[0].date.isoformat(),
-            "end_date": daily_returns[-1].date.isoformat(),
-            "performance_curve": performance_curve,
-        })
+        dates, closes = history
+        result.append(_ticker_performance(ticker, allocs, dates, closes))
 
     return result
 
@@ -97,38 +103,144 @@ async def get_asset_metrics(
     quantity: float,
     buy_date: date = None
 ):
-    stmt = select(DailyReturn).where(DailyReturn.asset_id == asset_id)
+    """
+    Métricas de uma posição calculadas no banco, em uma única consulta.
+
+    Uma subconsulta com funções de janela traz, para cada fechamento, o fechamento anterior
+    (`lag`) e o último fechamento do período; a consulta externa agrega contagem, datas
+    extremas e a média de `close / lag(close) - 1`. Só uma linha volta para o Python,
+    qualquer que seja o tamanho do histórico (PostgreSQL e SQLite).
+
+    Args:
+        db (AsyncSession): Sessão assíncrona do banco.
+        asset_id (int): ID do ativo.
+        buy_price (float): Preço de compra.
+        quantity (float): Quantidade.
+        buy_date (date, optional): Considera apenas fechamentos a partir desta data.
+
+    Returns:
+        dict | None: Métricas da posição ou None se o ativo não tem fechamentos.
+    """
+    window = (
+        select(
+            DailyReturn.date,
+            DailyReturn.close_price,
+            func.lag(DailyReturn.close_price).over(order_by=DailyReturn.date).label("prev_close"),
+            func.first_value(DailyReturn.close_price).over(order_by=DailyReturn.date.desc()).label("latest_close"),
+        )
+        .where(DailyReturn.asset_id == asset_id)
+    )
     if buy_date:
-        stmt = stmt.where(DailyReturn.date >= buy_date)
-    stmt = stmt.order_by(DailyReturn.date)
-    result = await db.execute(stmt)
-    daily_returns = result.scalars().all()
-
-    if not daily_returns:
+        window = window.where(DailyReturn.date >= buy_date)
+    window = window.subquery()
+
+    result = await db.execute(
+        select(
+            func.count().label("count"),
+            func.min(window.c.date).label("start_date"),
+            func.max(window.c.date).label("end_date"),
+            func.max(window.c.latest_close).label("latest_price"),
+            func.avg(window.c.close_price / func.nullif(window.c.prev_close, 0) - 1).label("avg_daily_return"),
+        )
+    )
+    row = result.one()
+
+    if not row.count:
         return None
 
-    initial_price = daily_returns[0].close_price
-    latest_price = daily_returns[-1].close_price
+    latest_price = row.latest_price
 
     total_invested = buy_price * quantity
     current_value = latest_price * quantity
     profit_loss = current_value - total_invested
     percentage_change = ((latest_price - buy_price) / buy_price) * 100
 
-    # variação diária média simples
-    daily_changes = []
-    for i in range(1, len(daily_returns)):
-        prev_close = daily_returns[i-1].close_price
-        curr_close = daily_returns[i].close_price
-        daily_changes.append((curr_close - prev_close) / prev_close)
-    avg_daily_return = sum(daily_changes) / len(daily_changes) if daily_changes else 0
-
     return {
         "total_invested": total_invested,
         "current_value": current_value,
         "profit_loss": profit_loss,
         "percentage_change": percentage_change,
-        "avg_daily_return": avg_daily_return,
-        "start_date": daily_returns[0].date,
-        "end_date": daily_returns[-1].date,
-    }
\ No newline at end of file
+        "avg_daily_return": row.avg_daily_return or 0,
+        "start_date": row.start_date,
+        "end_date": row.end_date,
+    }
+
+
+async def stream_allocation_metrics(db: AsyncSession, client_ids: list[int] = None, chunk_size: int = 1000):
+    """
+    Métricas de todas as alocações dos clientes, calculadas em uma única passada no banco.
+
+    As métricas de cada ativo (último fechamento e média de `close / lag(close) - 1`, sobre
+    todo o histórico, como em `get_asset_metrics`) são agregadas uma vez por ativo com
+    funções de janela particionadas por ativo; as alocações são lidas do cursor em blocos
+    de `chunk_size`, ordenadas por cliente.
+
+    Args:
+        db (AsyncSession): Sessão assíncrona do banco.
+        client_ids (list[int], optional): Clientes a exportar. Padrão: todos.
+        chunk_size (int): Linhas por bloco lido do cursor.
+
+    Yields:
+        dict: client_id, ticker, quantity, buy_price e as métricas da alocação (None sem histórico).
+    """
+    allocation_filter = [Allocation.client_id.in_(client_ids)] if client_ids is not None else []
+    held_assets = select(Allocation.asset_id).where(*allocation_filter)
+    window = (
+        select(
+            DailyReturn.asset_id,
+            DailyReturn.close_price,
+            func.lag(DailyReturn.close_price).over(
+                partition_by=DailyReturn.asset_id, order_by=DailyReturn.date
+            ).label("prev_close"),
+            func.first_value(DailyReturn.close_price).over(
+                partition_by=DailyReturn.asset_id, order_by=DailyReturn.date.desc()
+            ).label("latest_close"),
+        )
+        .where(DailyReturn.asset_id.in_(held_assets))
+        .subquery()
+    )
+    asset_metrics = (
+        select(
+            window.c.asset_id,
+            func.max(window.c.latest_close).label("latest_price"),
+            func.avg(window.c.close_price / func.nullif(window.c.prev_close, 0) - 1).label("avg_daily_return"),
+        )
+        .group_by(window.c.asset_id)
+        .subquery()
+    )
+
+    result = await db.stream(
+        select(
+            Allocation.client_id,
+            Asset.ticker,
+            Allocation.quantity,
+            Allocation.buy_price,
+            asset_metrics.c.latest_price,
+            asset_metrics.c.avg_daily_return,
+        )
+        .join(Asset, Asset.id == Allocation.asset_id)
+        .outerjoin(asset_metrics, asset_metrics.c.asset_id == Allocation.asset_id)
+        .where(*allocation_filter)
+        .order_by(Allocation.client_id, Allocation.id)
+        .execution_options(yield_per=chunk_size)
+    )
+    async for rows in result.partitions(chunk_size):
+        for client_id, ticker, quantity, buy_price, latest_price, avg_daily_return in rows:
+            total_invested = buy_price * quantity
+            metrics = dict.fromkeys(("current_value", "profit_loss", "percentage_change", "avg_daily_return"))
+            if latest_price is not None:
+                current_value = latest_price * quantity
+                metrics = {
+                    "current_value": current_value,
+                    "profit_loss": current_value - total_invested,
+                    "percentage_change": ((latest_price - buy_price) / buy_price) * 100,
+                    "avg_daily_return": avg_daily_return or 0,
+                }
+            yield {
+                "client_id": client_id,
+                "ticker": ticker,
+                "quantity": quantity,
+                "buy_price": buy_price,
+                "total_invested": total_invested,
+                **metrics,
+            }
@@ -0,0 +1,141 @@
+import hashlib
+import logging
+
+import pandas as pd
+from sqlalchemy import delete, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import LISTED_SYMBOLS_MIN_DOWNLOAD_RATIO
+from app.database import bulk_upsert
+from app.models.listed_symbol import ListedSymbol
+
+_UPDATE_COLUMNS = ["name", "exchange", "is_etf", "row_hash", "updated_at"]
+
+
+def _row_hash(name: str, exchange: str, is_etf: bool) -> str:
+    return hashlib.sha1(f"{name}\x1f{exchange}\x1f{int(is_etf)}".encode()).hexdigest()[:16]
+
+
+def _rows_from_df(df: pd.DataFrame) -> dict[str, dict]:
+    rows = {}
+    for symbol, name, exchange, is_etf in df[["symbol", "name", "exchange", "is_etf"]].itertuples(index=False):
+        if not isinstance(symbol, str) or not symbol:
+            continue
+        name = "" if pd.isna(name) else str(name)
+        exchange = str(exchange)
+        is_etf = bool(is_etf)
+        rows[symbol] = {
+            "symbol": symbol,
+            "name": name,
+            "exchange": exchange,
+            "is_etf": is_etf,
+            "row_hash": _row_hash(name, exchange, is_etf),
+        }
+    return rows
+
+
+async def sync_listed_symbols(db: AsyncSession, df: pd.DataFrame) -> dict:
+    """
+    Sincroniza a tabela listed_symbols com o universo de tickers baixado.
+
+    Compara o hash de cada linha com o que já está gravado e só envia ao banco os
+    símbolos novos ou alterados (upsert em lote); símbolos que saíram da listagem são
+    removidos. Se o download veio vazio ou com menos de LISTED_SYMBOLS_MIN_DOWNLOAD_RATIO
+    das linhas gravadas (falha parcial da fonte), nada é removido. Faz commit ao final.
+
+    Args:
+        db (AsyncSession): Sessão assíncrona do banco.
+        df (pd.DataFrame): Universo com as colunas symbol, name, exchange e is_etf.
+
+    Returns:
+        dict: Quantidade de linhas inseridas, atualizadas, removidas e inalteradas, e
+            quantas remoções foram puladas por download incompleto.
+    """
+    incoming = _rows_from_df(df)
+    result = await db.execute(select(ListedSymbol.symbol, ListedSymbol.row_hash))
+    stored = dict(result.all())
+
+    now = pd.Timestamp.now(tz="UTC").to_pydatetime()
+    inserted = [row for symbol, row in incoming.items() if symbol not in stored]
+    updated = [
+        row for symbol, row in incoming.items()
+        if symbol in stored and stored[symbol] != row["row_hash"]
+    ]
+    removed = [symbol for symbol in stored if symbol not in incoming]
+    skipped = []
+    if removed and len(incoming) < len(stored) * LISTED_SYMBOLS_MIN_DOWNLOAD_RATIO:
+        logging.warning(
+            f"Download de símbolos com {len(incoming)} linhas para {len(stored)} gravadas: "
+            f"{len(removed)} remoções ignoradas"
+        )
+        removed, skipped = [], removed
+
+    changed = [{**row, "updated_at": now} for row in inserted + updated]
+    await bulk_upsert(db, ListedSymbol, changed, index_elements=["symbol"], update_columns=_UPDATE_COLUMNS)
+    for start in range(0, len(removed), 1000):
+        await db.execute(delete(ListedSymbol).where(ListedSymbol.symbol.in_(removed[start:start + 1000])))
+    await db.commit()
+
+    return {
+        "inserted": len(inserted),
+        "updated": len(updated),
+        "deleted": len(removed),
+        "unchanged": len(incoming) - len(inserted) - len(updated),
+        "skipped_deletes": len(skipped),
+    }
+
+
+async def list_listed_symbols(
+    db: AsyncSession,
+    offset: int = 0,
+    limit: int = 100,
+    exchange: str = None,
+    is_etf: bool = None,
+) -> tuple[list[dict], int]:
+    """
+    Página de símbolos listados, ordenada por símbolo, com filtros aplicados no SQL.
+
+    Args:
+        db (AsyncSession): Sessão assíncrona do banco.
+        offset (int): Registros a pular.
+        limit (int): Máximo de registros.
+        exchange (str, optional): Filtra pela bolsa.
+        is_etf (bool, optional): Filtra ETFs.
+
+    Returns:
+        tuple[list[dict], int]: Itens da página (symbol, name, exchange, is_etf) e total filtrado.
+    """
+    filters = []
+    if exchange is not None:
+        filters.append(ListedSymbol.exchange == exchange)
+    if is_etf is not None:
+        filters.append(ListedSymbol.is_etf == is_etf)
+
+    total = await db.scalar(select(func.count()).select_from(ListedSymbol).where(*filters))
+    result = await db.execute(
+        select(ListedSymbol.symbol, ListedSymbol.name, ListedSymbol.exchange, ListedSymbol.is_etf)
+        .where(*filters)
+        .order_by(ListedSymbol.symbol)
+        .offset(offset)
+        .limit(limit)
+    )
+    return [dict(row._mapping) for row in result.all()], int(total or 0)
+
+
+async def has_listed_symbols(db: AsyncSession) -> bool:
+    """Indica se a tabela listed_symbols já foi populada pelo job de carga."""
+    return await db.scalar(select(ListedSymbol.symbol).limit(1)) is not None
+
+
+async def load_listed_symbols_df(db: AsyncSession) -> pd.DataFrame:
+    """
+    Universo de tickers a partir da tabela listed_symbols, ordenado por símbolo.
+
+    Returns:
+        pd.DataFrame: Colunas symbol, name, exchange e is_etf (o formato de `fetch_all_tickers_df`).
+    """
+    result = await db.execute(
+        select(ListedSymbol.symbol, ListedSymbol.name, ListedSymbol.exchange, ListedSymbol.is_etf)
+        .order_by(ListedSymbol.symbol)
+    )
+    return pd.DataFrame(result.all(), columns=["symbol", "name", "exchange", "is_etf"])
@@ -0,0 +1,227 @@
+import logging
+from collections import defaultdict
+from datetime import date, timedelta
+
+import pandas as pd
+from sqlalchemy import Date, String, bindparam, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import BACKFILL_CHUNK_SIZE, PRICE_GAP_LOOKBACK_DAYS
+from app.core.market_hours import EXCHANGE_CALENDARS, US_EQUITIES, get_calendar
+from app.core.rate_limit import market_data_guard
+from app.providers.prices import get_price_provider
+from app.repositories.assets import SUFFIX_EXCHANGES
+from app.repositories.daily_returns import upsert_daily_returns
+
+
+def _default_window(start: date = None, end: date = None) -> tuple[date, date]:
+    end = end or date.today()
+    start = start or end - timedelta(days=PRICE_GAP_LOOKBACK_DAYS)
+    return start, end
+
+
+def _trading_days(start: date, end: date) -> list[tuple[str, date]]:
+    """Pregões de cada calendário em [start, end), como pares (código do calendário, dia)."""
+    calendars = {calendar.code: calendar for calendar in EXCHANGE_CALENDARS.values()}
+    days = []
+    for code, calendar in sorted(calendars.items()):
+        day = start
+        while day < end:
+            if calendar.is_trading_day(day):
+                days.append((code, day))
+            day += timedelta(days=1)
+    return days
+
+
+def _expected_days_sql(start: date, end: date):
+    """
+    CTEs `calendar` (pregões por calendário, em VALUES) e `asset_window` (calendário e
+    primeiro fechamento de cada ativo com histórico), seguidas do join dos pregões
+    esperados de cada ativo. O calendário do ativo sai do sufixo do ticker, em SQL.
+
+    Returns:
+        tuple[str, dict, list]: Trecho SQL, parâmetros e bindparams tipados.
+    """
+    days = _trading_days(start, end)
+    params, binds, values = {}, [], []
+    for i, (code, day) in enumerate(days):
+        params[f"code_{i}"], params[f"day_{i}"] = code, day
+        binds += [bindparam(f"code_{i}", type_=String), bindparam(f"day_{i}", type_=Date)]
+        values.append(f"(:code_{i}, :day_{i})")
+    if not values:
+        values.append("(NULL, NULL)")
+
+    cases = []
+    for i, (suffix, exchange) in enumerate(sorted(SUFFIX_EXCHANGES.items())):
+        params[f"suffix_{i}"], params[f"suffix_code_{i}"] = f"%{suffix}", get_calendar(exchange).code
+        binds += [bindparam(f"suffix_{i}", type_=String), bindparam(f"suffix_code_{i}", type_=String)]
+        cases.append(f"WHEN a.ticker LIKE :suffix_{i} THEN :suffix_code_{i}")
+    params["default_code"] = US_EQUITIES.code
+    binds.append(bindparam("default_code", type_=String))
+    # Limites constantes da janela: permitem ao PostgreSQL podar as partições anuais.
+    params["window_start"], params["window_end"] = start, end
+    binds += [bindparam("window_start", type_=Date), bindparam("window_end", type_=Date)]
+    calendar_code = f"CASE {' '.join(cases)} ELSE :default_code END" if cases else ":default_code"
+
+    sql = f"""
+        WITH calendar(code, day) AS (VALUES {", ".join(values)}),
+        asset_window AS (
+            SELECT a.id AS asset_id, a.ticker AS ticker, {calendar_code} AS code, MIN(dr.date) AS first_date
+            FROM assets a
+            JOIN daily_returns dr ON dr.asset_id = a.id AND dr.date < :window_end
+            GROUP BY a.id, a.ticker
+        ),
+        expected AS (
+            SELECT w.asset_id, w.ticker, c.day, dr.id AS daily_return_id
+            FROM asset_window w
+            JOIN calendar c ON c.code = w.code AND c.day >= w.first_date
+            LEFT JOIN daily_returns dr ON dr.asset_id = w.asset_id AND dr.date = c.day
+                AND dr.date >= :window_start AND dr.date < :window_end
+        )
+    """
+    return sql, params, binds
+
+
+async def find_price_gaps(db: AsyncSession, start: date = None, end: date = None) -> dict[int, dict]:
+    """
+    Pregões sem fechamento gravado, por ativo, em uma única consulta.
+
+    Compara daily_returns com o calendário de pregões da bolsa de cada ativo, a partir do
+    primeiro fechamento do ativo (dias anteriores ao início do histórico não são lacunas).
+
+    Args:
+        db (AsyncSession): Sessão assíncrona do banco.
+        start (date, optional): Início da janela. Padrão: PRICE_GAP_LOOKBACK_DAYS atrás.
+        end (date, optional): Fim da janela (exclusivo). Padrão: hoje.
+
+    Returns:
+        dict: asset_id -> {"ticker": str, "missing": list[date]}.
+    """
+    start, end = _default_window(start, end)
+    sql, params, binds = _expected_days_sql(start, end)
+    result = await db.execute(
+        text(sql + """
+            SELECT asset_id, ticker, day FROM expected
+            WHERE daily_return_id IS NULL
+            ORDER BY asset_id, day
+        """).bindparams(*binds).columns(day=Date),
+        params,
+    )
+    gaps: dict[int, dict] = {}
+    for asset_id, ticker, day in result.all():
+        gaps.setdefault(asset_id, {"ticker": ticker, "missing": []})["missing"].append(day)
+    return gaps
+
+
+async def get_price_coverage(db: AsyncSession, start: date = None, end: date = None) -> dict:
+    """
+    Relatório de cobertura do histórico de preços por ativo.
+
+    Args:
+        db (AsyncSession): Sessão assíncrona do banco.
+        start (date, optional): Início da janela.
+        end (date, optional): Fim da janela (exclusivo).
+
+    Returns:
+        dict: Janela, totais e, por ativo, pregões esperados, presentes e a cobertura.
+    """
+    start, end = _default_window(start, end)
+    sql, params, binds = _expected_days_sql(start, end)
+    result = await db.execute(
+        text(sql + """
+            SELECT asset_id, ticker, COUNT(*) AS expected, COUNT(daily_return_id) AS present
+            FROM expected
+            GROUP BY asset_id, ticker
+            ORDER BY asset_id
+        """).bindparams(*binds),
+        params,
+    )
+    assets = [
+        {
+            "asset_id": asset_id,
+            "ticker": ticker,
+            "expected": expected,
+            "present": present,
+            "missing": expected - present,
+            "coverage": round(present / expected, 4) if expected else 1.0,
+        }
+        for asset_id, ticker, expected, present in result.all()
+    ]
+    expected = sum(a["expected"] for a in assets)
+    present = sum(a["present"] for a in assets)
+    return {
+        "start": start,
+        "end": end,
+        "expected": expected,
+        "present": present,
+        "coverage": round(present / expected, 4) if expected else 1.0,
+        "assets_with_gaps": sum(1 for a in assets if a["missing"]),
+        "assets": assets,
+    }
+
+
+def _missing_ranges(days: list[date]) -> list[tuple[date, date]]:
+    """Agrupa pregões faltantes em intervalos [início, fim) separados por mais de uma semana."""
+    ranges = []
+    for day in sorted(days):
+        if ranges and (day - ranges[-1][1]).days <= 7:
+            ranges[-1][1] = day + timedelta(days=1)
+        else:
+            ranges.append([day, day + timedelta(days=1)])
+    return [tuple(r) for r in ranges]
+
+
+async def repair_price_gaps(
+    db: AsyncSession,
+    start: date = None,
+    end: date = None,
+    chunk_size: int = BACKFILL_CHUNK_SIZE,
+) -> dict:
+    """
+    Busca no provedor apenas os intervalos faltantes e grava os fechamentos encontrados.
+
+    Ativos com o mesmo intervalo faltante (o caso típico de uma noite em que a task falhou)
+    são agrupados em uma única chamada `bulk_history` por bloco de `chunk_size` tickers.
+
+    Returns:
+        dict: Pregões faltantes, reparados e os que o provedor também não tem.
+    """
+    gaps = await find_price_gaps(db, start, end)
+    by_range: dict[tuple[date, date], list[int]] = defaultdict(list)
+    for asset_id, gap in gaps.items():
+        for missing_range in _missing_ranges(gap["missing"]):
+            by_range[missing_range].append(asset_id)
+
+    provider = get_price_provider()
+    repaired = 0
+    for (range_start, range_end), asset_ids in sorted(by_range.items()):
+        for offset in range(0, len(asset_ids), chunk_size):
+            chunk = asset_ids[offset:offset + chunk_size]
+            tickers = sorted({gaps[asset_id]["ticker"] for asset_id in chunk})
+            try:
+                history = await market_data_guard.call(provider.bulk_history, tickers, range_start, range_end)
+            except Exception as e:
+                logging.warning(f"Erro ao reparar {tickers} em {range_start}..{range_end}: {e}")
+                continue
+
+            rows = []
+            for asset_id in chunk:
+                closes = history.get(gaps[asset_id]["ticker"])
+                if closes is None:
+                    continue
+                missing = set(gaps[asset_id]["missing"])
+                rows.extend(
+                    {"asset_id": asset_id, "date": day, "close_price": float(close)}
+                    for day, close in closes.items()
+                    if day in missing and not pd.isna(close)
+                )
+            repaired += await upsert_daily_returns(db, rows)
+            await db.commit()
+
+    missing = sum(len(gap["missing"]) for gap in gaps.values())
+    return {
+        "assets_with_gaps": len(gaps),
+        "missing": missing,
+        "repaired": repaired,
+        "unresolved": missing - repaired,
+    }
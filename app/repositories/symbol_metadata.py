@@ -0,0 +1,158 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import (
+    SYMBOL_METADATA_BATCH_SIZE,
+    SYMBOL_METADATA_CHUNK_SIZE,
+    SYMBOL_METADATA_MAX_AGE,
+    SYMBOL_METADATA_NEGATIVE_TTL,
+)
+from app.core.rate_limit import market_data_guard
+from app.database import bulk_upsert
+from app.models.symbol_metadata import SymbolMetadata
+from app.providers.prices import get_price_provider
+
+_FIELDS = ("currency", "exchange", "quote_type")
+
+
+async def get_symbol_metadata(db: AsyncSession, symbols: list[str]) -> dict[str, dict]:
+    """
+    Lê os atributos estáticos gravados para os símbolos (uma consulta pela chave primária).
+
+    Args:
+        db (AsyncSession): Sessão assíncrona do banco.
+        symbols (list[str]): Símbolos desejados.
+
+    Returns:
+        dict: symbol -> {currency, exchange, quote_type}, só para os símbolos já gravados.
+    """
+    if not symbols:
+        return {}
+    result = await db.execute(
+        select(SymbolMetadata.symbol, SymbolMetadata.currency, SymbolMetadata.exchange, SymbolMetadata.quote_type)
+        .where(SymbolMetadata.symbol.in_(symbols))
+    )
+    return {row.symbol: {field: getattr(row, field) for field in _FIELDS} for row in result.all()}
+
+
+async def save_symbol_metadata(db: AsyncSession, metadata: dict[str, dict]) -> int:
+    """Grava (upsert) os atributos dos símbolos e faz commit."""
+    now = datetime.now(timezone.utc)
+    rows = [
+        {"symbol": symbol, **{field: values.get(field) for field in _FIELDS}, "updated_at": now}
+        for symbol, values in metadata.items()
+    ]
+    count = await bulk_upsert(
+        db, SymbolMetadata, rows, index_elements=["symbol"], update_columns=[*_FIELDS, "updated_at"]
+    )
+    await db.commit()
+    return count
+
+
+async def _fetch_chunk(provider, chunk: list[str]) -> tuple[dict[str, dict], list[str]]:
+    try:
+        # O provedor faz uma requisição por símbolo: cada símbolo custa um token.
+        return await market_data_guard.call(provider.metadata, chunk, cost=len(chunk)), chunk
+    except Exception as e:
+        logging.warning(f"Erro ao buscar metadata de {chunk}: {e}")
+        return {}, []
+
+
+async def _fetch(symbols: list[str], chunk_size: int) -> tuple[dict[str, dict], list[str]]:
+    """Atributos encontrados e os símbolos que o provedor chegou a responder (com ou sem dados)."""
+    if not symbols:
+        return {}, []
+    provider = get_price_provider()
+    chunks = [symbols[start:start + chunk_size] for start in range(0, len(symbols), chunk_size)]
+    metadata, answered = {}, []
+    for fetched, queried in await asyncio.gather(*(_fetch_chunk(provider, chunk) for chunk in chunks)):
+        metadata.update(fetched)
+        answered.extend(queried)
+    return metadata, answered
+
+
+async def fetch_symbol_metadata(symbols: list[str], chunk_size: int = SYMBOL_METADATA_CHUNK_SIZE) -> dict[str, dict]:
+    """
+    Busca os atributos no provedor de preços, em blocos de `chunk_size` símbolos executados
+    em paralelo no executor (rate limit por símbolo e circuit breaker).
+
+    Blocos que falham ou são barrados pelo rate limit ficam de fora do resultado.
+    """
+    metadata, _ = await _fetch(symbols, chunk_size)
+    return metadata
+
+
+async def _fetch_and_save(db: AsyncSession, symbols: list[str]) -> dict[str, dict]:
+    """
+    Busca os símbolos no provedor e grava o resultado, inclusive os símbolos que o provedor
+    respondeu sem dados (linha sem atributos). Símbolos de blocos com falha não são gravados.
+    """
+    fetched, answered = await _fetch(symbols, SYMBOL_METADATA_CHUNK_SIZE)
+    unavailable = {symbol: {} for symbol in answered if symbol not in fetched}
+    if fetched or unavailable:
+        await save_symbol_metadata(db, {**fetched, **unavailable})
+    return fetched
+
+
+async def load_symbol_metadata(db: AsyncSession, symbols: list[str]) -> dict[str, dict]:
+    """
+    Atributos dos símbolos, buscando no provedor (e gravando) apenas os que ainda não existem.
+
+    Símbolos que o provedor respondeu sem dados ficam gravados sem atributos (currency etc.
+    nulos) e só voltam ao provedor depois de SYMBOL_METADATA_NEGATIVE_TTL segundos.
+
+    Args:
+        db (AsyncSession): Sessão assíncrona do banco.
+        symbols (list[str]): Símbolos desejados.
+
+    Returns:
+        dict: symbol -> {currency, exchange, quote_type}.
+    """
+    metadata = await get_symbol_metadata(db, symbols)
+    negatives = [symbol for symbol, values in metadata.items() if all(v is None for v in values.values())]
+    expired = set()
+    if negatives:
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=SYMBOL_METADATA_NEGATIVE_TTL)
+        result = await db.execute(
+            select(SymbolMetadata.symbol)
+            .where(SymbolMetadata.symbol.in_(negatives), SymbolMetadata.updated_at < cutoff)
+        )
+        expired = set(result.scalars().all())
+
+    missing = [symbol for symbol in symbols if symbol not in metadata or symbol in expired]
+    metadata.update(await _fetch_and_save(db, missing))
+    return metadata
+
+
+async def refresh_stale_symbol_metadata(
+    db: AsyncSession,
+    max_age: int = SYMBOL_METADATA_MAX_AGE,
+    batch_size: int = SYMBOL_METADATA_BATCH_SIZE,
+) -> int:
+    """
+    Atualiza, em lotes, os símbolos cujos atributos foram gravados há mais de `max_age` segundos.
+
+    Args:
+        db (AsyncSession): Sessão assíncrona do banco.
+        max_age (int): Idade máxima dos atributos, em segundos.
+        batch_size (int): Símbolos por chamada ao provedor.
+
+    Returns:
+        int: Quantidade de símbolos atualizados.
+    """
+    cutoff = datetime.now(timezone.utc) - timedelta(seconds=max_age)
+    result = await db.execute(
+        select(SymbolMetadata.symbol)
+        .where(SymbolMetadata.updated_at < cutoff)
+        .order_by(SymbolMetadata.updated_at)
+    )
+    stale = list(result.scalars().all())
+
+    refreshed = 0
+    for start in range(0, len(stale), batch_size):
+        refreshed += len(await _fetch_and_save(db, stale[start:start + batch_size]))
+    return refreshed
@@ -1,12 +1,13 @@
-from datetime import date
-from fastapi import APIRouter, Depends, Query
-from sqlalchemy import select
+import uuid
+from datetime import date, timedelta
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.database import SessionLocal, get_db
-from app.models.asset import Asset
-from app.models.daily_return import DailyReturn
-from app.repositories import assets as asset_repo
-import yfinance as yf
+from app.core.config import PRICE_GAP_LOOKBACK_DAYS
+from app.database import get_db
+from app.core.rate_limit import market_data_guard
+from app.core.security import require_role
+from app.repositories import assets as asset_repo, backfill as backfill_repo, price_gaps as price_gaps_repo
+from app.tasks.daily_returns import backfill_daily_returns, repair_price_gaps as repair_price_gaps_task
 
 router = APIRouter(prefix="/assets", tags=["Assets"])
 
@@ -41,22 +42,72 @@ async def get_asset_price(symbol: str):
     """
     return {"symbol": symbol, "price": await asset_repo.get_asset_price(symbol)}
 
+@router.get("/cache-stats")
+async def get_cache_stats():
+    """
+    Retorna os contadores (hits, misses, tamanho) do cache de preços em memória deste worker.
+
+    Returns:
+        dict: Estatísticas por camada de cache.
+    """
+    return asset_repo.get_cache_stats()
+
+@router.get("/market-data-stats")
+async def get_market_data_stats():
+    """
+    Retorna as métricas do rate limiter e do circuit breaker das chamadas ao provedor de preços.
+
+    Returns:
+        dict: Chamadas feitas, em fila, limitadas, rejeitadas e estado do circuit breaker.
+    """
+    return market_data_guard.metrics()
+
+@router.get("/search")
+async def search_assets(
+    q: str = Query(..., min_length=1),
+    exchange: str | None = Query(None),
+    is_etf: bool | None = Query(None),
+    limit: int = Query(20, ge=1, le=100)
+):
+    """
+    Busca ativos por prefixo do símbolo ou por palavras do nome, sem consultar preços.
+
+    Args:
+        q (str): Texto buscado.
+        exchange (str, optional): Filtra pela bolsa (ex.: NASDAQ, NYSE).
+        is_etf (bool, optional): Filtra ETFs.
+        limit (int): Máximo de resultados.
+
+    Returns:
+        list: Ativos encontrados, ordenados por relevância.
+    """
+    return await asset_repo.search_assets(q, exchange=exchange, is_etf=is_etf, limit=limit)
+
 @router.get("/list-yahoo")
 async def list_assets_endpoint(
     page: int = Query(1, ge=1),
     per_page: int = Query(100, ge=1, le=500),
-    with_price: bool = Query(True)
+    with_price: bool = Query(True),
+    exchange: str | None = Query(None),
+    is_etf: bool | None = Query(None),
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Lista os ativos disponíveis obtidos da fonte Yahoo Finance.
 
+    Args:
+        exchange (str, optional): Filtra pela bolsa.
+        is_etf (bool, optional): Filtra ETFs.
+
     Returns:
         list: Lista com informações básicas dos ativos.
 
     Author: Patrick Lima (patrickwsl)
     Date: 10th August 2025
     """
-    return await asset_repo.list_assets_from_yahoo(page=page, per_page=per_page, with_price=with_price)
+    return await asset_repo.list_assets_from_yahoo(
+        page=page, per_page=per_page, with_price=with_price, exchange=exchange, is_etf=is_etf, db=db
+    )
 
 
 @router.get("/list")
@@ -72,27 +123,81 @@ async def list_assets(db: AsyncSession = Depends(get_db)):
     """
     return await asset_repo.list_assets_from_db(db=db)
 
-@router.get("/script")
+@router.get("/script", status_code=202)
 async def populate_daily_returns():
-    """Script para preencher daily returns de todos os assets cadastrados no banco."""
-    async with SessionLocal() as session:
-        result = await session.execute(select(Asset.id, Asset.ticker))
-        assets = result.all()
+    """
+    Agenda o backfill de daily returns de todos os assets cadastrados no banco.
 
-        start = date(2025, 1, 1)
-        end = date.today()
+    O job roda no Celery, a partir do último fechamento gravado de cada ativo; o
+    progresso pode ser acompanhado em /assets/script/{job_id}.
 
-        for asset_id, ticker in assets:
-            data = yf.download(ticker, start=start, end=end)
+    Returns:
+        dict: Identificador do job.
+    """
+    job_id = uuid.uuid4().hex
+    await backfill_repo.set_backfill_progress(job_id, status="queued")
+    backfill_daily_returns.delay(job_id)
+    return {"status": "queued", "job_id": job_id}
+
+@router.get("/coverage")
+async def get_price_coverage(
+    start: date | None = Query(None),
+    end: date | None = Query(None),
+    db: AsyncSession = Depends(get_db),
+    user=Depends(require_role("admin"))
+):
+    """
+    Relatório de cobertura do histórico de preços: pregões esperados x gravados por ativo.
+
+    A janela é limitada a PRICE_GAP_LOOKBACK_DAYS dias: cada pregão do calendário vira
+    parâmetros da consulta, e janelas de décadas passariam do limite do driver.
 
-            for d, row in data.iterrows():
-                dr = DailyReturn(
-                    asset_id=asset_id,
-                    date=d.date(),
-                    close_price=row['Close']
-                )
-                session.add(dr)
+    Args:
+        start (date, optional): Início da janela (padrão: PRICE_GAP_LOOKBACK_DAYS atrás).
+        end (date, optional): Fim da janela, exclusivo (padrão: hoje).
+        db (AsyncSession): Sessão assíncrona do banco.
+        user: Usuário autenticado com role admin (inject).
+
+    Returns:
+        dict: Totais da janela e cobertura por ativo.
 
-        await session.commit()
+    Raises:
+        HTTPException: 400 se a janela for vazia ou maior que PRICE_GAP_LOOKBACK_DAYS dias.
+    """
+    end = end or date.today()
+    start = start or end - timedelta(days=PRICE_GAP_LOOKBACK_DAYS)
+    if start >= end:
+        raise HTTPException(status_code=400, detail="start deve ser anterior a end")
+    if (end - start).days > PRICE_GAP_LOOKBACK_DAYS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Janela maior que o limite de {PRICE_GAP_LOOKBACK_DAYS} dias",
+        )
+    return await price_gaps_repo.get_price_coverage(db, start, end)
+
+@router.post("/coverage/repair", status_code=202)
+async def repair_price_gaps(user=Depends(require_role("admin"))):
+    """
+    Agenda a busca dos pregões faltantes em daily_returns.
 
-    return {"status": "ok", "message": "Daily returns populados com sucesso"}
+    Returns:
+        dict: Identificador da task no Celery.
+    """
+    result = repair_price_gaps_task.delay()
+    return {"status": "queued", "task_id": result.id}
+
+@router.get("/script/{job_id}")
+async def get_populate_daily_returns_status(job_id: str):
+    """
+    Retorna o progresso de um job de backfill de daily returns.
+
+    Args:
+        job_id (str): Identificador devolvido por /assets/script.
+
+    Returns:
+        dict: Status, ativos processados/total, linhas gravadas e tickers sem dados.
+    """
+    progress = await backfill_repo.get_backfill_progress(job_id)
+    if progress is None:
+        raise HTTPException(status_code=404, detail="Job não encontrado")
+    return progress
@@ -3,7 +3,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.database import get_db
 from app.schemas.client import ClientCreate, ClientUpdate, ClientOut
 from app.models.client import Client
-from app.repositories import client as client_repo, finance
+from app.repositories import client as client_repo, daily_returns as dr_repo, finance
 from app.core.security import require_role, get_current_user
 
 router = APIRouter(prefix="/clients", tags=["clients"])
@@ -35,6 +35,27 @@ async def list_clients(
     return await client_repo.get_clients(db, skip, limit, search, status)
 
 
+@router.get("/captado")
+async def get_clients_captado(
+    month: int = Query(..., ge=1, le=12),
+    year: int = Query(...),
+    db: AsyncSession = Depends(get_db),
+    user=Depends(get_current_user)
+):
+    """
+    Retorna o captado de todos os clientes ativos nos períodos anual, semestral, mensal e semanal.
+
+    Mesmo payload enviado pelo WebSocket /ws/captado, calculado em lote.
+
+    Args:
+        month (int): Mês de referência.
+        year (int): Ano de referência.
+        db (AsyncSession): Sessão assíncrona do banco.
+        user: Usuário autenticado (inject).
+    """
+    return await dr_repo.get_captado_snapshot(db, year, month)
+
+
 @router.get("/{client_id}", response_model=ClientOut)
 async def get_client(client_id: int, db: AsyncSession = Depends(get_db), user=Depends(get_current_user)):
     """
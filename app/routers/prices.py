@@ -1,54 +1,136 @@
+import asyncio
+import csv
 import io
-from curl_cffi import AsyncSession
-from fastapi import APIRouter, Depends, Query
+import tempfile
+from typing import AsyncIterator, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 
 from fastapi.responses import StreamingResponse
-import pandas as pd
+from openpyxl import Workbook
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.security import get_current_user
 from app.database import get_db
-from app.repositories.allocations import get_by_client
-from app.repositories.finance import get_asset_metrics
+from app.repositories.finance import stream_allocation_metrics
 
 router = APIRouter(prefix="/prices", tags=["prices"])
 
+EXPORT_COLUMNS = [
+    "client_id",
+    "ticker",
+    "quantity",
+    "buy_price",
+    "total_invested",
+    "current_value",
+    "profit_loss",
+    "percentage_change",
+    "avg_daily_return",
+]
+
+
+async def _csv_chunks(db: AsyncSession, client_ids: Optional[list[int]], batch_size: int = 500):
+    """
+    Gera o CSV da exportação em blocos de `batch_size` linhas.
+
+    O cabeçalho sai antes da consulta, então o primeiro byte não depende do tamanho da
+    carteira; só um bloco fica em memória por vez.
+    """
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=EXPORT_COLUMNS)
+
+    def flush() -> str:
+        chunk = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        return chunk
+
+    writer.writeheader()
+    yield flush()
+    try:
+        pending = 0
+        async for row in stream_allocation_metrics(db, client_ids):
+            writer.writerow(row)
+            pending += 1
+            if pending >= batch_size:
+                yield flush()
+                pending = 0
+        if pending:
+            yield flush()
+    finally:
+        # A dependência get_db já saiu quando o corpo é enviado; a sessão é fechada aqui.
+        await db.close()
+
+
+def _new_xlsx() -> tuple[Workbook, object]:
+    # write_only: as linhas vão para um arquivo temporário do openpyxl, não para a memória
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("Sheet1")
+    sheet.append(EXPORT_COLUMNS)
+    return workbook, sheet
+
+
+def _append_xlsx_rows(sheet, rows: list[dict]) -> None:
+    for row in rows:
+        sheet.append([row[column] for column in EXPORT_COLUMNS])
+
+
+def _save_xlsx(workbook: Workbook):
+    spool = tempfile.TemporaryFile()
+    workbook.save(spool)
+    spool.seek(0)
+    return spool
+
+
+async def _build_xlsx(rows: AsyncIterator[dict], batch_size: int = 1000):
+    """
+    Monta o xlsx da exportação em um arquivo temporário, fora do event loop.
+
+    As linhas são lidas do banco em blocos de `batch_size`; a escrita de cada bloco e o
+    `save` final (compressão do zip) rodam em uma thread, então outras requisições do
+    worker seguem atendidas. O workbook usa o modo write-only do openpyxl (memória constante).
+
+    Returns:
+        Arquivo temporário posicionado no início, com o xlsx completo.
+    """
+    workbook, sheet = await asyncio.to_thread(_new_xlsx)
+    batch = []
+    async for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            await asyncio.to_thread(_append_xlsx_rows, sheet, batch)
+            batch = []
+    if batch:
+        await asyncio.to_thread(_append_xlsx_rows, sheet, batch)
+    return await asyncio.to_thread(_save_xlsx, workbook)
+
+
+async def _file_chunks(spool, chunk_size: int = 64 * 1024):
+    """Envia o arquivo temporário em blocos e o descarta ao final."""
+    try:
+        while chunk := await asyncio.to_thread(spool.read, chunk_size):
+            yield chunk
+    finally:
+        spool.close()
+
+
 @router.get("/export")
-async def export_data(client_id: int ,format: str = Query("csv", enum=["csv", "excel"]), db: AsyncSession = Depends(get_db)):
-    allocations = await get_by_client(db, client_id)
-    data = []
-    for alloc in allocations:
-        metrics = await get_asset_metrics(
-            db,
-            asset_id=alloc.asset_id,
-            buy_price=alloc.buy_price,
-            quantity=alloc.quantity
-        )
-        data.append({
-            "client_id": alloc.client_id,
-            "ticker": alloc.asset.ticker,
-            "quantity": alloc.quantity,
-            "buy_price": alloc.buy_price,
-            "total_invested": metrics["total_invested"],
-            "current_value": metrics["current_value"],
-            "profit_loss": metrics["profit_loss"],
-            "percentage_change": metrics["percentage_change"],
-            "avg_daily_return": metrics["avg_daily_return"],
-        })
-
-    df = pd.DataFrame(data)
+async def export_data(
+    client_id: Optional[list[int]] = Query(None, description="Clients to export (repeatable); all clients when omitted"),
+    format: str = Query("csv", enum=["csv", "excel"]),
+    db: AsyncSession = Depends(get_db),
+    user=Depends(get_current_user),
+):
+    # Exportar a carteira de todos os clientes (ou de vários de uma vez) é restrito a admins.
+    if (client_id is None or len(client_id) > 1) and user.role != "admin":
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not enough permissions")
 
     if format == "csv":
-        stream = io.StringIO()
-        df.to_csv(stream, index=False)
-        response = StreamingResponse(iter([stream.getvalue()]),
-                                     media_type="text/csv")
+        response = StreamingResponse(_csv_chunks(db, client_id), media_type="text/csv")
         response.headers["Content-Disposition"] = "attachment; filename=export.csv"
         return response
     else:
-        stream = io.BytesIO()
-        with pd.ExcelWriter(stream, engine='openpyxl') as writer:
-            df.to_excel(writer, index=False)
-        stream.seek(0)
-        response = StreamingResponse(stream,
+        spool = await _build_xlsx(stream_allocation_metrics(db, client_id))
+        response = StreamingResponse(_file_chunks(spool),
                                      media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
         response.headers["Content-Disposition"] = "attachment; filename=export.xlsx"
-        return response
\ No newline at end of file
+        return response
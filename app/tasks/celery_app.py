@@ -0,0 +1,51 @@
+from celery import Celery
+
+from app.core.config import (
+    CELERY_BROKER_URL,
+    CELERY_RESULT_BACKEND,
+    DAILY_RETURNS_PARTITION_INTERVAL,
+    HOT_PRICES_INTERVAL,
+    LISTED_SYMBOLS_REFRESH_INTERVAL,
+    PRICE_GAP_REPAIR_INTERVAL,
+    PRICE_PREWARM_LEAD,
+    SYMBOL_METADATA_REFRESH_INTERVAL,
+)
+
+celery_app = Celery(
+    "tasks",
+    broker=CELERY_BROKER_URL,
+    backend=CELERY_RESULT_BACKEND,
+    include=[
+        "app.tasks.daily_returns",
+        "app.tasks.prices",
+        "app.tasks.listed_symbols",
+        "app.tasks.symbol_metadata",
+    ],
+)
+
+celery_app.conf.beat_schedule = {
+    "prewarm-asset-prices": {
+        "task": "app.tasks.prices.prewarm_asset_prices",
+        "schedule": PRICE_PREWARM_LEAD,
+    },
+    "refresh-held-asset-prices": {
+        "task": "app.tasks.prices.refresh_held_asset_prices",
+        "schedule": HOT_PRICES_INTERVAL,
+    },
+    "refresh-listed-symbols": {
+        "task": "app.tasks.listed_symbols.refresh_listed_symbols",
+        "schedule": LISTED_SYMBOLS_REFRESH_INTERVAL,
+    },
+    "refresh-symbol-metadata": {
+        "task": "app.tasks.symbol_metadata.refresh_symbol_metadata",
+        "schedule": SYMBOL_METADATA_REFRESH_INTERVAL,
+    },
+    "repair-price-gaps": {
+        "task": "app.tasks.daily_returns.repair_price_gaps",
+        "schedule": PRICE_GAP_REPAIR_INTERVAL,
+    },
+    "ensure-daily-return-partitions": {
+        "task": "app.tasks.daily_returns.ensure_daily_return_partitions",
+        "schedule": DAILY_RETURNS_PARTITION_INTERVAL,
+    },
+}
@@ -1,28 +1,180 @@
-from celery import Celery
+import asyncio
+import logging
 from datetime import date, timedelta
-import yfinance as yf
-from app.models.daily_return import DailyReturn
-from app.database import SessionLocal
-from app.repositories import assets as assets_repo
+
+from celery import chord
+
+from app.core.cache import close_redis
+from app.core.config import (
+    DAILY_RETURNS_CHUNK_SIZE,
+    DAILY_RETURNS_MAX_RETRIES,
+    DAILY_RETURNS_PARTITIONS_AHEAD,
+)
+from app.core.rate_limit import market_data_guard
+from app.database import SessionLocal, engine
+from app.providers.prices import get_price_provider
+from app.repositories import assets as assets_repo, backfill as backfill_repo, daily_returns as dr_repo
+from app.repositories import price_gaps as price_gaps_repo
+from app.tasks.celery_app import celery_app
 
 async_session_maker= SessionLocal
-celery_app = Celery("tasks", broker="redis://redis:6379/0")
 
-@celery_app.task
-def fetch_and_store_daily_returns():
-    """Consulta preços de fechamento de ontem e salva no banco."""
-    yesterday = date.today() - timedelta(days=1)
+logger = logging.getLogger(__name__)
+
+
+def _chunks(items: list, size: int) -> list[list]:
+    return [items[start:start + size] for start in range(0, len(items), size)]
+
+
+@celery_app.task(name="app.tasks.daily_returns.fetch_and_store_daily_returns")
+def fetch_and_store_daily_returns(day: str = None):
+    """
+    Consulta preços de fechamento de ontem e salva no banco.
+
+    Divide os ativos em blocos de DAILY_RETURNS_CHUNK_SIZE tickers, processados em paralelo
+    por `store_daily_returns_chunk` (chord); `summarize_daily_returns` consolida a cobertura.
+    """
+    day = day or (date.today() - timedelta(days=1)).isoformat()
 
     async def _run():
-        async with async_session_maker() as session:
-            assets = await assets_repo.list_assets_from_db(session)
-            for asset in assets:
-                data = yf.Ticker(asset.ticker).history(start=yesterday, end=date.today())
-                if not data.empty:
-                    close_price = data["Close"].iloc[0]
-                    dr = DailyReturn(asset_id=asset.id, date=yesterday, close_price=close_price)
-                    session.add(dr)
-            await session.commit()
-
-    import asyncio
-    asyncio.run(_run())
+        try:
+            async with async_session_maker() as session:
+                assets = await assets_repo.list_assets_from_db(session)
+                return [[asset.id, asset.ticker] for asset in assets]
+        finally:
+            await close_redis()
+            await engine.dispose()
+
+    assets = asyncio.run(_run())
+    header = [store_daily_returns_chunk.s(chunk, day) for chunk in _chunks(assets, DAILY_RETURNS_CHUNK_SIZE)]
+    if not header:
+        return summarize_daily_returns([], 0, day)
+    result = chord(header)(summarize_daily_returns.s(len(assets), day))
+    return {"date": day, "chunks": len(header), "chord_id": result.id}
+
+
+@celery_app.task(
+    bind=True,
+    name="app.tasks.daily_returns.store_daily_returns_chunk",
+    max_retries=DAILY_RETURNS_MAX_RETRIES,
+)
+def store_daily_returns_chunk(self, assets: list[list], day: str):
+    """
+    Busca o fechamento do dia de um bloco de ativos em uma chamada e grava com upsert em lote.
+
+    Falhas do provedor (ou do banco) reagendam o bloco com backoff exponencial. Esgotadas as
+    tentativas, o bloco devolve um resultado de falha em vez de levantar a exceção, para que
+    o callback do chord (`summarize_daily_returns`) rode e reporte os tickers que falharam.
+
+    Args:
+        assets (list[list]): Pares [asset_id, ticker].
+        day (str): Dia do fechamento (ISO).
+
+    Returns:
+        dict: Quantidade de ativos pedidos, gravados, tickers sem dados e tickers com falha.
+    """
+    target = date.fromisoformat(day)
+
+    async def _run():
+        try:
+            provider = get_price_provider()
+            tickers = sorted({ticker for _, ticker in assets})
+            history = await market_data_guard.call(
+                provider.bulk_history, tickers, target, target + timedelta(days=1)
+            )
+            rows, missing = [], []
+            for asset_id, ticker in assets:
+                closes = history.get(ticker)
+                if closes is None or closes.empty:
+                    missing.append(ticker)
+                    continue
+                rows.append({"asset_id": asset_id, "date": target, "close_price": float(closes.iloc[-1])})
+            async with async_session_maker() as session:
+                await dr_repo.upsert_daily_returns(session, rows)
+                await session.commit()
+            return {"requested": len(assets), "stored": len(rows), "missing": missing, "failed": []}
+        finally:
+            await close_redis()
+            await engine.dispose()
+
+    try:
+        return asyncio.run(_run())
+    except Exception as e:
+        if self.request.retries >= self.max_retries:
+            tickers = [ticker for _, ticker in assets]
+            logger.error("daily returns %s: bloco %s falhou após %s tentativas: %s", day, tickers, self.max_retries, e)
+            return {"requested": len(assets), "stored": 0, "missing": [], "failed": tickers, "error": str(e)}
+        countdown = min(2 ** self.request.retries * 30, 900)
+        raise self.retry(exc=e, countdown=countdown)
+
+
+@celery_app.task(name="app.tasks.daily_returns.summarize_daily_returns")
+def summarize_daily_returns(results: list[dict], total: int, day: str):
+    """
+    Consolida os blocos do dia e reporta a cobertura (ativos com fechamento / ativos),
+    incluindo os tickers dos blocos que falharam após todas as tentativas.
+    """
+    stored = sum(result["stored"] for result in results)
+    missing = [ticker for result in results for ticker in result["missing"]]
+    failed = [ticker for result in results for ticker in result.get("failed", [])]
+    coverage = round(stored / total, 4) if total else 1.0
+    logger.info("daily returns %s: %s/%s ativos (cobertura %.2f%%)", day, stored, total, coverage * 100)
+    if missing:
+        logger.warning("daily returns %s sem dados para %s tickers: %s", day, len(missing), missing[:50])
+    if failed:
+        logger.error("daily returns %s: %s tickers em blocos com falha: %s", day, len(failed), failed[:50])
+    return {
+        "date": day,
+        "total": total,
+        "stored": stored,
+        "coverage": coverage,
+        "missing": missing,
+        "failed": failed,
+    }
+
+
+@celery_app.task(name="app.tasks.daily_returns.backfill_daily_returns")
+def backfill_daily_returns(job_id: str):
+    """Preenche o histórico de fechamentos de todos os ativos, publicando o progresso no Redis."""
+
+    async def _run():
+        try:
+            async with async_session_maker() as session:
+                return await backfill_repo.backfill_daily_returns(session, job_id=job_id)
+        except Exception as e:
+            await backfill_repo.set_backfill_progress(job_id, status="failed", error=str(e))
+            raise
+        finally:
+            await close_redis()
+            await engine.dispose()
+
+    return asyncio.run(_run())
+
+
+@celery_app.task(name="app.tasks.daily_returns.repair_price_gaps")
+def repair_price_gaps():
+    """Detecta pregões sem fechamento em daily_returns e busca só os intervalos faltantes."""
+
+    async def _run():
+        try:
+            async with async_session_maker() as session:
+                return await price_gaps_repo.repair_price_gaps(session)
+        finally:
+            await close_redis()
+            await engine.dispose()
+
+    return asyncio.run(_run())
+
+
+@celery_app.task(name="app.tasks.daily_returns.ensure_daily_return_partitions")
+def ensure_daily_return_partitions():
+    """Cria com antecedência as partições anuais de daily_returns (PostgreSQL)."""
+
+    async def _run():
+        try:
+            async with async_session_maker() as session:
+                return await dr_repo.ensure_daily_return_partitions(session, DAILY_RETURNS_PARTITIONS_AHEAD)
+        finally:
+            await engine.dispose()
+
+    return {"years": asyncio.run(_run())}
@@ -0,0 +1,37 @@
+import asyncio
+
+from app.core.cache import close_redis
+from app.core.config import LISTED_SYMBOLS_REFRESH_INTERVAL
+from app.database import SessionLocal, engine
+from app.repositories import assets as assets_repo
+from app.repositories import listed_symbols as listed_symbols_repo
+from app.tasks.celery_app import celery_app
+
+
+@celery_app.task(name="app.tasks.listed_symbols.refresh_listed_symbols")
+def refresh_listed_symbols():
+    """
+    Baixa o diretório NASDAQ/otherlisted, grava na tabela listed_symbols só o que mudou e
+    republica no Redis o universo lido da tabela.
+
+    Os workers da API veem a versão nova e recarregam o universo (e o índice de busca) do
+    Redis, sem baixar os CSVs no caminho da requisição.
+    """
+
+    df = assets_repo.fetch_all_tickers_df()
+
+    async def _run():
+        try:
+            async with SessionLocal() as session:
+                stats = await listed_symbols_repo.sync_listed_symbols(session, df)
+                universe = await listed_symbols_repo.load_listed_symbols_df(session)
+            if not universe.empty:
+                # Vale até bem depois da próxima execução, para nunca expirar entre duas cargas.
+                ttl = max(assets_repo.TICKERS_CACHE_TTL, 2 * LISTED_SYMBOLS_REFRESH_INTERVAL)
+                stats["version"] = await assets_repo.publish_tickers_df(universe, ttl)
+            return stats
+        finally:
+            await close_redis()
+            await engine.dispose()
+
+    return asyncio.run(_run())
@@ -0,0 +1,37 @@
+import asyncio
+
+from app.core.cache import close_redis
+from app.database import SessionLocal, engine
+from app.repositories import assets as assets_repo
+from app.tasks.celery_app import celery_app
+
+
+@celery_app.task(name="app.tasks.prices.prewarm_asset_prices")
+def prewarm_asset_prices():
+    """Atualiza os preços em cache das bolsas que estão prestes a abrir."""
+
+    async def _run():
+        try:
+            return await assets_repo.prewarm_asset_prices()
+        finally:
+            await close_redis()
+            await engine.dispose()
+
+    symbols = asyncio.run(_run())
+    return {"prewarmed": len(symbols)}
+
+
+@celery_app.task(name="app.tasks.prices.refresh_held_asset_prices")
+def refresh_held_asset_prices():
+    """Atualiza no Redis os preços dos tickers com alocações ativas antes que vençam."""
+
+    async def _run():
+        try:
+            async with SessionLocal() as session:
+                return await assets_repo.refresh_held_asset_prices(session)
+        finally:
+            await close_redis()
+            await engine.dispose()
+
+    symbols = asyncio.run(_run())
+    return {"refreshed": len(symbols)}
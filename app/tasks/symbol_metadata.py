@@ -0,0 +1,21 @@
+import asyncio
+
+from app.core.cache import close_redis
+from app.database import SessionLocal, engine
+from app.repositories import symbol_metadata as symbol_metadata_repo
+from app.tasks.celery_app import celery_app
+
+
+@celery_app.task(name="app.tasks.symbol_metadata.refresh_symbol_metadata")
+def refresh_symbol_metadata():
+    """Atualiza em lotes a moeda/bolsa/tipo dos símbolos gravados há mais de uma semana."""
+
+    async def _run():
+        try:
+            async with SessionLocal() as session:
+                return await symbol_metadata_repo.refresh_stale_symbol_metadata(session)
+        finally:
+            await close_redis()
+            await engine.dispose()
+
+    return {"refreshed": asyncio.run(_run())}
@@ -1,4 +1,6 @@
+import time
 import uuid
+import pytest
 import pytest_asyncio
 from httpx import AsyncClient, ASGITransport
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
@@ -51,4 +53,105 @@ async def client(db_session):
         })
         token = resp.json()["access_token"]
         ac.headers.update({"Authorization": f"Bearer {token}"})
-        yield ac
\ No newline at end of file
+        yield ac
+
+
+class FakeRedis:
+    """Redis assíncrono em memória para os testes do cache de preços."""
+
+    def __init__(self):
+        self.store = {}
+        self.expires = {}
+        self.published = []
+
+    def _alive(self, key):
+        expires_at = self.expires.get(key)
+        if expires_at is not None and expires_at <= time.monotonic():
+            self.store.pop(key, None)
+            self.expires.pop(key, None)
+        return key in self.store
+
+    async def get(self, key):
+        return self.store.get(key) if self._alive(key) else None
+
+    async def mget(self, keys):
+        return [await self.get(key) for key in keys]
+
+    async def set(self, key, value, ex=None, nx=False):
+        if nx and self._alive(key):
+            return None
+        self.store[key] = value if isinstance(value, bytes) else str(value).encode()
+        self.expires.pop(key, None)
+        if ex is not None:
+            self.expires[key] = time.monotonic() + ex
+        return True
+
+    async def setex(self, key, ttl, value):
+        return await self.set(key, value, ex=ttl)
+
+    async def delete(self, *keys):
+        removed = 0
+        for key in keys:
+            removed += self.store.pop(key, None) is not None
+            self.expires.pop(key, None)
+        return removed
+
+    async def eval(self, script, numkeys, *args):
+        # Único script usado nos testes: compare-and-delete dos locks.
+        key, token = args[0], args[1]
+        if await self.get(key) == str(token).encode():
+            return await self.delete(key)
+        return 0
+
+    async def scan_iter(self, match=None, count=None):
+        import fnmatch
+        for key in list(self.store):
+            if self._alive(key) and (match is None or fnmatch.fnmatch(key, match)):
+                yield key.encode()
+
+    async def publish(self, channel, message):
+        self.published.append((channel, message))
+        return 0
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+
+class FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.calls = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def __getattr__(self, name):
+        def queue(*args, **kwargs):
+            self.calls.append((name, args, kwargs))
+            return self
+        return queue
+
+    async def execute(self):
+        calls, self.calls = self.calls, []
+        return [await getattr(self.redis, name)(*args, **kwargs) for name, args, kwargs in calls]
+
+
+@pytest.fixture
+def fake_redis(monkeypatch):
+    from app.core.rate_limit import TokenBucket, market_data_guard
+    from app.repositories import assets as assets_repo
+
+    redis = FakeRedis()
+    monkeypatch.setattr(assets_repo, "get_redis", lambda: redis)
+    monkeypatch.setattr(market_data_guard, "redis_bucket", None)
+    monkeypatch.setattr(market_data_guard, "local_bucket", TokenBucket(rate=1000, capacity=1000))
+    market_data_guard.reset()
+    monkeypatch.setattr(
+        assets_repo, "_tickers_memo", {"df": None, "index": None, "version": None, "loaded_at": 0.0, "checked_at": 0.0}
+    )
+    assets_repo._price_memory.clear()
+    assets_repo._currency_memory.clear()
+    return redis
@@ -44,3 +44,299 @@ async def test_list_assets_db(client):
         assert isinstance(first["ticker"], str)
         assert isinstance(first["id"], int)
         assert isinstance(first["name"], str)
+
+async def test_get_asset_prices_batches_cache_misses(fake_redis, monkeypatch):
+    from unittest.mock import MagicMock
+    from app.repositories import assets as assets_repo
+
+    await fake_redis.set("asset_price:AAA", assets_repo._encode_price(10.5, soft_ttl=60))
+    download = MagicMock(return_value={"BBB": 20.0})
+    monkeypatch.setattr(assets_repo, "_download_last_prices", download)
+
+    prices = await assets_repo.get_asset_prices(["AAA", "BBB", "AAA", "CCC"])
+
+    assert prices == {"AAA": 10.5, "BBB": 20.0}
+    download.assert_called_once_with(["BBB", "CCC"])
+    assert assets_repo._decode_price(await fake_redis.get("asset_price:BBB"))[0] == 20.0
+
+
+async def test_event_loop_stays_responsive_during_price_lookups(fake_redis, monkeypatch):
+    import asyncio
+    import gc
+    import threading
+    import time
+    from app.core.config import YAHOO_MAX_WORKERS
+    from app.repositories import assets as assets_repo
+
+    in_flight = 0
+    max_in_flight = 0
+    lock = threading.Lock()
+
+    def slow_download(symbols):
+        nonlocal in_flight, max_in_flight
+        with lock:
+            in_flight += 1
+            max_in_flight = max(max_in_flight, in_flight)
+        time.sleep(0.02)
+        with lock:
+            in_flight -= 1
+        return {symbol: 1.0 for symbol in symbols}
+
+    monkeypatch.setattr(assets_repo, "_download_last_prices", slow_download)
+
+    # Evita que uma coleta do GC sobre o heap do pytest seja medida como atraso do loop.
+    gc.collect()
+    lookups = asyncio.gather(*(assets_repo.get_asset_price(f"SYM{i}") for i in range(100)))
+
+    max_lag = 0.0
+    while not lookups.done():
+        started = time.perf_counter()
+        await asyncio.sleep(0.005)
+        max_lag = max(max_lag, time.perf_counter() - started - 0.005)
+
+    assert await lookups == [1.0] * 100
+    # Se as chamadas bloqueassem o loop o atraso seria de ~2s (100 x 20ms).
+    assert max_lag < 0.1
+    assert max_in_flight <= YAHOO_MAX_WORKERS
+
+
+async def test_concurrent_misses_trigger_a_single_fetch(fake_redis, monkeypatch):
+    import asyncio
+    import time
+    from unittest.mock import MagicMock
+    from app.repositories import assets as assets_repo
+
+    def slow_download(symbols):
+        time.sleep(0.05)
+        return {symbol: 42.0 for symbol in symbols}
+
+    download = MagicMock(side_effect=slow_download)
+    monkeypatch.setattr(assets_repo, "_download_last_prices", download)
+
+    prices = await asyncio.gather(*(assets_repo.get_asset_price("AAA") for _ in range(20)))
+
+    assert prices == [42.0] * 20
+    download.assert_called_once_with(["AAA"])
+    assert await fake_redis.get("lock:asset_price:AAA") is None
+
+
+async def test_waits_for_price_fetched_by_another_worker(fake_redis, monkeypatch):
+    import asyncio
+    from unittest.mock import MagicMock
+    from app.repositories import assets as assets_repo
+
+    download = MagicMock(return_value={"AAA": 1.0})
+    monkeypatch.setattr(assets_repo, "_download_last_prices", download)
+    await fake_redis.set("lock:asset_price:AAA", "other-worker", ex=30)
+
+    async def other_worker_publishes():
+        await asyncio.sleep(0.05)
+        await fake_redis.setex("asset_price:AAA", 3600, 99.0)
+
+    price, _ = await asyncio.gather(assets_repo.get_asset_price("AAA"), other_worker_publishes())
+
+    assert price == 99.0
+    download.assert_not_called()
+
+
+async def test_memory_tier_serves_hot_prices_without_redis(fake_redis, monkeypatch):
+    from unittest.mock import AsyncMock
+    from app.repositories import assets as assets_repo
+
+    await fake_redis.set("asset_price:AAA", assets_repo._encode_price(10.0, soft_ttl=60))
+    mget = AsyncMock(wraps=fake_redis.mget)
+    monkeypatch.setattr(fake_redis, "mget", mget)
+
+    assert await assets_repo.get_asset_price("AAA") == 10.0
+    assert await assets_repo.get_asset_price("AAA") == 10.0
+    assert mget.await_count == 1
+    assert assets_repo.get_cache_stats()["prices"]["hits"] == 1
+
+    await fake_redis.set("asset_price:AAA", assets_repo._encode_price(11.0, soft_ttl=60))
+    assets_repo.invalidate_asset_prices(["AAA"])
+    assert await assets_repo.get_asset_price("AAA") == 11.0
+    assert mget.await_count == 2
+
+
+async def test_ttl_cache_evicts_and_expires():
+    from app.core.lru import TTLCache
+
+    now = [0.0]
+    cache = TTLCache(maxsize=2, ttl=10, timer=lambda: now[0])
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    now[0] = 11
+    assert cache.get("c") is None
+    assert cache.stats()["evictions"] == 1
+    assert cache.stats()["expirations"] == 1
+
+
+async def test_stale_price_is_served_and_refreshed_in_background(fake_redis, monkeypatch):
+    import asyncio
+    from unittest.mock import MagicMock
+    from app.repositories import assets as assets_repo
+
+    refreshed = asyncio.Event()
+
+    def download(symbols):
+        refreshed.set()
+        return {"AAA": 12.0}
+
+    monkeypatch.setattr(assets_repo, "_download_last_prices", MagicMock(side_effect=download))
+    await fake_redis.set("asset_price:AAA", assets_repo._encode_price(10.0, soft_ttl=-1))
+
+    assert await assets_repo.get_asset_price("AAA") == 10.0
+    await asyncio.wait_for(refreshed.wait(), timeout=1)
+    await asyncio.gather(*assets_repo._background_refreshes)
+
+    assert assets_repo._decode_price(await fake_redis.get("asset_price:AAA"))[0] == 12.0
+    assert await assets_repo.get_asset_price("AAA") == 12.0
+
+
+async def test_stale_price_survives_yahoo_failure(fake_redis, monkeypatch):
+    import asyncio
+    from unittest.mock import MagicMock
+    from app.repositories import assets as assets_repo
+
+    monkeypatch.setattr(assets_repo, "_download_last_prices", MagicMock(side_effect=RuntimeError("429")))
+    await fake_redis.set("asset_price:AAA", assets_repo._encode_price(10.0, soft_ttl=-1))
+
+    assert await assets_repo.get_asset_price("AAA") == 10.0
+    await asyncio.gather(*assets_repo._background_refreshes)
+    assert await assets_repo.get_asset_price("AAA") == 10.0
+
+    with pytest.raises(ValueError):
+        await assets_repo.get_asset_price("ZZZ")
+
+
+async def test_open_breaker_falls_back_to_last_known_price(fake_redis, monkeypatch):
+    from unittest.mock import MagicMock
+    from app.core.rate_limit import market_data_guard
+    from app.repositories import assets as assets_repo
+
+    monkeypatch.setattr(assets_repo, "_download_last_prices", MagicMock(return_value={"AAA": 10.0}))
+    assert await assets_repo.get_asset_price("AAA") == 10.0
+
+    # Cache expirado e provedor indisponível: o circuito abre e o último preço conhecido é usado.
+    await fake_redis.delete("asset_price:AAA")
+    assets_repo._price_memory.clear()
+    failing = MagicMock(side_effect=RuntimeError("429"))
+    monkeypatch.setattr(assets_repo, "_download_last_prices", failing)
+    monkeypatch.setattr(market_data_guard.breaker, "min_calls", 1)
+
+    assert await assets_repo.get_asset_price("AAA") == 10.0
+    assert market_data_guard.breaker.state == "open"
+    assert await assets_repo.get_asset_price("AAA") == 10.0
+    assert failing.call_count == 1
+    assert market_data_guard.metrics()["rejected"] == 1
+
+
+async def test_ticker_universe_is_memoized_per_worker(fake_redis, monkeypatch):
+    import pandas as pd
+    from unittest.mock import MagicMock
+    from app.repositories import assets as assets_repo
+
+    universe = pd.DataFrame({
+        "symbol": ["AAA", "BBB", "CCC"],
+        "name": ["A Inc", "B Inc", "C Inc"],
+        "exchange": ["NASDAQ", "NYSE", "NYSE"],
+        "is_etf": [False, False, True],
+    })
+    fetch = MagicMock(return_value=universe)
+    monkeypatch.setattr(assets_repo, "fetch_all_tickers_df", fetch)
+    read_parquet = MagicMock(wraps=pd.read_parquet)
+    monkeypatch.setattr(assets_repo.pd, "read_parquet", read_parquet)
+    monkeypatch.setattr(assets_repo, "TICKERS_VERSION_CHECK_INTERVAL", 0)
+
+    first = await assets_repo._get_all_tickers_cached()
+    second = await assets_repo._get_all_tickers_cached()
+    assert first is second
+    assert fetch.call_count == 1
+    assert read_parquet.call_count == 0
+
+    # Outro processo publicou um universo novo: a versão muda e a cópia local é recarregada.
+    await fake_redis.set(assets_repo.TICKERS_VERSION_KEY, "outra-versao")
+    reloaded = await assets_repo._get_all_tickers_cached()
+    assert reloaded is not first
+    assert read_parquet.call_count == 1
+    assert list(reloaded["symbol"]) == ["AAA", "BBB", "CCC"]
+
+    page = await assets_repo.list_assets_from_yahoo(page=2, per_page=2, with_price=False)
+    assert [item["symbol"] for item in page["items"]] == ["CCC"]
+    assert page["total_pages"] == 2
+
+
+async def test_search_index_is_rebuilt_with_the_universe(fake_redis, monkeypatch):
+    import pandas as pd
+    from unittest.mock import MagicMock
+    from app.repositories import assets as assets_repo
+
+    def universe(symbols):
+        return pd.DataFrame({
+            "symbol": symbols,
+            "name": [f"{s} Corp" for s in symbols],
+            "exchange": ["NASDAQ"] * len(symbols),
+            "is_etf": [False] * len(symbols),
+        })
+
+    monkeypatch.setattr(assets_repo, "fetch_all_tickers_df", MagicMock(return_value=universe(["AAPL"])))
+    monkeypatch.setattr(assets_repo, "TICKERS_VERSION_CHECK_INTERVAL", 0)
+    assert [r["symbol"] for r in await assets_repo.search_assets("aa")] == ["AAPL"]
+
+    await fake_redis.delete(assets_repo.TICKERS_CACHE_KEY)
+    await fake_redis.set(assets_repo.TICKERS_VERSION_KEY, "nova")
+    monkeypatch.setattr(assets_repo, "fetch_all_tickers_df", MagicMock(return_value=universe(["AAPL", "AAON"])))
+    assert [r["symbol"] for r in await assets_repo.search_assets("aa")] == ["AAON", "AAPL"]
+
+
+async def test_prewarm_refreshes_only_markets_about_to_open(fake_redis, monkeypatch):
+    from unittest.mock import AsyncMock
+    from app.repositories import assets as assets_repo
+
+    monkeypatch.setitem(assets_repo._symbol_exchanges, "AAPL", "NASDAQ")
+    monkeypatch.setattr(assets_repo, "opens_within", lambda exchange, seconds: exchange == "B3")
+    refresh = AsyncMock(return_value={})
+    monkeypatch.setattr(assets_repo, "refresh_asset_prices", refresh)
+    await fake_redis.set("asset_price:AAPL", assets_repo._encode_price(200.0, soft_ttl=60))
+    await fake_redis.set("asset_price:PETR4.SA", assets_repo._encode_price(30.0, soft_ttl=60))
+
+    assert await assets_repo.prewarm_asset_prices(600) == ["PETR4.SA"]
+    refresh.assert_awaited_once_with(["PETR4.SA"])
+
+
+async def test_hot_set_refreshes_held_tickers_about_to_go_stale(fake_redis, db_session, monkeypatch):
+    from datetime import date
+    from unittest.mock import AsyncMock
+    from app.models.allocation import Allocation
+    from app.models.asset import Asset
+    from app.models.client import Client
+    from app.repositories import assets as assets_repo
+
+    holder = Client(name="Hot Set Client", email="hotset@example.com")
+    fresh, stale, missing, sold = (Asset(ticker=t, name=t) for t in ("HOT1", "HOT2", "HOT3", "HOT4"))
+    db_session.add_all([holder, fresh, stale, missing, sold])
+    await db_session.flush()
+    for asset in (fresh, stale, missing, sold):
+        db_session.add(Allocation(
+            client_id=holder.id, asset_id=asset.id, quantity=1, buy_price=1,
+            buy_date=date.today(), is_active=asset is not sold,
+        ))
+    await db_session.commit()
+
+    await fake_redis.set("asset_price:HOT1", assets_repo._encode_price(1.0, soft_ttl=3600))
+    await fake_redis.set("asset_price:HOT2", assets_repo._encode_price(1.0, soft_ttl=30))
+    refresh = AsyncMock(return_value={})
+    monkeypatch.setattr(assets_repo, "refresh_asset_prices", refresh)
+
+    def hot(tickers):
+        return [t for t in tickers if t.startswith("HOT")]
+
+    assert hot(await assets_repo.list_held_tickers(db_session)) == ["HOT1", "HOT2", "HOT3"]
+    assert hot(await assets_repo.refresh_held_asset_prices(db_session, interval=60)) == ["HOT2", "HOT3"]
+    refresh.assert_awaited_once()
+    assert hot(refresh.await_args.args[0]) == ["HOT2", "HOT3"]
@@ -0,0 +1,68 @@
+from datetime import date
+from unittest.mock import MagicMock
+
+import pytest
+
+from app.models.asset import Asset
+from app.providers.prices import SyntheticProvider
+from app.repositories import backfill as backfill_repo
+from app.repositories import daily_returns as dr_repo
+
+pytestmark = pytest.mark.asyncio
+
+
+@pytest.fixture
+def provider(fake_redis, monkeypatch):
+    monkeypatch.setattr(backfill_repo, "get_redis", lambda: fake_redis)
+    synthetic = SyntheticProvider(seed=7)
+    spy = MagicMock(wraps=synthetic.bulk_history)
+    monkeypatch.setattr(synthetic, "bulk_history", spy)
+    monkeypatch.setattr(backfill_repo, "get_price_provider", lambda: synthetic)
+    return spy
+
+
+async def test_backfill_resumes_from_last_stored_date(db_session, provider):
+    fresh = Asset(ticker="BKFA", name="Backfill A")
+    resumed = Asset(ticker="BKFB", name="Backfill B")
+    db_session.add_all([fresh, resumed])
+    await db_session.commit()
+    await dr_repo.upsert_daily_returns(db_session, [
+        {"asset_id": resumed.id, "date": date(2025, 1, 15), "close_price": 1.0},
+    ])
+    await db_session.commit()
+
+    summary = await backfill_repo.backfill_daily_returns(
+        db_session, job_id="job-1", end=date(2025, 2, 1), chunk_size=500, default_start=date(2025, 1, 1)
+    )
+
+    fresh_dates = [r.date for r in await dr_repo.get_by_asset(db_session, fresh.id)]
+    resumed_rows = await dr_repo.get_by_asset(db_session, resumed.id)
+    assert fresh_dates[0] == date(2025, 1, 1) and fresh_dates[-1] == date(2025, 1, 31)
+    assert resumed_rows[0].close_price == 1.0
+    assert min(r.date for r in resumed_rows[1:]) == date(2025, 1, 16)
+    assert provider.call_count == 1
+
+    progress = await backfill_repo.get_backfill_progress("job-1")
+    assert progress["status"] == "finished"
+    assert progress["done"] == progress["total"] == summary["assets"]
+    assert progress["rows"] == summary["rows"]
+
+    again = await backfill_repo.backfill_daily_returns(
+        db_session, end=date(2025, 2, 1), default_start=date(2025, 1, 1)
+    )
+    assert again["rows"] == 0
+
+
+async def test_script_enqueues_job_and_reports_progress(client, fake_redis, monkeypatch):
+    monkeypatch.setattr(backfill_repo, "get_redis", lambda: fake_redis)
+    delay = MagicMock()
+    monkeypatch.setattr("app.routers.assets.backfill_daily_returns.delay", delay)
+
+    resp = await client.get("/assets/script")
+    assert resp.status_code == 202
+    job_id = resp.json()["job_id"]
+    delay.assert_called_once_with(job_id)
+
+    status = await client.get(f"/assets/script/{job_id}")
+    assert status.json()["status"] == "queued"
+    assert (await client.get("/assets/script/desconhecido")).status_code == 404
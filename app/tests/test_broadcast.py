@@ -0,0 +1,84 @@
+import asyncio
+import json
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from app.core.broadcast import CaptadoHub
+
+pytestmark = pytest.mark.asyncio
+
+
+class FakeWebSocket:
+    def __init__(self, fail=False):
+        self.sent = []
+        self.fail = fail
+
+    async def send_text(self, payload):
+        if self.fail:
+            raise RuntimeError("socket fechado")
+        self.sent.append(payload)
+
+
+@pytest.fixture
+def snapshot_mock(monkeypatch):
+    session = MagicMock()
+    session.__aenter__ = AsyncMock(return_value=session)
+    session.__aexit__ = AsyncMock(return_value=None)
+    monkeypatch.setattr("app.core.broadcast.SessionLocal", lambda: session)
+
+    async def fake_snapshot(session, year, month):
+        return [{"client_name": "Cliente", "year": year, "month": month}]
+
+    mock = AsyncMock(side_effect=fake_snapshot)
+    monkeypatch.setattr("app.core.broadcast.dr_repo.get_captado_snapshot", mock)
+    return mock
+
+
+async def _settle():
+    await asyncio.sleep(0.05)
+
+
+async def test_one_snapshot_per_subscription_key(snapshot_mock):
+    hub = CaptadoHub(interval=60)
+    same_key = [FakeWebSocket() for _ in range(3)]
+    other_key = FakeWebSocket()
+
+    for ws in same_key:
+        await hub.subscribe(ws, 8, 2025)
+    await hub.subscribe(other_key, 7, 2025)
+    await _settle()
+
+    assert snapshot_mock.await_count == 2
+    payloads = {ws.sent[0] for ws in same_key}
+    assert len(payloads) == 1
+    assert json.loads(payloads.pop())[0]["month"] == 8
+    assert json.loads(other_key.sent[0])[0]["month"] == 7
+
+    await hub.shutdown()
+
+
+async def test_late_subscriber_gets_last_payload(snapshot_mock):
+    hub = CaptadoHub(interval=60)
+    first, late = FakeWebSocket(), FakeWebSocket()
+
+    await hub.subscribe(first, 8, 2025)
+    await _settle()
+    await hub.subscribe(late, 8, 2025)
+
+    assert late.sent == first.sent
+    assert snapshot_mock.await_count == 1
+
+    await hub.shutdown()
+
+
+async def test_failed_socket_is_dropped_and_loop_stops(snapshot_mock):
+    hub = CaptadoHub(interval=60)
+    broken = FakeWebSocket(fail=True)
+
+    await hub.subscribe(broken, 8, 2025)
+    await _settle()
+
+    assert hub.subscriber_count() == 0
+    assert not hub._tasks
+
+    await hub.shutdown()
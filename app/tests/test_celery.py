@@ -1,19 +1,32 @@
 import pandas as pd
+import pytest
+from datetime import date
 from unittest.mock import AsyncMock, MagicMock
-from app.tasks.daily_returns import fetch_and_store_daily_returns
+from app.tasks.celery_app import celery_app
+from app.tasks.daily_returns import (
+    fetch_and_store_daily_returns,
+    store_daily_returns_chunk,
+    summarize_daily_returns,
+)
 
-def test_fetch_and_store_daily_returns(monkeypatch):
-    df = pd.DataFrame({"Close": [150.0]})
-    mock_ticker = MagicMock()
-    mock_ticker.history.return_value = df
-    monkeypatch.setattr("app.tasks.daily_returns.yf.Ticker", lambda symbol: mock_ticker)
 
-    fake_asset = MagicMock()
-    fake_asset.id = 1
-    fake_asset.ticker = "AAPL"
+@pytest.fixture
+def eager(monkeypatch):
+    monkeypatch.setattr(celery_app.conf, "task_always_eager", True)
+    monkeypatch.setattr(celery_app.conf, "task_eager_propagates", True)
+
+
+@pytest.fixture
+def task_env(monkeypatch):
+    assets = []
+    for asset_id, ticker in enumerate(["AAPL", "MSFT", "NOPE"], start=1):
+        asset = MagicMock()
+        asset.id = asset_id
+        asset.ticker = ticker
+        assets.append(asset)
     monkeypatch.setattr(
         "app.tasks.daily_returns.assets_repo.list_assets_from_db",
-        AsyncMock(return_value=[fake_asset])
+        AsyncMock(return_value=assets)
     )
 
     mock_session = AsyncMock()
@@ -21,8 +34,82 @@ def test_fetch_and_store_daily_returns(monkeypatch):
     mock_session.__aexit__.return_value = None
     monkeypatch.setattr("app.tasks.daily_returns.async_session_maker", lambda: mock_session)
 
-    fetch_and_store_daily_returns()
+    upsert = AsyncMock(side_effect=lambda session, rows: len(rows))
+    monkeypatch.setattr("app.tasks.daily_returns.dr_repo.upsert_daily_returns", upsert)
+    monkeypatch.setattr("app.tasks.daily_returns.DAILY_RETURNS_CHUNK_SIZE", 2)
+    monkeypatch.setattr("app.tasks.daily_returns.close_redis", AsyncMock())
+    monkeypatch.setattr("app.core.rate_limit.market_data_guard.redis_bucket", None)
+
+    mock_provider = MagicMock()
+    mock_provider.bulk_history.side_effect = lambda tickers, start, end: {
+        t: pd.Series([150.0], index=[start]) for t in tickers if t != "NOPE"
+    }
+    monkeypatch.setattr("app.tasks.daily_returns.get_price_provider", lambda: mock_provider)
+    return mock_provider, upsert, mock_session
+
+
+def test_fetch_and_store_daily_returns(eager, task_env):
+    mock_provider, upsert, mock_session = task_env
+
+    result = fetch_and_store_daily_returns("2025-08-14")
+
+    assert result["chunks"] == 2
+    assert mock_provider.bulk_history.call_count == 2
+    rows = [row for call in upsert.await_args_list for row in call.args[1]]
+    assert rows == [
+        {"asset_id": 1, "date": date(2025, 8, 14), "close_price": 150.0},
+        {"asset_id": 2, "date": date(2025, 8, 14), "close_price": 150.0},
+    ]
+    assert mock_session.commit.call_count == 2
+
+
+def test_chunk_is_retried_after_provider_failure(task_env):
+    mock_provider, upsert, _ = task_env
+    ok = mock_provider.bulk_history.side_effect
+    calls = []
+
+    def flaky(tickers, start, end):
+        calls.append(tickers)
+        if len(calls) == 1:
+            raise RuntimeError("429")
+        return ok(tickers, start, end)
+    mock_provider.bulk_history.side_effect = flaky
+
+    store_daily_returns_chunk.apply(args=([[1, "AAPL"], [2, "MSFT"]], "2025-08-14"))
+
+    assert len(calls) == 2 and calls[0] == calls[1]
+    assert sum(len(call.args[1]) for call in upsert.await_args_list) == 2
+
+
+def test_summary_reports_coverage():
+    summary = summarize_daily_returns(
+        [{"requested": 2, "stored": 2, "missing": []}, {"requested": 2, "stored": 1, "missing": ["NOPE"]}],
+        4,
+        "2025-08-14",
+    )
+    assert summary["coverage"] == 0.75
+    assert summary["missing"] == ["NOPE"]
+
+
+def test_exhausted_chunk_returns_a_failure_for_the_summary(task_env, monkeypatch):
+    mock_provider, _, _ = task_env
+    ok = mock_provider.bulk_history.side_effect
+
+    def broken_for_aapl(tickers, start, end):
+        if "AAPL" in tickers:
+            raise RuntimeError("500")
+        return ok(tickers, start, end)
+    mock_provider.bulk_history.side_effect = broken_for_aapl
+    monkeypatch.setattr(store_daily_returns_chunk, "max_retries", 2)
+
+    # Esgotadas as tentativas o bloco termina com sucesso (o chord segue para o callback).
+    failed = store_daily_returns_chunk.apply(args=([[1, "AAPL"], [2, "MSFT"]], "2025-08-14"))
+    assert failed.successful()
+    assert failed.result["failed"] == ["AAPL", "MSFT"] and failed.result["stored"] == 0
+    assert mock_provider.bulk_history.call_count == 3
 
-    mock_ticker.history.assert_called_once()
-    assert mock_session.add.call_count == 1
-    assert mock_session.commit.call_count == 1
+    ok_chunk = store_daily_returns_chunk.apply(args=([[3, "NOPE"]], "2025-08-14")).result
+    summary = summarize_daily_returns([failed.result, ok_chunk], 3, "2025-08-14")
+    assert summary["stored"] == 0
+    assert summary["failed"] == ["AAPL", "MSFT"]
+    assert summary["missing"] == ["NOPE"]
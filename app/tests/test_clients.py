@@ -56,3 +56,37 @@ async def test_delete_client(client):
     response = await client.delete(f"/clients/{client_id}")
     assert response.status_code == 200
     assert response.json()["detail"] == "Client deleted"
+
+async def test_clients_captado_matches_per_period(client, db_session, monkeypatch):
+    from datetime import date
+    from unittest.mock import AsyncMock
+    from app.models.allocation import Allocation
+    from app.models.asset import Asset
+    from app.models.daily_return import DailyReturn
+    from app.repositories import daily_returns as dr_repo
+
+    create_resp = await client.post("/clients/", json={
+        "name": "Client Captado",
+        "email": "captado@example.com",
+        "status": "active"
+    })
+    client_id = create_resp.json()["id"]
+
+    asset = Asset(ticker="CAPT", name="Captado Asset")
+    db_session.add(asset)
+    await db_session.flush()
+    today = date.today()
+    db_session.add(Allocation(client_id=client_id, asset_id=asset.id, quantity=2, buy_price=10, buy_date=today))
+    db_session.add(DailyReturn(asset_id=asset.id, date=today, close_price=12.5))
+    await db_session.commit()
+
+    monkeypatch.setattr(dr_repo, "get_asset_prices", AsyncMock(return_value={"CAPT": 15.0}))
+
+    response = await client.get("/clients/captado", params={"month": today.month, "year": today.year})
+    assert response.status_code == 200
+    item = next(i for i in response.json() if i["client_name"] == "Client Captado")
+
+    for period in dr_repo.CAPTADO_PERIODS:
+        expected = await dr_repo.get_captured_by_period(db_session, client_id, period, today.year, today.month)
+        assert item[period] == expected
+    assert item["mensal"] == {"captado": 25.0, "atual": 30.0, "rentabilidade": 20.0}
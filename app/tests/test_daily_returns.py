@@ -0,0 +1,105 @@
+import os
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy import Column, Index, MetaData, Table, select, text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.models.daily_return import DailyReturn
+from app.repositories import daily_returns as dr_repo
+
+pytestmark = pytest.mark.asyncio
+
+ASSET_ID = 910001
+
+
+def _range_query(table=DailyReturn.__table__, asset_id=ASSET_ID):
+    return (
+        select(table)
+        .where(table.c.asset_id == asset_id, table.c.date >= date(2025, 1, 1))
+        .order_by(table.c.date.desc())
+        .limit(1)
+    )
+
+
+async def test_upsert_is_idempotent(db_session):
+    day = date(2025, 3, 3)
+    rows = [
+        {"asset_id": ASSET_ID, "date": day, "close_price": 10.0},
+        {"asset_id": ASSET_ID, "date": day + timedelta(days=1), "close_price": 11.0},
+    ]
+    await dr_repo.upsert_daily_returns(db_session, rows)
+    await dr_repo.upsert_daily_returns(db_session, rows)
+    await dr_repo.create_daily_return(db_session, ASSET_ID, day, 12.5)
+
+    stored = await dr_repo.get_by_asset(db_session, ASSET_ID)
+    assert [(r.date, r.close_price) for r in stored] == [(day, 12.5), (day + timedelta(days=1), 11.0)]
+
+
+async def test_asset_range_queries_use_the_composite_index(db_session):
+    sql = str(_range_query().compile(db_session.bind, compile_kwargs={"literal_binds": True}))
+    result = await db_session.execute(text(f"EXPLAIN QUERY PLAN {sql}"))
+    plan = " ".join(str(row[-1]) for row in result.all())
+
+    assert "USING INDEX ux_daily_returns_asset_id_date" in plan
+
+
+async def test_partition_maintenance_is_a_noop_without_postgres(db_session):
+    assert await dr_repo.ensure_daily_return_partitions(db_session) == []
+
+
+async def test_get_by_asset_date_bounds(db_session):
+    asset_id = ASSET_ID + 1
+    await dr_repo.upsert_daily_returns(db_session, [
+        {"asset_id": asset_id, "date": date(year, 6, 1), "close_price": float(year)} for year in (2023, 2024, 2025)
+    ])
+    await db_session.commit()
+
+    rows = await dr_repo.get_by_asset(db_session, asset_id, start=date(2024, 1, 1), end=date(2024, 12, 31))
+    assert [r.close_price for r in rows] == [2024.0]
+
+
+def _perf_table():
+    """Cópia de daily_returns (colunas e índices) no schema de benchmark, sem a FK para assets."""
+    source = DailyReturn.__table__
+    return Table(
+        source.name,
+        MetaData(schema="perf_daily_returns"),
+        *(Column(c.name, c.type, primary_key=c.primary_key, nullable=c.nullable) for c in source.columns),
+        *(Index(i.name, *(c.name for c in i.columns), unique=i.unique) for i in source.indexes),
+    )
+
+
+@pytest.mark.skipif(
+    not (os.getenv("RUN_BENCHMARKS") and os.getenv("PERF_DATABASE_URL")),
+    reason="defina RUN_BENCHMARKS=1 e PERF_DATABASE_URL (postgresql+asyncpg://...) para rodar",
+)
+async def test_postgres_plan_uses_index_at_10m_rows():
+    engine = create_async_engine(os.environ["PERF_DATABASE_URL"])
+    table = _perf_table()
+    try:
+        async with engine.begin() as conn:
+            await conn.execute(text("DROP SCHEMA IF EXISTS perf_daily_returns CASCADE"))
+            await conn.execute(text("CREATE SCHEMA perf_daily_returns"))
+            await conn.run_sync(lambda sync_conn: table.create(sync_conn))
+            # 2.000 ativos x 5.000 dias = 10M linhas.
+            await conn.execute(text(
+                """
+                INSERT INTO perf_daily_returns.daily_returns (asset_id, date, close_price)
+                SELECT a, DATE '2000-01-01' + d, 100 + random()
+                FROM generate_series(1, 2000) AS a, generate_series(0, 4999) AS d
+                """
+            ))
+            await conn.execute(text("ANALYZE perf_daily_returns.daily_returns"))
+
+        async with engine.connect() as conn:
+            query = _range_query(table, asset_id=1234)
+            sql = str(query.compile(conn.engine, compile_kwargs={"literal_binds": True}))
+            plan = "\n".join(row[0] for row in (await conn.execute(text(f"EXPLAIN {sql}"))).all())
+
+        assert "ux_daily_returns_asset_id_date" in plan
+        assert "Seq Scan" not in plan
+    finally:
+        async with engine.begin() as conn:
+            await conn.execute(text("DROP SCHEMA IF EXISTS perf_daily_returns CASCADE"))
+        await engine.dispose()
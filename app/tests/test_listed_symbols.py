@@ -0,0 +1,128 @@
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+import pandas as pd
+import pytest
+from sqlalchemy import delete
+
+from app.models.listed_symbol import ListedSymbol
+from app.repositories import assets as assets_repo
+from app.repositories import listed_symbols as listed_symbols_repo
+from app.tasks import listed_symbols as listed_symbols_task
+
+pytestmark = pytest.mark.asyncio
+
+
+class _SessionContext:
+    def __init__(self, session):
+        self.session = session
+
+    async def __aenter__(self):
+        return self.session
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+async def _clear(db_session):
+    await db_session.execute(delete(ListedSymbol))
+    await db_session.commit()
+
+
+def _universe(rows):
+    return pd.DataFrame(rows, columns=["symbol", "name", "exchange", "is_etf"])
+
+
+async def test_sync_only_writes_changed_rows(db_session):
+    first = _universe([
+        ("AAPL", "Apple Inc.", "NASDAQ", False),
+        ("SPY", "SPDR S&P 500 ETF Trust", "NYSE Arca", True),
+        ("IBM", "International Business Machines", "NYSE", False),
+    ])
+    assert await listed_symbols_repo.sync_listed_symbols(db_session, first) == {
+        "inserted": 3, "updated": 0, "deleted": 0, "unchanged": 0, "skipped_deletes": 0,
+    }
+
+    second = _universe([
+        ("AAPL", "Apple Inc.", "NASDAQ", False),
+        ("SPY", "SPDR S&P 500 ETF", "NYSE Arca", True),
+        ("QQQ", "Invesco QQQ Trust", "NASDAQ", True),
+    ])
+    assert await listed_symbols_repo.sync_listed_symbols(db_session, second) == {
+        "inserted": 1, "updated": 1, "deleted": 1, "unchanged": 1, "skipped_deletes": 0,
+    }
+
+    items, total = await listed_symbols_repo.list_listed_symbols(db_session)
+    assert total == 3
+    assert [item["symbol"] for item in items] == ["AAPL", "QQQ", "SPY"]
+    assert items[2]["name"] == "SPDR S&P 500 ETF"
+
+    await _clear(db_session)
+
+
+async def test_sync_keeps_rows_when_the_download_is_empty_or_partial(db_session):
+    symbols = [(f"S{i:03d}", f"Company {i}", "NYSE", False) for i in range(20)]
+    await listed_symbols_repo.sync_listed_symbols(db_session, _universe(symbols))
+    try:
+        stats = await listed_symbols_repo.sync_listed_symbols(db_session, _universe([]))
+        assert stats["deleted"] == 0 and stats["skipped_deletes"] == 20
+
+        stats = await listed_symbols_repo.sync_listed_symbols(db_session, _universe(symbols[:5]))
+        assert stats["deleted"] == 0 and stats["skipped_deletes"] == 15
+        assert (await listed_symbols_repo.list_listed_symbols(db_session))[1] == 20
+
+        # uma delisting normal (poucas linhas a menos) continua removendo
+        stats = await listed_symbols_repo.sync_listed_symbols(db_session, _universe(symbols[:19]))
+        assert stats["deleted"] == 1 and stats["skipped_deletes"] == 0
+    finally:
+        await _clear(db_session)
+
+
+async def test_refresh_task_republishes_the_universe_from_the_table(db_session, fake_redis, monkeypatch):
+    universe = _universe([("AAPL", "Apple Inc.", "NASDAQ", False), ("SPY", "SPDR S&P 500 ETF", "NYSE Arca", True)])
+    monkeypatch.setattr(assets_repo, "fetch_all_tickers_df", MagicMock(return_value=universe))
+    monkeypatch.setattr(listed_symbols_task, "SessionLocal", lambda: _SessionContext(db_session))
+    monkeypatch.setattr(listed_symbols_task, "close_redis", AsyncMock())
+
+    try:
+        stats = await asyncio.to_thread(listed_symbols_task.refresh_listed_symbols)
+        assert stats["inserted"] == 2
+        assert await fake_redis.get(assets_repo.TICKERS_VERSION_KEY) == stats["version"].encode()
+
+        # O worker recarrega do Redis: nada de baixar os CSVs na requisição.
+        monkeypatch.setattr(assets_repo, "fetch_all_tickers_df", MagicMock(side_effect=AssertionError))
+        assert [r["symbol"] for r in await assets_repo.search_assets("sp")] == ["SPY"]
+    finally:
+        await _clear(db_session)
+
+
+async def test_list_yahoo_pages_from_table_with_sql_filters(db_session, monkeypatch):
+    await listed_symbols_repo.sync_listed_symbols(db_session, _universe([
+        ("AAPL", "Apple Inc.", "NASDAQ", False),
+        ("QQQ", "Invesco QQQ Trust", "NASDAQ", True),
+        ("SPY", "SPDR S&P 500 ETF Trust", "NYSE Arca", True),
+        ("MSFT", "Microsoft Corporation", "NASDAQ", False),
+    ]))
+
+    async def universe_not_used():
+        raise AssertionError("o universo em memória não deveria ser carregado")
+    monkeypatch.setattr(assets_repo, "_get_all_tickers_cached", universe_not_used)
+
+    try:
+        page = await assets_repo.list_assets_from_yahoo(
+            page=1, per_page=10, with_price=False, exchange="NASDAQ", db=db_session
+        )
+        assert [item["symbol"] for item in page["items"]] == ["AAPL", "MSFT", "QQQ"]
+
+        page = await assets_repo.list_assets_from_yahoo(
+            page=2, per_page=1, with_price=False, is_etf=True, db=db_session
+        )
+        assert [item["symbol"] for item in page["items"]] == ["SPY"]
+        assert page["total"] == 2
+
+        page = await assets_repo.list_assets_from_yahoo(
+            page=1, per_page=10, with_price=False, exchange="IEX", db=db_session
+        )
+        assert page["items"] == [] and page["total"] == 0
+    finally:
+        await _clear(db_session)
@@ -0,0 +1,50 @@
+from datetime import date, datetime, timezone
+
+from app.core import market_hours
+from app.core.config import PRICE_HARD_TTL, PRICE_OPEN_TTL
+
+
+def utc(*args):
+    return datetime(*args, tzinfo=timezone.utc)
+
+
+def test_us_holidays():
+    holidays = market_hours.US_EQUITIES.holidays(2025)
+    assert date(2025, 4, 18) in holidays   # Good Friday
+    assert date(2025, 7, 4) in holidays
+    assert date(2025, 11, 27) in holidays  # Thanksgiving
+    assert date(2025, 6, 19) in holidays   # Juneteenth
+
+
+def test_b3_holidays():
+    holidays = market_hours.B3.holidays(2025)
+    assert date(2025, 3, 3) in holidays    # Carnaval
+    assert date(2025, 3, 4) in holidays
+    assert date(2025, 6, 19) in holidays   # Corpus Christi
+
+
+def test_short_ttl_while_open():
+    # Quarta-feira, 14:00 em Nova York
+    now = utc(2025, 8, 13, 18, 0)
+    assert market_hours.price_ttl("NASDAQ", now) == (PRICE_OPEN_TTL, PRICE_OPEN_TTL + PRICE_HARD_TTL)
+
+
+def test_ttl_extends_until_next_open_on_weekend():
+    # Sábado, meio-dia UTC -> segunda 09:30 em Nova York (13:30 UTC)
+    now = utc(2025, 8, 16, 12, 0)
+    soft, hard = market_hours.price_ttl("NYSE", now)
+    assert soft == int((utc(2025, 8, 18, 13, 30) - now).total_seconds())
+    assert hard == soft + PRICE_HARD_TTL
+
+
+def test_next_open_skips_holidays():
+    # Quinta de Thanksgiving -> sexta 09:30
+    now = utc(2025, 11, 27, 15, 0)
+    assert market_hours.next_open(market_hours.US_EQUITIES, now) == utc(2025, 11, 28, 14, 30)
+
+
+def test_opens_within():
+    before_open = utc(2025, 8, 13, 13, 25)   # 09:25 em Nova York
+    assert market_hours.opens_within("NASDAQ", 600, before_open)
+    assert not market_hours.opens_within("NASDAQ", 60, before_open)
+    assert not market_hours.opens_within("NASDAQ", 600, utc(2025, 8, 13, 18, 0))
@@ -1,8 +1,18 @@
-import pytest
+import random
+import uuid
+from collections import defaultdict
+from datetime import date, timedelta
 from unittest.mock import AsyncMock, patch
-from datetime import date
 
-from app.repositories.finance import calculate_client_performance
+import numpy as np
+import pytest
+from sqlalchemy import event
+
+from app.models.allocation import Allocation
+from app.models.asset import Asset
+from app.repositories import daily_returns as dr_repo
+
+from app.repositories.finance import calculate_client_performance, get_asset_metrics
 
 
 class FakeAsset:
@@ -14,11 +24,21 @@ class FakeAllocation:
     def __init__(self, asset_id, ticker, buy_price, quantity, buy_date):
         self.asset_id = asset_id
         self.asset = FakeAsset(ticker)
+        self.ticker = ticker
         self.buy_price = buy_price
         self.quantity = quantity
         self.buy_date = buy_date
 
 
+def _histories(histories_by_asset):
+    """Formato de get_histories_by_client: asset_id -> (datas, fechamentos float64)."""
+    return {
+        asset_id: ([dr.date for dr in rows], np.array([dr.close_price for dr in rows], dtype=np.float64))
+        for asset_id, rows in histories_by_asset.items()
+        if rows
+    }
+
+
 class FakeDailyReturn:
     def __init__(self, date, close_price):
         self.date = date
@@ -39,8 +59,8 @@ async def test_calculate_client_performance_basic():
         FakeDailyReturn(date(2023, 1, 4), 115),
     ]
 
-    with patch("app.repositories.finance.allocations_repo.get_by_client", new=AsyncMock(return_value=allocations)):
-        with patch("app.repositories.finance.dr_repo.get_by_asset", new=AsyncMock(return_value=daily_returns)):
+    with patch("app.repositories.finance.allocations_repo.get_positions_by_client", new=AsyncMock(return_value=allocations)):
+        with patch("app.repositories.finance.dr_repo.get_histories_by_client", new=AsyncMock(return_value=_histories({1: daily_returns}))):
             db_session = AsyncMock()
             result = await calculate_client_performance(db_session, client_id=123)
 
@@ -53,3 +73,157 @@ async def test_calculate_client_performance_basic():
     assert perf["start_date"] == "2023-01-01"
     assert perf["end_date"] == "2023-01-04"
     assert all("accumulated_return_pct" in p for p in perf["performance_curve"])
+
+
+def _legacy_ticker_performance(ticker, allocs, daily_returns):
+    """Algoritmo original (laços em Python), mantido como referência de paridade."""
+    daily_returns = sorted(daily_returns, key=lambda x: x.date)
+    total_invested = 0
+    current_value = 0
+    daily_acc_returns = defaultdict(float)
+    daily_weights = defaultdict(float)
+
+    for alloc in allocs:
+        buy_price = alloc.buy_price
+        quantity = alloc.quantity
+        total_invested += buy_price * quantity
+        filtered_returns = [dr for dr in daily_returns if dr.date >= alloc.buy_date]
+        for dr in filtered_returns:
+            value = dr.close_price * quantity
+            current_value += value if dr.date == filtered_returns[-1].date else 0
+            acc_return = ((dr.close_price - buy_price) / buy_price) * 100
+            daily_acc_returns[dr.date] += acc_return * (buy_price * quantity)
+            daily_weights[dr.date] += buy_price * quantity
+
+    profit_loss = current_value - total_invested
+    percentage_change = (profit_loss / total_invested) * 100 if total_invested else 0
+
+    daily_changes = []
+    for i in range(1, len(daily_returns)):
+        prev = daily_returns[i - 1].close_price
+        curr = daily_returns[i].close_price
+        daily_changes.append((curr - prev) / prev if prev else 0)
+    avg_daily_return = sum(daily_changes) / len(daily_changes) if daily_changes else 0
+
+    performance_curve = []
+    for dt in sorted(daily_acc_returns.keys()):
+        weight = daily_weights[dt] if daily_weights[dt] else 1
+        performance_curve.append({
+            "date": dt.isoformat(),
+            "accumulated_return_pct": round(daily_acc_returns[dt] / weight, 2),
+            "ticker": ticker,
+        })
+
+    return {
+        "ticker": ticker,
+        "buy_price": allocs[0].buy_price,
+        "quantity": sum(a.quantity for a in allocs),
+        "total_invested": round(total_invested, 2),
+        "current_value": round(current_value, 2),
+        "profit_loss": round(profit_loss, 2),
+        "percentage_change": round(percentage_change, 2),
+        "avg_daily_return": round(avg_daily_return * 100, 2),
+        "start_date": daily_returns[0].date.isoformat(),
+        "end_date": daily_returns[-1].date.isoformat(),
+        "performance_curve": performance_curve,
+    }
+
+
+def _random_portfolio(seed):
+    rng = random.Random(seed)
+    start = date(2022, 1, 3)
+    histories, allocations = {}, []
+    for asset_id, ticker in enumerate(["AAPL", "MSFT", "PETR4.SA", "VALE3.SA"], start=1):
+        days = sorted(rng.sample(range(900), 500))
+        price = rng.uniform(10, 300)
+        history = []
+        for offset in days:
+            price *= 1 + rng.gauss(0, 0.02)
+            history.append(FakeDailyReturn(start + timedelta(days=offset), round(price, 4)))
+        histories[asset_id] = history
+        for _ in range(rng.randint(1, 40)):
+            # compras antes, durante e depois do histórico
+            buy_date = start + timedelta(days=rng.randint(-30, 930))
+            allocations.append(FakeAllocation(asset_id, ticker, round(rng.uniform(5, 400), 2), rng.randint(1, 500), buy_date))
+    return allocations, histories
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("seed", range(5))
+async def test_calculate_client_performance_matches_legacy(seed):
+    allocations, histories = _random_portfolio(seed)
+
+    # O histórico de cada ativo começa na primeira compra do cliente nele
+    by_ticker = defaultdict(list)
+    for alloc in allocations:
+        by_ticker[alloc.asset.ticker].append(alloc)
+    since_first_buy = {
+        allocs[0].asset_id: [dr for dr in histories[allocs[0].asset_id] if dr.date >= min(a.buy_date for a in allocs)]
+        for allocs in by_ticker.values()
+    }
+
+    with patch("app.repositories.finance.allocations_repo.get_positions_by_client", new=AsyncMock(return_value=allocations)):
+        with patch("app.repositories.finance.dr_repo.get_histories_by_client", new=AsyncMock(return_value=_histories(since_first_buy))):
+            result = await calculate_client_performance(AsyncMock(), client_id=123)
+
+    expected = [
+        _legacy_ticker_performance(ticker, allocs, since_first_buy[allocs[0].asset_id])
+        for ticker, allocs in by_ticker.items()
+        if since_first_buy[allocs[0].asset_id]
+    ]
+    assert result == expected
+
+
+@pytest.mark.asyncio
+async def test_calculate_client_performance_uses_two_queries(db_session):
+    client_id = 930001
+    start = date(2024, 1, 2)
+    for i in range(50):
+        asset = Asset(ticker=f"PERF{uuid.uuid4().hex[:6].upper()}", name=f"Perf {i}")
+        db_session.add(asset)
+        await db_session.flush()
+        db_session.add(Allocation(
+            client_id=client_id, asset_id=asset.id, quantity=10, buy_price=100.0, buy_date=start + timedelta(days=5),
+        ))
+        await dr_repo.upsert_daily_returns(db_session, [
+            {"asset_id": asset.id, "date": start + timedelta(days=d), "close_price": 100.0 + d} for d in range(20)
+        ])
+    await db_session.commit()
+
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(db_session.bind.sync_engine, "before_cursor_execute", listener)
+    try:
+        result = await calculate_client_performance(db_session, client_id)
+    finally:
+        event.remove(db_session.bind.sync_engine, "before_cursor_execute", listener)
+
+    assert len(statements) == 2
+    assert len(result) == 50
+    assert all(perf["start_date"] == (start + timedelta(days=5)).isoformat() for perf in result)
+    assert result[0]["current_value"] == 119.0 * 10
+
+
+@pytest.mark.asyncio
+async def test_get_asset_metrics_aggregates_in_sql(db_session):
+    asset = Asset(ticker=f"MET{uuid.uuid4().hex[:6].upper()}", name="Metrics")
+    db_session.add(asset)
+    await db_session.flush()
+    closes = [100.0, 105.0, 102.0, 110.0, 108.0]
+    start = date(2024, 3, 1)
+    await dr_repo.upsert_daily_returns(db_session, [
+        {"asset_id": asset.id, "date": start + timedelta(days=i), "close_price": close} for i, close in enumerate(closes)
+    ])
+    await db_session.commit()
+
+    metrics = await get_asset_metrics(db_session, asset.id, buy_price=100.0, quantity=10, buy_date=start + timedelta(days=1))
+
+    since_buy = closes[1:]
+    changes = [(curr - prev) / prev for prev, curr in zip(since_buy, since_buy[1:])]
+    assert metrics["start_date"] == start + timedelta(days=1)
+    assert metrics["end_date"] == start + timedelta(days=4)
+    assert metrics["current_value"] == 1080.0
+    assert metrics["profit_loss"] == 80.0
+    assert metrics["percentage_change"] == pytest.approx(8.0)
+    assert metrics["avg_daily_return"] == pytest.approx(sum(changes) / len(changes))
+    assert await get_asset_metrics(db_session, asset.id, 100.0, 10, buy_date=date(2030, 1, 1)) is None
@@ -0,0 +1,78 @@
+from datetime import date, timedelta
+from unittest.mock import MagicMock
+
+import pytest
+
+from app.core.market_hours import B3, US_EQUITIES
+from app.models.asset import Asset
+from app.providers.prices import SyntheticProvider
+from app.repositories import daily_returns as dr_repo
+from app.repositories import price_gaps as price_gaps_repo
+
+pytestmark = pytest.mark.asyncio
+
+START, END = date(2025, 1, 1), date(2025, 2, 1)
+
+
+def _trading_days(calendar):
+    days, day = [], START
+    while day < END:
+        if calendar.is_trading_day(day):
+            days.append(day)
+        day += timedelta(days=1)
+    return days
+
+
+async def _asset_with_history(db_session, ticker, days):
+    asset = Asset(ticker=ticker, name=ticker)
+    db_session.add(asset)
+    await db_session.commit()
+    await dr_repo.upsert_daily_returns(db_session, [
+        {"asset_id": asset.id, "date": day, "close_price": 10.0} for day in days
+    ])
+    await db_session.commit()
+    return asset
+
+
+async def test_gaps_follow_each_exchange_calendar(db_session):
+    us_days, b3_days = _trading_days(US_EQUITIES), _trading_days(B3)
+    us = await _asset_with_history(db_session, "GAPUS", [d for d in us_days if d not in us_days[5:7]])
+    b3 = await _asset_with_history(db_session, "GAPB3.SA", b3_days[:-1])
+
+    gaps = await price_gaps_repo.find_price_gaps(db_session, START, END)
+
+    assert gaps[us.id] == {"ticker": "GAPUS", "missing": us_days[5:7]}
+    assert gaps[b3.id]["missing"] == b3_days[-1:]
+    assert date(2025, 1, 20) not in gaps[us.id]["missing"]  # MLK Day
+
+
+async def test_repair_fetches_only_missing_ranges_and_reports_coverage(client, db_session, monkeypatch):
+    us_days = _trading_days(US_EQUITIES)
+    first = await _asset_with_history(db_session, "GAPR1", [d for d in us_days if d != us_days[10]])
+    second = await _asset_with_history(db_session, "GAPR2", [d for d in us_days if d != us_days[10]])
+
+    synthetic = SyntheticProvider(seed=3)
+    spy = MagicMock(wraps=synthetic.bulk_history)
+    monkeypatch.setattr(synthetic, "bulk_history", spy)
+    monkeypatch.setattr(price_gaps_repo, "get_price_provider", lambda: synthetic)
+    monkeypatch.setattr("app.core.rate_limit.market_data_guard.redis_bucket", None)
+
+    report = (await client.get("/assets/coverage", params={"start": START, "end": END})).json()
+    by_asset = {a["asset_id"]: a for a in report["assets"]}
+    assert by_asset[first.id]["missing"] == 1
+    assert by_asset[first.id]["expected"] == len(us_days)
+
+    result = await price_gaps_repo.repair_price_gaps(db_session, START, END)
+    assert result["repaired"] >= 2
+    calls = [call for call in spy.call_args_list if {"GAPR1", "GAPR2"} <= set(call.args[0])]
+    assert len(calls) == 1
+    assert calls[0].args[1:] == (us_days[10], us_days[10] + timedelta(days=1))
+
+    gaps = await price_gaps_repo.find_price_gaps(db_session, START, END)
+    assert first.id not in gaps and second.id not in gaps
+
+
+async def test_coverage_rejects_windows_beyond_the_lookback_limit(client):
+    too_long = {"start": date(1990, 1, 1), "end": date(2025, 1, 1)}
+    assert (await client.get("/assets/coverage", params=too_long)).status_code == 400
+    assert (await client.get("/assets/coverage", params={"start": END, "end": START})).status_code == 400
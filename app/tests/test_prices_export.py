@@ -0,0 +1,168 @@
+import asyncio
+import csv
+import io
+import logging
+import os
+import time
+import tracemalloc
+import uuid
+from datetime import date, timedelta
+
+import pytest
+from openpyxl import load_workbook
+
+from app.models.allocation import Allocation
+from app.models.asset import Asset
+from app.repositories import daily_returns as dr_repo
+from app.routers.prices import EXPORT_COLUMNS, _build_xlsx
+
+pytestmark = pytest.mark.asyncio
+
+logger = logging.getLogger(__name__)
+
+
+async def _book(db_session, client_id, closes_by_asset):
+    """Cria ativos com histórico e uma alocação por ativo para o cliente."""
+    tickers = []
+    start = date(2024, 5, 1)
+    for closes in closes_by_asset:
+        asset = Asset(ticker=f"EXP{uuid.uuid4().hex[:6].upper()}", name="Export")
+        db_session.add(asset)
+        await db_session.flush()
+        db_session.add(Allocation(client_id=client_id, asset_id=asset.id, quantity=2, buy_price=50.0, buy_date=start))
+        await dr_repo.upsert_daily_returns(db_session, [
+            {"asset_id": asset.id, "date": start + timedelta(days=i), "close_price": close} for i, close in enumerate(closes)
+        ])
+        tickers.append(asset.ticker)
+    await db_session.commit()
+    return tickers
+
+
+def _rows(response):
+    return list(csv.DictReader(io.StringIO(response.text)))
+
+
+async def test_export_csv_streams_batched_metrics(client, db_session):
+    tickers = await _book(db_session, 940001, [[50.0, 55.0, 60.0], []])
+
+    response = await client.get("/prices/export", params={"client_id": 940001})
+
+    assert response.status_code == 200
+    assert response.text.splitlines()[0] == ",".join(EXPORT_COLUMNS)
+    rows = _rows(response)
+    assert [row["ticker"] for row in rows] == tickers
+    assert float(rows[0]["current_value"]) == 120.0
+    assert float(rows[0]["profit_loss"]) == 20.0
+    assert float(rows[0]["avg_daily_return"]) == pytest.approx((0.1 + 60 / 55 - 1) / 2)
+    # ativo sem histórico: métricas vazias em vez de erro
+    assert rows[1]["total_invested"] == "100.0" and rows[1]["current_value"] == ""
+
+
+async def test_export_csv_multiple_and_all_clients(client, db_session):
+    first = await _book(db_session, 940002, [[10.0, 11.0]])
+    second = await _book(db_session, 940003, [[20.0, 19.0]])
+
+    response = await client.get("/prices/export", params={"client_id": [940002, 940003]})
+    assert [(row["client_id"], row["ticker"]) for row in _rows(response)] == [
+        ("940002", first[0]), ("940003", second[0]),
+    ]
+
+    everyone = {row["ticker"] for row in _rows(await client.get("/prices/export"))}
+    assert {*first, *second} <= everyone
+
+
+async def test_export_excel_streams_write_only_workbook(client, db_session):
+    tickers = await _book(db_session, 940004, [[50.0, 55.0, 60.0]])
+
+    response = await client.get("/prices/export", params={"client_id": 940004, "format": "excel"})
+
+    assert response.status_code == 200
+    sheet = load_workbook(io.BytesIO(response.content), read_only=True).active
+    header, *rows = list(sheet.values)
+    assert list(header) == EXPORT_COLUMNS
+    assert [(row[0], row[1], row[5]) for row in rows] == [(940004, tickers[0], 120.0)]
+
+
+async def _benchmark_rows(total):
+    for i in range(total):
+        yield {
+            "client_id": i // 50, "ticker": f"T{i % 5000:05d}", "quantity": 10.0, "buy_price": 12.5,
+            "total_invested": 125.0, "current_value": 130.0, "profit_loss": 5.0,
+            "percentage_change": 4.0, "avg_daily_return": 0.0012,
+        }
+
+
+async def _xlsx_peak_bytes(total):
+    # tracemalloc mede só o que é alocado durante a montagem, independente do histórico do processo
+    tracemalloc.start()
+    try:
+        spool = await _build_xlsx(_benchmark_rows(total))
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    spool.close()
+    return peak
+
+
+@pytest.mark.skipif(not os.getenv("RUN_BENCHMARKS"), reason="benchmark: defina RUN_BENCHMARKS=1")
+async def test_excel_export_benchmark_100k_rows(record_property):
+    total = 100_000
+
+    # mede o maior intervalo em que o event loop ficou sem atender outra corrotina
+    stalls, done = [], asyncio.Event()
+
+    async def heartbeat():
+        last = time.perf_counter()
+        while not done.is_set():
+            await asyncio.sleep(0.01)
+            now = time.perf_counter()
+            stalls.append(now - last)
+            last = now
+
+    beat = asyncio.create_task(heartbeat())
+    started = time.perf_counter()
+    spool = await _build_xlsx(_benchmark_rows(total))
+    elapsed = time.perf_counter() - started
+    done.set()
+    await beat
+    size = spool.seek(0, io.SEEK_END)
+    spool.close()
+
+    # Memória medida à parte: o tracemalloc deixa o openpyxl várias vezes mais lento.
+    # Memória constante = o pico não cresce quando o número de linhas quadruplica.
+    small_peak = await _xlsx_peak_bytes(5_000)
+    large_peak = await _xlsx_peak_bytes(20_000)
+
+    record_property("xlsx_100k_seconds", round(elapsed, 2))
+    record_property("xlsx_100k_mb", round(size / 1e6, 1))
+    record_property("xlsx_peak_mb_5k", round(small_peak / 1e6, 2))
+    record_property("xlsx_peak_mb_20k", round(large_peak / 1e6, 2))
+    record_property("loop_max_stall_ms", round(max(stalls) * 1000))
+    logger.info(
+        "xlsx 100k linhas: %.2fs, %.1f MB; pico 5k=%.2f MB, 20k=%.2f MB; maior bloqueio do loop %.0f ms",
+        elapsed, size / 1e6, small_peak / 1e6, large_peak / 1e6, max(stalls) * 1000,
+    )
+    assert large_peak - small_peak < 1e6
+    assert max(stalls) < 0.5
+
+
+async def test_export_requires_auth_and_admin_for_multi_client(client, db_session):
+    await _book(db_session, 940005, [[10.0, 12.0]])
+    admin_headers = dict(client.headers)
+
+    client.headers.pop("Authorization")
+    assert (await client.get("/prices/export", params={"client_id": 940005})).status_code == 401
+
+    username = f"reader_{uuid.uuid4().hex[:6]}"
+    await client.post("/auth/register", json={
+        "username": username, "email": f"{username}@example.com", "password": "testpassword", "role": "read",
+    })
+    token = (await client.post("/auth/login", data={"username": username, "password": "testpassword"})).json()["access_token"]
+    client.headers["Authorization"] = f"Bearer {token}"
+
+    assert (await client.get("/prices/export", params={"client_id": 940005})).status_code == 200
+    assert (await client.get("/prices/export", params={"client_id": [940005, 940006]})).status_code == 403
+    assert (await client.get("/prices/export")).status_code == 403
+
+    client.headers.update(admin_headers)
+    assert (await client.get("/prices/export")).status_code == 200
@@ -0,0 +1,50 @@
+import time
+from datetime import date
+
+from app.providers import prices
+from app.providers.prices import SyntheticProvider
+
+
+def test_synthetic_provider_is_deterministic():
+    first = SyntheticProvider(seed=7).history("AAPL", date(2024, 1, 1), date(2024, 3, 1))
+    second = SyntheticProvider(seed=7).history("AAPL", date(2024, 1, 1), date(2024, 3, 1))
+    other_seed = SyntheticProvider(seed=8).history("AAPL", date(2024, 1, 1), date(2024, 3, 1))
+
+    assert first.equals(second)
+    assert not first.equals(other_seed)
+    assert all(d.weekday() < 5 for d in first.index)
+    assert first.index[0] >= date(2024, 1, 1) and first.index[-1] < date(2024, 3, 1)
+
+
+def test_synthetic_history_is_stable_across_ranges():
+    provider = SyntheticProvider(seed=1)
+    short = provider.history("MSFT", date(2024, 1, 1), date(2024, 2, 1))
+    long = provider.history("MSFT", date(2023, 6, 1), date(2024, 6, 1))
+
+    assert short.equals(long.loc[short.index])
+
+
+def test_synthetic_bulk_history_matches_history():
+    provider = SyntheticProvider(seed=3)
+    bulk = provider.bulk_history(["AAA", "BBB"], date(2024, 1, 1), date(2024, 2, 1))
+
+    assert set(bulk) == {"AAA", "BBB"}
+    assert bulk["AAA"].equals(provider.history("AAA", date(2024, 1, 1), date(2024, 2, 1)))
+    assert provider.latest(["AAA"])["AAA"] > 0
+
+
+def test_synthetic_latency_is_injected():
+    provider = SyntheticProvider(seed=3, latency=0.05)
+    started = time.perf_counter()
+    provider.latest(["AAA"])
+    assert time.perf_counter() - started >= 0.05
+
+
+def test_provider_is_chosen_by_config(monkeypatch):
+    monkeypatch.setattr(prices, "_provider", None)
+    monkeypatch.setattr(prices, "PRICE_PROVIDER", "synthetic")
+    assert isinstance(prices.get_price_provider(), SyntheticProvider)
+
+    monkeypatch.setattr(prices, "_provider", None)
+    monkeypatch.setattr(prices, "PRICE_PROVIDER", "yfinance")
+    assert isinstance(prices.get_price_provider(), prices.YFinanceProvider)
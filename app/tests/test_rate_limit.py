@@ -0,0 +1,205 @@
+import asyncio
+import threading
+
+import pytest
+
+from app.core.rate_limit import (
+    CircuitBreaker,
+    CircuitOpenError,
+    MarketDataGuard,
+    RateLimitedError,
+    TokenBucket,
+)
+
+pytestmark = pytest.mark.asyncio
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _guard(bucket=None, breaker=None, max_wait=5):
+    return MarketDataGuard(
+        local_bucket=bucket or TokenBucket(rate=1000, capacity=1000),
+        redis_bucket=None,
+        breaker=breaker or CircuitBreaker(failure_ratio=0.5, min_calls=4, window=60, cooldown=30),
+        max_wait=max_wait,
+    )
+
+
+async def test_token_bucket_refills_over_time():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=2, capacity=2, timer=clock)
+
+    assert bucket.reserve() == 0
+    assert bucket.reserve() == 0
+    assert bucket.reserve() == pytest.approx(0.5)
+
+    clock.now += 10
+    assert bucket.reserve() == 0
+
+
+async def test_guard_rejects_calls_that_would_wait_too_long():
+    guard = _guard(bucket=TokenBucket(rate=0.1, capacity=1), max_wait=1)
+
+    assert await guard.call(lambda: "ok") == "ok"
+    with pytest.raises(RateLimitedError):
+        await guard.call(lambda: "ok")
+    assert guard.metrics()["limited"] == 1
+
+
+async def test_breaker_trips_fails_fast_and_recovers():
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_ratio=0.5, min_calls=4, window=60, cooldown=30, timer=clock)
+    guard = _guard(breaker=breaker)
+    calls = []
+
+    def flaky():
+        calls.append(1)
+        raise RuntimeError("429")
+
+    for _ in range(4):
+        with pytest.raises(RuntimeError):
+            await guard.call(flaky)
+    assert breaker.state == "open"
+
+    with pytest.raises(CircuitOpenError):
+        await guard.call(flaky)
+    assert len(calls) == 4
+    assert guard.metrics()["tripped"] == 1
+    assert guard.metrics()["rejected"] == 1
+
+    clock.now += 31
+    assert breaker.state == "half_open"
+    assert await guard.call(lambda: 1.0) == 1.0
+    assert breaker.state == "closed"
+
+
+async def test_rejected_calls_do_not_drain_the_bucket_under_sustained_overload():
+    clock = FakeClock()
+    guard = _guard(bucket=TokenBucket(rate=5, capacity=10, timer=clock), max_wait=0)
+
+    # 10 chamadas/s contra um limite de 5/s durante 60s
+    accepted = 0
+    for _ in range(600):
+        try:
+            await guard.call(lambda: "ok")
+            accepted += 1
+        except RateLimitedError:
+            pass
+        clock.now += 0.1
+
+    assert accepted == pytest.approx(5 * 60 + 10, abs=2)
+    # passada a sobrecarga o bucket volta a liberar chamadas imediatamente
+    clock.now += 2
+    assert await guard.call(lambda: "ok") == "ok"
+
+
+async def _trip(guard, clock):
+    def failing():
+        raise RuntimeError("429")
+
+    for _ in range(4):
+        with pytest.raises(RuntimeError):
+            await guard.call(failing)
+    clock.now += 31
+    assert guard.breaker.state == "half_open"
+
+
+async def test_rate_limited_probe_releases_the_half_open_slot():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=1000, capacity=4, timer=clock)
+    guard = _guard(bucket=bucket, breaker=CircuitBreaker(0.5, 4, 60, 30, timer=clock), max_wait=0)
+    await _trip(guard, clock)
+
+    bucket.reserve(cost=4)  # esvazia o bucket
+    with pytest.raises(RateLimitedError):
+        await guard.call(lambda: "ok")
+
+    clock.now += 1
+    assert await guard.call(lambda: "ok") == "ok"
+    assert guard.breaker.state == "closed"
+
+
+async def test_cancelled_probe_releases_the_half_open_slot():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=10, capacity=4, timer=clock)
+    guard = _guard(bucket=bucket, breaker=CircuitBreaker(0.5, 4, 60, 30, timer=clock), max_wait=5)
+    await _trip(guard, clock)
+
+    bucket.reserve(cost=5)  # a sonda fica esperando token
+    probe = asyncio.create_task(guard.call(lambda: "ok"))
+    await asyncio.sleep(0)
+    probe.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await probe
+
+    clock.now += 1
+    assert await guard.call(lambda: "ok") == "ok"
+    assert guard.breaker.state == "closed"
+
+
+async def test_probe_cancelled_during_the_provider_call_releases_the_half_open_slot():
+    clock = FakeClock()
+    guard = _guard(breaker=CircuitBreaker(0.5, 4, 60, 30, timer=clock))
+    await _trip(guard, clock)
+
+    started, finish = asyncio.Event(), threading.Event()
+    loop = asyncio.get_running_loop()
+
+    def slow():
+        loop.call_soon_threadsafe(started.set)
+        finish.wait(5)
+        return "late"
+
+    probe = asyncio.create_task(guard.call(slow))
+    await started.wait()
+    probe.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await probe
+    finish.set()
+
+    assert await guard.call(lambda: "ok") == "ok"
+    assert guard.breaker.state == "closed"
+
+
+async def test_late_results_from_before_the_trip_do_not_close_the_breaker():
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_ratio=0.5, min_calls=4, window=60, cooldown=30, timer=clock)
+    late = breaker.allow()
+    for _ in range(4):
+        breaker.record(False, breaker.allow())
+    assert breaker.state == "open"
+
+    clock.now += 10
+    breaker.record(True, late)
+    assert breaker.state == "open"
+    breaker.record(False, late)
+    clock.now += 21
+    assert breaker.state == "half_open"
+
+
+async def test_failed_probe_reopens_and_counts_a_trip():
+    clock = FakeClock()
+    guard = _guard(breaker=CircuitBreaker(0.5, 4, 60, 30, timer=clock))
+    await _trip(guard, clock)
+
+    def failing():
+        raise RuntimeError("429")
+
+    with pytest.raises(RuntimeError):
+        await guard.call(failing)
+    assert guard.breaker.state == "open"
+    assert guard.metrics()["tripped"] == 2
+
+
+async def test_queued_calls_are_not_counted_as_limited():
+    guard = _guard(bucket=TokenBucket(rate=100, capacity=1), max_wait=1)
+
+    await guard.call(lambda: "ok")
+    await guard.call(lambda: "ok")  # espera ~10 ms por token, mas passa
+    assert guard.metrics()["limited"] == 0
@@ -0,0 +1,100 @@
+from datetime import datetime, timedelta, timezone
+from unittest.mock import MagicMock
+
+import pytest
+from sqlalchemy import update
+
+from app.models.symbol_metadata import SymbolMetadata
+from app.repositories import assets as assets_repo
+from app.repositories import symbol_metadata as symbol_metadata_repo
+
+pytestmark = pytest.mark.asyncio
+
+
+def _provider(monkeypatch, currency="USD"):
+    provider = MagicMock()
+    provider.metadata.side_effect = lambda symbols: {
+        s: {"currency": currency, "exchange": "NMS", "quote_type": "EQUITY"} for s in symbols
+    }
+    monkeypatch.setattr(symbol_metadata_repo, "get_price_provider", lambda: provider)
+    return provider
+
+
+async def test_listing_reads_currency_from_table_after_first_fetch(fake_redis, db_session, monkeypatch):
+    provider = _provider(monkeypatch)
+    monkeypatch.setattr(assets_repo, "_download_last_prices", MagicMock(return_value={"META1": 1.0, "META2": 2.0}))
+
+    async def page(offset, limit, exchange=None, is_etf=None):
+        return [{"symbol": "META1"}, {"symbol": "META2"}], 2
+    monkeypatch.setattr(assets_repo, "_page_from_universe", page)
+
+    first = await assets_repo.list_assets_from_yahoo(db=db_session)
+    assert [item["currency"] for item in first["items"]] == ["USD", "USD"]
+    provider.metadata.assert_called_once_with(["META1", "META2"])
+
+    # Outro worker (memória vazia): a moeda vem da tabela, sem chamar o provedor.
+    assets_repo._currency_memory.clear()
+    second = await assets_repo.list_assets_from_yahoo(db=db_session)
+    assert [item["currency"] for item in second["items"]] == ["USD", "USD"]
+    assert provider.metadata.call_count == 1
+
+
+async def test_refresh_updates_only_stale_rows_in_batches(fake_redis, db_session, monkeypatch):
+    _provider(monkeypatch, currency="EUR")
+    await symbol_metadata_repo.save_symbol_metadata(db_session, {
+        s: {"currency": "USD"} for s in ["OLD1", "OLD2", "OLD3", "NEW1"]
+    })
+    old = datetime.now(timezone.utc) - timedelta(days=8)
+    await db_session.execute(
+        update(SymbolMetadata).where(SymbolMetadata.symbol.in_(["OLD1", "OLD2", "OLD3"])).values(updated_at=old)
+    )
+    await db_session.commit()
+
+    provider = symbol_metadata_repo.get_price_provider()
+    assert await symbol_metadata_repo.refresh_stale_symbol_metadata(db_session, batch_size=2) == 3
+    assert provider.metadata.call_count == 2
+
+    stored = await symbol_metadata_repo.get_symbol_metadata(db_session, ["OLD1", "NEW1"])
+    assert stored["OLD1"]["currency"] == "EUR"
+    assert stored["NEW1"]["currency"] == "USD"
+
+
+async def test_fetch_runs_small_chunks_and_charges_a_token_per_symbol(fake_redis, monkeypatch):
+    from app.core.rate_limit import TokenBucket, market_data_guard
+
+    provider = _provider(monkeypatch)
+    bucket = TokenBucket(rate=0.001, capacity=12)
+    monkeypatch.setattr(market_data_guard, "local_bucket", bucket)
+
+    symbols = [f"CH{i}" for i in range(12)]
+    metadata = await symbol_metadata_repo.fetch_symbol_metadata(symbols, chunk_size=5)
+
+    assert sorted(metadata) == sorted(symbols)
+    assert sorted(len(call.args[0]) for call in provider.metadata.call_args_list) == [2, 5, 5]
+    assert bucket._tokens == pytest.approx(0, abs=0.01)
+
+    # sem tokens: nenhum bloco chega ao provedor
+    assert await symbol_metadata_repo.fetch_symbol_metadata(["CH99"]) == {}
+    assert provider.metadata.call_count == 3
+
+
+async def test_symbols_without_data_are_not_refetched_until_the_negative_ttl(fake_redis, db_session, monkeypatch):
+    provider = MagicMock()
+    provider.metadata.side_effect = lambda symbols: {
+        s: {"currency": "USD", "exchange": "NMS", "quote_type": "EQUITY"} for s in symbols if s != "GHOST1"
+    }
+    monkeypatch.setattr(symbol_metadata_repo, "get_price_provider", lambda: provider)
+
+    first = await symbol_metadata_repo.load_symbol_metadata(db_session, ["GHOST1", "REAL1"])
+    assert first["REAL1"]["currency"] == "USD" and "GHOST1" not in first
+
+    second = await symbol_metadata_repo.load_symbol_metadata(db_session, ["GHOST1", "REAL1"])
+    assert second["GHOST1"] == {"currency": None, "exchange": None, "quote_type": None}
+    assert provider.metadata.call_count == 1
+
+    old = datetime.now(timezone.utc) - timedelta(days=2)
+    await db_session.execute(update(SymbolMetadata).where(SymbolMetadata.symbol == "GHOST1").values(updated_at=old))
+    await db_session.commit()
+    await symbol_metadata_repo.load_symbol_metadata(db_session, ["GHOST1", "REAL1"])
+    assert provider.metadata.call_args_list[-1].args[0] == ["GHOST1"]
+    assert provider.metadata.call_count == 2
@@ -0,0 +1,74 @@
+import os
+import time
+
+import pandas as pd
+import pytest
+
+from app.core.ticker_index import TickerIndex
+
+def _index():
+    return TickerIndex.from_df(pd.DataFrame({
+        "symbol": ["AAPL", "AAP", "AA", "AAPB", "MSFT", "SPY", "APLE"],
+        "name": [
+            "Apple Inc. - Common Stock",
+            "Advance Auto Parts Inc.",
+            "Alcoa Corporation",
+            "GraniteShares 2x Long AAPL Daily ETF",
+            "Microsoft Corporation",
+            "SPDR S&P 500 ETF Trust",
+            "Apple Hospitality REIT, Inc.",
+        ],
+        "exchange": ["NASDAQ", "NYSE", "NYSE", "NASDAQ", "NASDAQ", "NYSE Arca", "NYSE"],
+        "is_etf": [False, False, False, True, False, True, False],
+    }))
+
+
+def test_exact_symbol_then_prefix_then_name():
+    results = [r["symbol"] for r in _index().search("aap")]
+
+    assert results[0] == "AAP"
+    assert results[1:3] == ["AAPB", "AAPL"]
+    assert "AA" not in results
+
+
+def test_name_tokens_with_partial_last_word():
+    assert [r["symbol"] for r in _index().search("apple hosp")] == ["APLE"]
+    assert {r["symbol"] for r in _index().search("corp")} == {"AA", "MSFT"}
+
+
+def test_filters_and_limit():
+    index = _index()
+
+    assert [r["symbol"] for r in index.search("aa", is_etf=True)] == ["AAPB"]
+    assert [r["symbol"] for r in index.search("a", exchange="NYSE")] == ["AA", "AAP", "APLE"]
+    assert len(index.search("a", limit=2)) == 2
+    assert index.search("   ") == []
+
+
+def _full_universe_index():
+    symbols = [f"{chr(65 + i % 26)}{chr(65 + i // 26 % 26)}{chr(65 + i // 676 % 26)}{i % 7}" for i in range(12000)]
+    return TickerIndex(
+        symbols=symbols,
+        names=[f"Company {s} Holdings Inc" for s in symbols],
+        exchanges=["NASDAQ"] * len(symbols),
+        etfs=[False] * len(symbols),
+    )
+
+
+def _mean_search_seconds(index, rounds=50):
+    queries = ["A", "AB", "ABC", "company abc", "holdings", "ZZ"]
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for q in queries:
+            index.search(q)
+    return (time.perf_counter() - start) / (rounds * len(queries))
+
+
+def test_search_on_full_universe_does_not_scan_linearly():
+    # Limite folgado: só pega regressões grosseiras (ex.: varrer o DataFrame a cada busca).
+    assert _mean_search_seconds(_full_universe_index(), rounds=5) < 0.05
+
+
+@pytest.mark.skipif(not os.getenv("RUN_BENCHMARKS"), reason="benchmark: defina RUN_BENCHMARKS=1")
+def test_search_is_sub_millisecond_on_full_universe():
+    assert _mean_search_seconds(_full_universe_index()) < 0.001